@@ -1,4 +1,11 @@
-from  models.interfaz import main
+import sys
+
+if "--profile-startup" in sys.argv:
+    # Medir las importaciones desde el principio, antes de cargar la interfaz
+    from models.perfil import medidor_importaciones
+    medidor_importaciones.instalar()
+
+from models.interfaz import main
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,6 @@
+"""Punto de entrada de ``python -m models`` (análisis sin interfaz gráfica)."""
+import sys
+
+from models.cli import main
+
+sys.exit(main())
@@ -0,0 +1,185 @@
+"""
+Medición de los caminos críticos de la aplicación sobre redes sintéticas.
+
+Cada paso se mide ``repeticiones`` veces sobre redes de distintos tamaños y
+los resultados se guardan en JSON para comparar versiones.
+"""
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from models.flujo import maximo_flujo, tanques_y_casas
+from models.funtions import assign_graph_positions, load_graph_from_json
+from models.generador import generar_por_tamano, guardar_red
+from models.layout import CacheLayout
+from models.optimizacion import podar_conexiones
+from models.recomendaciones import generar_recomendaciones
+from models.red import WaterNetwork
+
+TAMANOS = (10 ** 2, 10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6)
+PASOS = ('carga', 'layout', 'render', 'optimizacion', 'flujo_maximo', 'recomendaciones')
+
+# Tamaño máximo (nodos) en el que se mide cada paso; los más lentos se omiten en redes grandes
+LIMITES = {
+    'layout': 10 ** 5,
+    'render': 10 ** 4,
+}
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def version_actual():
+    """Commit del repositorio (o None si no es un repositorio git)."""
+    try:
+        salida = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=RAIZ,
+                                capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return salida.stdout.strip() or None
+
+
+def medir(funcion, repeticiones):
+    """Tiempos de ``repeticiones`` llamadas y el resultado de la última."""
+    tiempos = []
+    resultado = None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return {
+        'tiempos': tiempos,
+        'minimo': min(tiempos),
+        'mediana': statistics.median(tiempos),
+    }, resultado
+
+
+def _renderizar(graph, pos, data):
+    # Sin Qt: figura de matplotlib sobre el backend Agg
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+    from models.render import RUTAS_ICONOS, RenderizadorRed, cargar_iconos
+
+    figure = Figure(figsize=(12, 10))
+    iconos = cargar_iconos({tipo: os.path.join(RAIZ, ruta) for tipo, ruta in RUTAS_ICONOS.items()})
+    RenderizadorRed(figure, FigureCanvasAgg(figure), iconos).dibujar(graph, pos, data)
+
+
+def _optimizar(file_path):
+    # Lo mismo que optimize_graph_connections: podar y quitar las aristas de la red
+    graph, data = load_graph_from_json(file_path)
+    network = WaterNetwork(data, graph)
+    inicio = time.perf_counter()
+    eliminadas, _ = podar_conexiones(network.graph)
+    with network.batch():
+        for u, v, _, _ in eliminadas:
+            network.eliminar_arista(u, v)
+    return time.perf_counter() - inicio
+
+
+def medir_tamano(nodos, repeticiones=3, pasos=PASOS, limites=LIMITES, directorio=None, semilla=0,
+                 callback=None):
+    """
+    Generar (o reutilizar) la red de ``nodos`` elementos y medir cada paso.
+
+    Los pasos que superan su límite de tamaño quedan como ``{'omitido': ...}``.
+    ``callback(paso)`` se llama antes de medir cada paso.
+    """
+    directorio = directorio or tempfile.gettempdir()
+    file_path = os.path.join(directorio, f"red_{nodos}_{semilla}.json")
+    if not os.path.exists(file_path):
+        guardar_red(generar_por_tamano(nodos, semilla=semilla), file_path)
+
+    resultado = {'nodos_pedidos': nodos, 'archivo': file_path, 'bytes': os.path.getsize(file_path), 'pasos': {}}
+    graph, data = load_graph_from_json(file_path)
+    resultado.update(nodos=graph.number_of_nodes(), aristas=graph.number_of_edges(), barrios=len(data))
+    pos = None
+
+    for paso in pasos:
+        if nodos > limites.get(paso, float('inf')):
+            resultado['pasos'][paso] = {'omitido': f"más de {limites[paso]} nodos"}
+            continue
+        if callback is not None:
+            callback(paso)
+
+        if paso == 'carga':
+            medicion, _ = medir(lambda: load_graph_from_json(file_path), repeticiones)
+        elif paso == 'layout':
+            # Sin caché: el peor caso, todos los barrios se distribuyen
+            medicion, pos = medir(lambda: assign_graph_positions(graph, data, CacheLayout()), repeticiones)
+        elif paso == 'render':
+            if pos is None:
+                pos = assign_graph_positions(graph, data, CacheLayout())
+            medicion, _ = medir(lambda: _renderizar(graph, pos, data), repeticiones)
+        elif paso == 'optimizacion':
+            # La poda modifica la red: cada repetición parte de una carga nueva (fuera de la medición)
+            tiempos = [_optimizar(file_path) for _ in range(repeticiones)]
+            medicion = {'tiempos': tiempos, 'minimo': min(tiempos), 'mediana': statistics.median(tiempos)}
+        elif paso == 'flujo_maximo':
+            tanks, houses = tanques_y_casas(graph)
+            medicion, flujo = medir(lambda: maximo_flujo(graph, tanks[0], houses[-1], con_flujo=False),
+                                    repeticiones)
+            medicion.update(backend=flujo['backend'], valor=flujo['valor'])
+        elif paso == 'recomendaciones':
+            medicion, recomendaciones = medir(lambda: generar_recomendaciones(graph), repeticiones)
+            medicion['cantidad'] = len(recomendaciones)
+        else:
+            raise ValueError(f"Paso desconocido: {paso}")
+        resultado['pasos'][paso] = medicion
+
+    return resultado
+
+
+def informe(resultados, repeticiones, semilla=0):
+    """Resultados de ``medir_tamano`` con los datos del entorno, listos para JSON."""
+    return {
+        'version': version_actual(),
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'plataforma': platform.platform(),
+        'procesadores': os.cpu_count(),
+        'repeticiones': repeticiones,
+        'semilla': semilla,
+        'resultados': resultados,
+    }
+
+
+def ejecutar(tamanos=TAMANOS, repeticiones=3, pasos=PASOS, limites=LIMITES, directorio=None, semilla=0,
+             callback=None):
+    """Medir todos los tamaños y devolver el informe."""
+    resultados = [
+        medir_tamano(nodos, repeticiones, pasos, limites, directorio, semilla, callback)
+        for nodos in tamanos
+    ]
+    return informe(resultados, repeticiones, semilla)
+
+
+def comparar(anterior, actual, tolerancia=1.2):
+    """
+    Comparar dos informes por tamaño y paso (mediana).
+
+    Retorna una lista de ``(nodos, paso, antes, ahora, razon, regresion)``;
+    hay regresión si el paso tarda más de ``tolerancia`` veces lo anterior.
+    """
+    previos = {r['nodos_pedidos']: r['pasos'] for r in anterior['resultados']}
+    filas = []
+    for resultado in actual['resultados']:
+        pasos_previos = previos.get(resultado['nodos_pedidos'], {})
+        for paso, medicion in resultado['pasos'].items():
+            previo = pasos_previos.get(paso)
+            if 'mediana' not in medicion or not previo or 'mediana' not in previo:
+                continue
+            razon = medicion['mediana'] / previo['mediana'] if previo['mediana'] else float('inf')
+            filas.append((resultado['nodos_pedidos'], paso, previo['mediana'], medicion['mediana'],
+                          razon, razon > tolerancia))
+    return filas
+
+
+def leer_informe(file_path):
+    with open(file_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
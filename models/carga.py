@@ -0,0 +1,164 @@
+"""Carga incremental de archivos JSON de red muy grandes."""
+import codecs
+import json
+import os
+
+import networkx as nx
+
+from models.red import aristas_de_conexion, atributos_nodo
+
+TAMANO_BLOQUE = 1 << 20  # bytes leídos por vez
+
+
+def iterar_barrios(file_path, callback=None, tamano_bloque=TAMANO_BLOQUE):
+    """
+    Recorrer los barrios del arreglo de nivel superior sin leer todo el archivo.
+
+    Solo se mantiene en memoria el texto del barrio que se está decodificando.
+    ``callback(bytes_leidos, bytes_totales)`` se llama tras cada barrio; si
+    devuelve True la lectura se detiene.
+    """
+    total = os.path.getsize(file_path)
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder('utf-8')()
+
+    with open(file_path, 'rb') as f:
+        texto = ''
+        pos = 0
+        fin = False
+
+        def leer(cantidad):
+            # Conservar solo lo no consumido antes de agregar el bloque nuevo
+            nonlocal texto, pos, fin
+            bloque = f.read(cantidad)
+            fin = not bloque
+            texto = texto[pos:] + utf8.decode(bloque, final=fin)
+            pos = 0
+
+        def saltar_espacios():
+            nonlocal pos
+            while True:
+                while pos < len(texto) and texto[pos] in ' \t\r\n':
+                    pos += 1
+                if pos < len(texto) or fin:
+                    return
+                leer(tamano_bloque)
+
+        leer(tamano_bloque)
+        if texto.startswith('\ufeff'):
+            pos = 1
+        saltar_espacios()
+        if pos >= len(texto) or texto[pos] != '[':
+            raise ValueError("El archivo debe contener una lista de barrios")
+        pos += 1
+
+        primero = True
+        while True:
+            saltar_espacios()
+            if pos >= len(texto):
+                raise ValueError("Fin de archivo inesperado: falta ']'")
+            if texto[pos] == ']':
+                return
+            if not primero:
+                if texto[pos] != ',':
+                    raise ValueError(f"Se esperaba ',' entre barrios (byte ~{f.tell()})")
+                pos += 1
+                saltar_espacios()
+            primero = False
+
+            while True:
+                try:
+                    barrio, pos = decoder.raw_decode(texto, pos)
+                    break
+                except json.JSONDecodeError:
+                    if fin:
+                        raise
+                    # Barrio incompleto: duplicar lo leído para no re-decodificar en exceso
+                    leer(max(tamano_bloque, len(texto) - pos))
+
+            yield barrio
+            if callback is not None and callback(f.tell(), total):
+                return
+
+
+def listar_barrios(file_path, callback=None):
+    """Nombres de los barrios del archivo (una pasada con memoria acotada)."""
+    return [neighborhood.get('name') for neighborhood in iterar_barrios(file_path, callback)]
+
+
+def esqueleto_barrio(neighborhood):
+    """Barrio sin las listas de conexiones (ya volcadas al grafo)."""
+    return {
+        'name': neighborhood['name'],
+        'elements': [
+            {k: v for k, v in element.items() if k != 'connections'}
+            for element in neighborhood['elements']
+        ],
+    }
+
+
+def cargar_red_en_flujo(file_path, barrios=None, callback=None, tamano_bloque=TAMANO_BLOQUE,
+                        conservar_conexiones=True):
+    """
+    Construir el grafo a medida que se leen los barrios del archivo.
+
+    Produce el mismo grafo que ``construir_grafo``: los nodos en el orden del
+    archivo y, en cada tubería, los atributos de la última entrada que la
+    describe. Con ``barrios`` (nombres) solo se cargan esos barrios y las
+    tuberías entre sus elementos. Retorna ``(G, data)``; si ``callback``
+    detiene la lectura son solo los barrios leídos hasta entonces (ver
+    ``leer_red_en_flujo``).
+
+    Con ``conservar_conexiones=False`` los barrios de ``data`` se reducen a
+    ``esqueleto_barrio`` a medida que se leen: la memoria queda acotada al
+    grafo, pero los datos ya no sirven para editar ni guardar la red.
+    """
+    G, data, _ = leer_red_en_flujo(file_path, barrios, callback, tamano_bloque, conservar_conexiones)
+    return G, data
+
+
+def leer_red_en_flujo(file_path, barrios=None, callback=None, tamano_bloque=TAMANO_BLOQUE,
+                      conservar_conexiones=True):
+    """
+    Como ``cargar_red_en_flujo``, pero retorna ``(G, data, completa)``.
+
+    ``completa`` es False si ``callback`` detuvo la lectura antes del final:
+    una red a medias no debe guardarse en lugar del archivo ni de su snapshot.
+    """
+    seleccion = set(barrios) if barrios is not None else None
+    G = nx.DiGraph()
+    data = []
+    pendientes = []  # aristas hacia elementos que todavía no aparecieron
+
+    detenida = False
+
+    def avisar(leidos, total):
+        nonlocal detenida
+        detenida = bool(callback(leidos, total))
+        return detenida
+
+    for neighborhood in iterar_barrios(file_path, avisar if callback is not None else None, tamano_bloque):
+        if seleccion is not None and neighborhood.get('name') not in seleccion:
+            continue
+        data.append(neighborhood if conservar_conexiones else esqueleto_barrio(neighborhood))
+        for element in neighborhood['elements']:
+            G.add_node(element['name'], **atributos_nodo(element))
+        for element in neighborhood['elements']:
+            for conn in element.get('connections', []):
+                for u, v, attrs in aristas_de_conexion(element['name'], conn):
+                    if u in G and v in G:
+                        G.add_edge(u, v, **attrs)
+                    else:
+                        pendientes.append((u, v, attrs))
+
+    # Si un barrio posterior agregó la tubería, su entrada es la última y manda
+    # (como en construir_grafo); las demás se agregan en el orden del archivo
+    agregadas = {(u, v) for u, v, _ in pendientes if G.has_edge(u, v)}
+    for u, v, attrs in pendientes:
+        if (u, v) in agregadas:
+            continue
+        if seleccion is not None and (u not in G or v not in G):
+            continue  # Tubería hacia un barrio que no se cargó
+        G.add_edge(u, v, **attrs)
+
+    return G, data, not detenida
@@ -0,0 +1,250 @@
+"""
+Análisis por lotes sin interfaz gráfica.
+
+Uso::
+
+    python -m models analyze redes/ --maxflow T1 C7 --optimize --recommend --json-out resultados.json
+    python -m models generate red.json --barrios 40 --tanques 5 --casas 200
+    python -m models benchmark --sizes 100 1000 10000 --json-out bench.json --compare bench_anterior.json
+
+No importa PyQt5: se puede ejecutar en un servidor (p. ej. desde cron).
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from models import benchmark
+from models.flujo import BACKEND_AUTO, BACKENDS, calcular_matriz_flujo, maximo_flujo
+from models.funtions import load_graph_from_json
+from models.generador import DISTRIBUCIONES, generar_red, guardar_red
+from models.optimizacion import podar_conexiones
+from models.recomendaciones import generar_recomendaciones
+
+SUFIJOS_AUXILIARES = ('.layout.json',)  # archivos que acompañan a una red y no son redes
+
+
+def archivos_de_red(rutas):
+    """Expandir directorios a sus ``*.json`` (en orden) y conservar los archivos indicados."""
+    archivos = []
+    for ruta in rutas:
+        if os.path.isdir(ruta):
+            archivos.extend(
+                os.path.join(ruta, nombre) for nombre in sorted(os.listdir(ruta))
+                if nombre.endswith('.json') and not nombre.endswith(SUFIJOS_AUXILIARES)
+            )
+        else:
+            archivos.append(ruta)
+    return archivos
+
+
+def _flujo(graph, source, sink, backend):
+    for nombre in (source, sink):
+        if nombre not in graph:
+            return {'source': source, 'sink': sink, 'error': f"No existe el elemento '{nombre}'"}
+    resultado = maximo_flujo(graph, source, sink, backend, con_flujo=False)
+    del resultado['flujo']
+    return resultado
+
+
+def analizar_archivo(file_path, flujos=(), matriz=False, optimizar=False, recomendar=False,
+                     backend=BACKEND_AUTO, workers=None):
+    """
+    Cargar una red y calcular lo pedido. Retorna un dict serializable a JSON.
+
+    Si el archivo no se puede leer el dict tiene la clave ``error`` y el
+    resto del lote sigue.
+    """
+    resultado = {'archivo': file_path}
+    try:
+        inicio = time.perf_counter()
+        G, data = load_graph_from_json(file_path)
+        resultado.update(
+            barrios=len(data),
+            nodos=G.number_of_nodes(),
+            aristas=G.number_of_edges(),
+            tiempo_carga=time.perf_counter() - inicio,
+        )
+
+        if flujos:
+            resultado['flujos'] = [_flujo(G, source, sink, backend) for source, sink in flujos]
+
+        if matriz:
+            tanks, houses, valores = calcular_matriz_flujo(G, workers=workers, backend=backend)
+            resultado['matriz'] = {'tanques': tanks, 'casas': houses, 'valores': valores}
+
+        if optimizar:
+            eliminadas, puentes = podar_conexiones(G)
+            resultado['optimizacion'] = {
+                'eliminadas': [
+                    {'origen': u, 'destino': v, 'capacidad': capacidad, 'motivo': motivo}
+                    for u, v, capacidad, motivo in eliminadas
+                ],
+                'puentes': sorted([u, v] for u, v in puentes),
+            }
+
+        if recomendar:
+            resultado['recomendaciones'] = generar_recomendaciones(G)
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        resultado['error'] = f"{type(e).__name__}: {e}"
+    return resultado
+
+
+def _analizar(argumentos):
+    file_path, opciones = argumentos
+    return analizar_archivo(file_path, **opciones)
+
+
+def resumen(resultado):
+    """Una línea legible por archivo."""
+    if 'error' in resultado:
+        return f"{resultado['archivo']}: ERROR {resultado['error']}"
+    partes = [f"{resultado['nodos']} nodos, {resultado['aristas']} aristas"]
+    for flujo in resultado.get('flujos', []):
+        valor = flujo.get('valor', flujo.get('error'))
+        partes.append(f"flujo {flujo['source']} -> {flujo['sink']}: {valor}")
+    if 'matriz' in resultado:
+        matriz = resultado['matriz']
+        partes.append(f"matriz {len(matriz['tanques'])}x{len(matriz['casas'])}")
+    if 'optimizacion' in resultado:
+        partes.append(f"{len(resultado['optimizacion']['eliminadas'])} conexiones prescindibles")
+    if 'recomendaciones' in resultado:
+        partes.append(f"{len(resultado['recomendaciones'])} recomendaciones")
+    return f"{resultado['archivo']}: " + "; ".join(partes)
+
+
+def crear_parser():
+    parser = argparse.ArgumentParser(prog="python -m models", description="Análisis de redes de tuberías sin interfaz gráfica")
+    comandos = parser.add_subparsers(dest="comando", required=True)
+
+    analyze = comandos.add_parser("analyze", help="Analizar uno o más archivos JSON de red")
+    analyze.add_argument("rutas", nargs="+", metavar="RUTA", help="Archivos JSON o directorios con archivos JSON")
+    analyze.add_argument("--maxflow", nargs=2, action="append", default=[], metavar=("ORIGEN", "SUMIDERO"),
+                         help="Flujo máximo entre dos elementos (se puede repetir)")
+    analyze.add_argument("--matrix", action="store_true", help="Matriz de flujo máximo de todos los tanques a todas las casas")
+    analyze.add_argument("--optimize", action="store_true", help="Conexiones que la optimización eliminaría")
+    analyze.add_argument("--recommend", action="store_true", help="Recomendaciones sobre la red")
+    analyze.add_argument("--backend", choices=[BACKEND_AUTO] + list(BACKENDS), default=BACKEND_AUTO,
+                         help="Algoritmo de flujo máximo")
+    analyze.add_argument("--json-out", metavar="RUTA", help="Guardar los resultados en JSON ('-' para la salida estándar)")
+    analyze.add_argument("--jobs", type=int, default=1, help="Archivos analizados en paralelo (procesos)")
+
+    generate = comandos.add_parser("generate", help="Generar una red sintética")
+    generate.add_argument("salida", metavar="RUTA", help="Archivo JSON a escribir")
+    generate.add_argument("--barrios", type=int, default=4)
+    generate.add_argument("--tanques", type=int, default=3, help="Tanques por barrio")
+    generate.add_argument("--casas", type=int, default=30, help="Casas por barrio")
+    generate.add_argument("--densidad", type=float, default=2.0, help="Tuberías por elemento")
+    generate.add_argument("--distribucion", choices=DISTRIBUCIONES, default='uniforme',
+                          help="Distribución de las capacidades")
+    generate.add_argument("--capacidad", type=int, nargs=2, default=[5, 50], metavar=("MIN", "MAX"))
+    generate.add_argument("--entre-barrios", type=float, default=0.02,
+                          help="Fracción de tuberías entre tanques de barrios distintos")
+    generate.add_argument("--semilla", type=int, default=0)
+
+    bench = comandos.add_parser("benchmark", help="Medir carga, layout, render, optimización, flujo y recomendaciones")
+    bench.add_argument("--sizes", type=int, nargs="+", default=list(benchmark.TAMANOS), metavar="NODOS")
+    bench.add_argument("--steps", nargs="+", choices=benchmark.PASOS, default=list(benchmark.PASOS))
+    bench.add_argument("--repeat", type=int, default=3, help="Repeticiones de cada medición")
+    bench.add_argument("--max-layout", type=int, default=benchmark.LIMITES['layout'],
+                       help="Tamaño máximo en el que se mide el layout")
+    bench.add_argument("--max-render", type=int, default=benchmark.LIMITES['render'],
+                       help="Tamaño máximo en el que se mide el render")
+    bench.add_argument("--dir", help="Directorio donde se generan (y reutilizan) las redes")
+    bench.add_argument("--semilla", type=int, default=0)
+    bench.add_argument("--json-out", metavar="RUTA", help="Guardar el informe en JSON ('-' para la salida estándar)")
+    bench.add_argument("--compare", metavar="RUTA", help="Informe anterior con el que comparar")
+    bench.add_argument("--tolerance", type=float, default=1.2,
+                       help="Razón a partir de la cual un paso cuenta como regresión")
+    return parser
+
+
+def _escribir_json(datos, ruta):
+    texto = json.dumps(datos, indent=2, ensure_ascii=False)
+    if ruta == '-':
+        print(texto)
+        return
+    temporal = ruta + '.tmp'
+    with open(temporal, 'w', encoding='utf-8') as f:
+        f.write(texto)
+    os.replace(temporal, ruta)
+
+
+def generar(args):
+    data = generar_red(
+        barrios=args.barrios, tanques=args.tanques, casas=args.casas, densidad=args.densidad,
+        distribucion=args.distribucion, capacidad_minima=args.capacidad[0],
+        capacidad_maxima=args.capacidad[1], entre_barrios=args.entre_barrios, semilla=args.semilla,
+    )
+    guardar_red(data, args.salida)
+    elementos = sum(len(barrio['elements']) for barrio in data)
+    print(f"{args.salida}: {len(data)} barrios, {elementos} elementos")
+    return 0
+
+
+def medir(args):
+    salida = sys.stderr if args.json_out == '-' else sys.stdout
+    limites = dict(benchmark.LIMITES, layout=args.max_layout, render=args.max_render)
+
+    resultados = []
+    for nodos in args.sizes:
+        resultado = benchmark.medir_tamano(
+            nodos, args.repeat, args.steps, limites, args.dir, args.semilla,
+            callback=lambda paso: print(f"  {nodos} nodos: {paso}...", file=salida, flush=True),
+        )
+        resultados.append(resultado)
+        for paso, medicion in resultado['pasos'].items():
+            detalle = medicion['omitido'] if 'omitido' in medicion else f"{medicion['mediana'] * 1000:.1f} ms"
+            print(f"{resultado['nodos']:>9} nodos  {paso:<16} {detalle}", file=salida)
+    informe = benchmark.informe(resultados, args.repeat, args.semilla)
+
+    if args.json_out:
+        _escribir_json(informe, args.json_out)
+
+    if args.compare:
+        regresiones = 0
+        for nodos, paso, antes, ahora, razon, regresion in benchmark.comparar(
+                benchmark.leer_informe(args.compare), informe, args.tolerance):
+            marca = "  REGRESIÓN" if regresion else ""
+            print(f"{nodos:>9} nodos  {paso:<16} {antes * 1000:.1f} -> {ahora * 1000:.1f} ms "
+                  f"(x{razon:.2f}){marca}", file=salida)
+            regresiones += regresion
+        return 1 if regresiones else 0
+    return 0
+
+
+def main(argv=None):
+    args = crear_parser().parse_args(argv)
+    if args.comando == "generate":
+        return generar(args)
+    if args.comando == "benchmark":
+        return medir(args)
+
+    archivos = archivos_de_red(args.rutas)
+    opciones = {
+        'flujos': [tuple(par) for par in args.maxflow],
+        'matriz': args.matrix,
+        'optimizar': args.optimize,
+        'recomendar': args.recommend,
+        'backend': args.backend,
+        # Con varios archivos en paralelo cada uno calcula su matriz en su propio proceso
+        'workers': 1 if args.jobs > 1 else None,
+    }
+
+    trabajos = [(file_path, opciones) for file_path in archivos]
+    if args.jobs > 1 and len(trabajos) > 1:
+        with ProcessPoolExecutor(max_workers=min(args.jobs, len(trabajos))) as pool:
+            resultados = list(pool.map(_analizar, trabajos))
+    else:
+        resultados = [_analizar(trabajo) for trabajo in trabajos]
+
+    salida_estandar = args.json_out == '-'
+    for resultado in resultados:
+        print(resumen(resultado), file=sys.stderr if salida_estandar else sys.stdout)
+
+    if args.json_out:
+        _escribir_json({'resultados': resultados}, args.json_out)
+
+    return 1 if any('error' in resultado for resultado in resultados) else 0
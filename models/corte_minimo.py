@@ -0,0 +1,169 @@
+"""Índice de cortes mínimos entre cualquier par de elementos (árbol de Gomory-Hu)."""
+import threading
+from collections import deque
+
+import networkx as nx
+from networkx.algorithms.flow import edmonds_karp
+
+
+def vista_simetrica(graph, capacity='capacidad', solo_bidireccionales=False):
+    """
+    Grafo no dirigido con la capacidad de cada tubería.
+
+    Cada par u -> v / v -> u se convierte en una arista con la mayor de sus
+    capacidades. Con ``solo_bidireccionales`` se usan solo las tuberías 'both'.
+    """
+    H = nx.Graph()
+    H.add_nodes_from(graph.nodes())
+    for u, v, data in graph.edges(data=True):
+        if u == v:
+            continue
+        if solo_bidireccionales and data.get('direction') != 'both':
+            continue
+        capacidad = data.get(capacity, 0)
+        if H.has_edge(u, v):
+            capacidad = max(capacidad, H[u][v]['capacidad'])
+        H.add_edge(u, v, capacidad=capacidad)
+    return H
+
+
+class ConstruccionCancelada(Exception):
+    """La construcción del árbol se detuvo porque ``cancelada()`` devolvió True."""
+
+
+class IndiceCorteMinimo:
+    """
+    Árbol de Gomory-Hu de la vista simétrica de la red, por versión del grafo.
+
+    Una vez construido, el corte mínimo entre dos elementos es la arista de
+    menor peso en el camino que los une en el árbol, y se obtiene en O(V)
+    sin calcular ningún flujo.
+
+    Para construirlo en segundo plano, ``preparar`` copia la vista simétrica
+    en el hilo que edita la red y ``construir_preparado`` arma el árbol en
+    otro hilo; si llega un pedido más nuevo el resultado anterior se descarta.
+    """
+
+    def __init__(self, solo_bidireccionales=False):
+        self.solo_bidireccionales = solo_bidireccionales
+        self.version = None
+        self._simetrico = None
+        self._padre = {}    # nodo -> (padre en el árbol, peso de la arista)
+        self._nivel = {}
+        self._hijos = {}
+        self._componente = {}
+        self._version_pedida = None
+        self._lock = threading.Lock()
+
+    def listo(self, version):
+        return self.version == version
+
+    def construir(self, graph, version):
+        """Construir el índice en el hilo actual."""
+        self.construir_preparado(self.preparar(graph, version), version)
+
+    def preparar(self, graph, version):
+        """
+        Copiar la vista simétrica de ``graph`` y registrar ``version`` como la pedida.
+
+        Se llama en el hilo que edita la red, para que ``construir_preparado``
+        no lea el grafo mientras cambia.
+        """
+        simetrico = vista_simetrica(graph, solo_bidireccionales=self.solo_bidireccionales)
+        with self._lock:
+            self._version_pedida = version
+        return simetrico
+
+    def construir_preparado(self, simetrico, version, cancelada=None):
+        """
+        Armar el árbol a partir de una vista de ``preparar``.
+
+        ``cancelada()`` se consulta antes de cada flujo máximo. Retorna True
+        si el índice quedó al día con ``version``, False si se canceló o si
+        mientras tanto se pidió una versión más nueva.
+        """
+        def flujo(*args, **kwargs):
+            if cancelada is not None and cancelada():
+                raise ConstruccionCancelada()
+            return edmonds_karp(*args, **kwargs)
+
+        padre, nivel, hijos, componente = {}, {}, {}, {}
+        for i, nodos in enumerate(nx.connected_components(simetrico)):
+            if len(nodos) == 1:
+                nodo = next(iter(nodos))
+                padre[nodo], nivel[nodo], componente[nodo] = (None, 0), 0, i
+                continue
+            try:
+                arbol = nx.gomory_hu_tree(simetrico.subgraph(nodos), capacity='capacidad', flow_func=flujo)
+            except ConstruccionCancelada:
+                return False
+
+            # Enraizar el árbol para recorrer caminos subiendo por los padres
+            raiz = next(iter(nodos))
+            padre[raiz], nivel[raiz] = (None, 0), 0
+            cola = deque([raiz])
+            while cola:
+                x = cola.popleft()
+                componente[x] = i
+                for y, data in arbol[x].items():
+                    if y not in nivel:
+                        padre[y] = (x, data['weight'])
+                        nivel[y] = nivel[x] + 1
+                        hijos.setdefault(x, []).append(y)
+                        cola.append(y)
+
+        with self._lock:
+            if self._version_pedida != version:
+                return False  # Llegó una edición más nueva; este resultado ya no sirve
+            self._simetrico = simetrico
+            self._padre, self._nivel, self._hijos, self._componente = padre, nivel, hijos, componente
+            self.version = version
+        return True
+
+    def consultar(self, u, v):
+        """
+        Valor del corte mínimo entre ``u`` y ``v`` y las tuberías que lo forman.
+
+        Retorna ``(valor, aristas_corte)``; si están en componentes distintas
+        el valor es 0 y no hay aristas.
+        """
+        with self._lock:
+            simetrico, padre, nivel, hijos, componente = (
+                self._simetrico, self._padre, self._nivel, self._hijos, self._componente
+            )
+        if simetrico is None:
+            raise RuntimeError("El índice de cortes mínimos no está construido")
+        if u == v:
+            raise ValueError("El origen y el destino deben ser distintos")
+        if componente[u] != componente[v]:
+            return 0, []
+
+        # Subir por el árbol hasta el ancestro común guardando la arista mínima
+        minimo = None  # (peso, hijo)
+        a, b = u, v
+        while a != b:
+            if nivel[a] < nivel[b]:
+                a, b = b, a
+            arriba, peso = padre[a]
+            if minimo is None or peso < minimo[0]:
+                minimo = (peso, a)
+            a = arriba
+
+        valor, hijo = minimo
+        lado = self._subarbol(hijo, hijos)
+        aristas_corte = [
+            (x, y, simetrico[x][y]['capacidad'])
+            for x in lado for y in simetrico[x] if y not in lado
+        ]
+        return valor, aristas_corte
+
+    @staticmethod
+    def _subarbol(raiz, hijos):
+        """Nodos del subárbol enraizado en ``raiz`` (un lado del corte)."""
+        lado = {raiz}
+        pila = [raiz]
+        while pila:
+            for hijo in hijos.get(pila.pop(), ()):
+                lado.add(hijo)
+                pila.append(hijo)
+        return lado
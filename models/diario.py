@@ -0,0 +1,181 @@
+"""Diario de cambios: las ediciones se agregan al final y se compactan en el JSON."""
+import json
+import os
+import threading
+
+from models.snapshot import firma_archivo
+
+MAX_PENDIENTES = 500  # cambios a partir de los cuales conviene compactar enseguida
+
+
+def ruta_diario(file_path):
+    """Diario que acompaña a un JSON de red."""
+    return os.path.splitext(file_path)[0] + '.journal'
+
+
+def _fsync(f):
+    f.flush()
+    os.fsync(f.fileno())
+
+
+class Diario:
+    """
+    Registro de solo agregado de las mutaciones de una ``WaterNetwork``.
+
+    La primera línea indica la firma del JSON sobre el que se aplican los
+    cambios; cada línea siguiente es ``{"op", "args", "kwargs"}`` con el
+    nombre del método de la red. Guardar un cambio cuesta lo que mide el
+    cambio, no la red. ``compactar`` vuelca la red al JSON con reemplazo
+    atómico y deja en el diario solo lo que llegó durante la compactación.
+    """
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.ruta = ruta_diario(file_path)
+        self._lock = threading.Lock()
+        self._compactando = threading.Lock()
+        self._archivo = None
+        self._pendientes = 0
+
+    # ------------------------------------------------------------------
+    # Apertura y reproducción
+    # ------------------------------------------------------------------
+    def _leer(self, ruta):
+        """Registros válidos de un diario cuya base es el JSON actual, o None."""
+        try:
+            with open(ruta, 'r', encoding='utf-8') as f:
+                lineas = f.read().split('\n')
+        except OSError:
+            return None
+        try:
+            cabecera = json.loads(lineas[0])
+        except ValueError:
+            return None
+        if cabecera.get('base') != firma_archivo(self.file_path):
+            return None
+
+        registros = []
+        for linea in lineas[1:]:
+            if not linea:
+                continue
+            try:
+                registros.append(json.loads(linea))
+            except ValueError:
+                break  # Última línea cortada por un cierre abrupto
+        return registros
+
+    def por_reproducir(self):
+        """True si al abrir hay cambios que aplicar (también los de una compactación interrumpida)."""
+        return bool(self._leer(self.ruta)) or os.path.exists(self.ruta + '.tmp')
+
+    def reproducir(self, network):
+        """
+        Aplicar a ``network`` los cambios del diario y abrirlo para seguir agregando.
+
+        Si el diario es de otra versión del JSON (se editó por fuera) se
+        aparta como ``.journal.descartado``. Retorna ``(aplicados, fallidos)``.
+        """
+        temporal = self.ruta + '.tmp'
+        registros = self._leer(self.ruta)
+        if registros is None and os.path.exists(temporal):
+            # Cierre entre los dos reemplazos de una compactación: el diario nuevo es el temporal
+            registros = self._leer(temporal)
+            if registros is not None:
+                os.replace(temporal, self.ruta)
+        if registros is None and os.path.exists(self.ruta):
+            os.replace(self.ruta, self.ruta + '.descartado')
+
+        aplicados = fallidos = 0
+        for registro in registros or []:
+            try:
+                getattr(network, registro['op'])(*registro.get('args', []), **registro.get('kwargs', {}))
+                aplicados += 1
+            except (KeyError, ValueError, AttributeError, TypeError):
+                fallidos += 1
+
+        if registros is None:
+            self._reiniciar()
+        else:
+            self._archivo = open(self.ruta, 'a', encoding='utf-8')
+            self._pendientes = len(registros)
+        return aplicados, fallidos
+
+    def _reiniciar(self):
+        """Empezar un diario vacío sobre el JSON actual."""
+        temporal = self.ruta + '.tmp'
+        with open(temporal, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({'base': firma_archivo(self.file_path)}) + '\n')
+            _fsync(f)
+        os.replace(temporal, self.ruta)
+        if self._archivo is not None:
+            self._archivo.close()
+        self._archivo = open(self.ruta, 'a', encoding='utf-8')
+        self._pendientes = 0
+
+    def cerrar(self):
+        if self._archivo is not None:
+            self._archivo.close()
+            self._archivo = None
+
+    # ------------------------------------------------------------------
+    # Registro
+    # ------------------------------------------------------------------
+    def pendientes(self):
+        """Cambios registrados que todavía no están en el JSON."""
+        return self._pendientes
+
+    def registrar(self, op, args, kwargs):
+        """Oyente de ``WaterNetwork``: agregar el cambio y forzarlo a disco."""
+        linea = json.dumps({'op': op, 'args': list(args), 'kwargs': kwargs}, ensure_ascii=False) + '\n'
+        with self._lock:
+            self._archivo.write(linea)
+            _fsync(self._archivo)
+            self._pendientes += 1
+
+    # ------------------------------------------------------------------
+    # Compactación
+    # ------------------------------------------------------------------
+    def compactar(self, network):
+        """
+        Volcar la red completa al JSON y vaciar el diario (apto para otro hilo).
+
+        El JSON se serializa con el lock de la red tomado; los cambios que
+        llegan mientras se escribe quedan en el diario nuevo. Ambos archivos
+        se reemplazan de forma atómica (temporal + ``os.replace``). Con un
+        lote abierto no se compacta: el JSON no debe contener cambios que
+        todavía pueden deshacerse. Retorna la cantidad de cambios compactados.
+        """
+        with self._compactando:
+            return self._compactar(network)
+
+    def _compactar(self, network):
+        with network.lock:
+            if network.en_lote():
+                return 0
+            texto = json.dumps(network.data, indent=4)
+            with self._lock:
+                self._archivo.flush()
+                corte = self._archivo.tell()
+                compactados = self._pendientes
+
+        temporal = self.file_path + '.tmp'
+        with open(temporal, 'w') as f:
+            f.write(texto)
+            _fsync(f)
+
+        with self._lock:
+            self._archivo.flush()
+            with open(self.ruta, 'rb') as f:
+                f.seek(corte)
+                cola = f.read().decode('utf-8')
+            # El rename conserva tamaño y fecha: la firma del temporal es la del JSON final
+            diario_temporal = self.ruta + '.tmp'
+            with open(diario_temporal, 'w', encoding='utf-8') as f:
+                f.write(json.dumps({'base': firma_archivo(temporal)}) + '\n' + cola)
+                _fsync(f)
+            os.replace(temporal, self.file_path)
+            os.replace(diario_temporal, self.ruta)
+            self._archivo.close()
+            self._archivo = open(self.ruta, 'a', encoding='utf-8')
+            self._pendientes -= compactados
+        return compactados
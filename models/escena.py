@@ -0,0 +1,633 @@
+"""
+Dibujo escalable de la red con ``QGraphicsScene``/``QGraphicsView``.
+
+En lugar de un ítem por nodo (decenas de miles de objetos de Python), cada
+barrio se parte en bloques de hasta ``MAX_NODOS_BLOQUE`` nodos y cada bloque
+es un único ítem que pinta sus nodos y aristas con llamadas en lote
+(``drawLines``, ``drawPoints``, ``drawPixmapFragments``). El índice BSP de la
+escena descarta los bloques fuera de la vista y cada bloque elige el nivel
+de detalle según el zoom: puntos de vista de ciudad, íconos más cerca y
+nombres y capacidades a nivel de calle.
+
+Lejos del nivel de calle la red se muestra como mosaicos pintados en
+hilos del pool (``MosaicosRed``): solo se piden los mosaicos de la vista y
+de un margen alrededor, y desplazar la vista copia imágenes ya pintadas.
+"""
+import math
+import threading
+from collections import OrderedDict
+
+from PyQt5.QtCore import QLineF, QObject, QPointF, QRectF, QRunnable, QThreadPool, Qt, pyqtSignal
+from PyQt5.QtGui import QColor, QFont, QImage, QPainter, QPainterPath, QPen, QPixmap, QPolygonF
+from PyQt5.QtWidgets import QGraphicsItem, QGraphicsScene, QGraphicsSimpleTextItem, QGraphicsView
+
+from models.render import RADIO_ICONO, RUTAS_ICONOS
+
+ESCALA = 100                 # unidades de escena por unidad del layout
+MAX_NODOS_BLOQUE = 256       # nodos por ítem de la escena
+MAX_ARISTAS_CRUZADAS = 512   # aristas entre bloques distintos por ítem
+LADO_ICONO = 2 * RADIO_ICONO * ESCALA
+LARGO_FLECHA = 0.08 * ESCALA
+ALTO_TEXTO = 0.07 * ESCALA   # alto de las etiquetas en unidades de escena
+
+# Nivel de detalle según el lado del ícono en pantalla (píxeles)
+LADO_MINIMO_ICONO = 10       # por debajo: un punto por nodo
+LADO_MINIMO_ETIQUETAS = 32   # desde aquí: nombres y capacidades
+LADO_MAXIMO_CACHE = 4096     # bloques más grandes en pantalla no se cachean como pixmap
+ZOOM_MINIMO, ZOOM_MAXIMO = 0.002, 40.0
+
+# Mosaicos: (nivel, tx, ty) con el zoom redondeado hacia arriba a una potencia de 2
+LADO_MOSAICO = 256           # píxeles por lado de cada mosaico
+MAX_MOSAICOS = 256           # mosaicos en la caché LRU (256 KB cada uno)
+MARGEN_MOSAICOS = 1          # anillos de mosaicos fuera de la vista que se piden de antemano
+NIVELES_APROXIMACION = 3     # niveles más gruesos que se estiran mientras llega un mosaico
+CELDA_INDICE = 4 * ESCALA    # celdas del índice de bloques que usan los mosaicos
+
+COLORES_NODO = {'tank': QColor('#1f77b4'), 'house': QColor('#8c564b')}
+COLOR_NODO = QColor('#7f7f7f')
+COLOR_ARISTA = QColor('gray')
+COLOR_CAPACIDAD = QColor('blue')
+
+
+def a_escena(x, y):
+    """Posición del layout (y hacia arriba) en coordenadas de escena (y hacia abajo)."""
+    return x * ESCALA, -y * ESCALA
+
+
+def texto_tanque(node_data):
+    return f"{node_data.get('current_capacity', 0)}/{node_data.get('max_capacity', 0)}L"
+
+
+def nivel_mosaico(zoom):
+    """Nivel de los mosaicos para ``zoom``: se pintan a ``2 ** nivel`` y se reducen al mostrarlos."""
+    return math.ceil(math.log2(zoom))
+
+
+def usar_mosaicos(zoom):
+    """True si al nivel de ``zoom`` no se muestran etiquetas (los mosaicos no las pintan)."""
+    return LADO_ICONO * 2 ** nivel_mosaico(zoom) < LADO_MINIMO_ETIQUETAS
+
+
+def rect_mosaico(clave):
+    nivel, tx, ty = clave
+    lado = LADO_MOSAICO / 2 ** nivel
+    return QRectF(tx * lado, ty * lado, lado, lado)
+
+
+def claves_mosaicos(rect, nivel, margen=0):
+    """Claves de los mosaicos de ``nivel`` que cubren ``rect`` (más ``margen`` anillos alrededor)."""
+    lado = LADO_MOSAICO / 2 ** nivel
+    x0, x1 = math.floor(rect.left() / lado) - margen, math.floor(rect.right() / lado) + margen
+    y0, y1 = math.floor(rect.top() / lado) - margen, math.floor(rect.bottom() / lado) + margen
+    return [(nivel, tx, ty) for ty in range(y0, y1 + 1) for tx in range(x0, x1 + 1)]
+
+
+class CacheIconos:
+    """
+    Íconos escalados una sola vez por cada tamaño en pantalla.
+
+    ``pixmap`` es para el hilo de la interfaz; ``imagen`` devuelve ``QImage``,
+    que se puede usar desde los hilos que pintan mosaicos.
+    """
+
+    def __init__(self, rutas=RUTAS_ICONOS):
+        self.rutas = dict(rutas)
+        self.originales = {tipo: QPixmap(ruta) for tipo, ruta in rutas.items()}
+        self._escalados = {}
+        self._imagenes = {}
+        self._cerrojo = threading.Lock()
+
+    @staticmethod
+    def _lado(lado):
+        # Redondeado a potencias de 2 para reutilizar los íconos escalados
+        return min(256, 2 ** max(3, math.ceil(math.log2(max(lado, 1)))))
+
+    def pixmap(self, tipo, lado):
+        """Ícono de ``tipo`` de ``lado`` píxeles como ``QPixmap``."""
+        original = self.originales.get(tipo)
+        if original is None or original.isNull():
+            return None
+        clave = (tipo, self._lado(lado))
+        if clave not in self._escalados:
+            self._escalados[clave] = original.scaled(clave[1], clave[1], Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        return self._escalados[clave]
+
+    def imagen(self, tipo, lado):
+        """Ícono de ``tipo`` de ``lado`` píxeles como ``QImage`` (seguro desde cualquier hilo)."""
+        if tipo not in self.rutas:
+            return None
+        clave = (tipo, self._lado(lado))
+        with self._cerrojo:
+            if clave not in self._imagenes:
+                original = self._imagenes.setdefault((tipo, None), QImage(self.rutas[tipo]))
+                self._imagenes[clave] = (None if original.isNull() else
+                                         original.scaled(clave[1], clave[1], Qt.KeepAspectRatio, Qt.SmoothTransformation))
+            return self._imagenes[clave]
+
+
+class BloqueRed(QGraphicsItem):
+    """
+    Un grupo de nodos y de las aristas que salen de ellos, pintado como un solo ítem.
+
+    ``nodos`` es una lista de ``(nombre, tipo, x, y)`` y ``aristas`` de
+    ``[u, v, x1, y1, x2, y2, capacidad, direction]``, en coordenadas de
+    escena; las capacidades se pueden cambiar en su lugar con
+    ``cambiar_capacidad``.
+    """
+
+    def __init__(self, nodos, aristas, iconos):
+        super().__init__()
+        self.nodos = [(nombre, tipo, QPointF(x, y)) for nombre, tipo, x, y in nodos]
+        self.aristas = aristas
+        self.iconos = iconos
+        self.textos_tanque = {}     # nombre -> texto de capacidad
+        self.indice_aristas = {(a[0], a[1]): i for i, a in enumerate(aristas)}
+
+        self.puntos = {}
+        for _, tipo, p in self.nodos:
+            self.puntos.setdefault(tipo, QPolygonF()).append(p)
+        self.lineas = [self._recortar(*arista[2:6]) for arista in aristas]
+        self._flechas = None
+        self._fragmentos = {}       # (tipo, lado) -> fragmentos para drawPixmapFragments
+
+        xs = [x for _, _, x, _ in nodos] + [a[2] for a in aristas] + [a[4] for a in aristas]
+        ys = [y for _, _, _, y in nodos] + [a[3] for a in aristas] + [a[5] for a in aristas]
+        # Margen para los íconos, los nombres y las etiquetas de capacidad
+        margen_x, margen_y = ESCALA * 0.5, LADO_ICONO / 2 + ESCALA * 0.3
+        self.rect = QRectF(min(xs) - margen_x, min(ys) - margen_y,
+                           max(xs) - min(xs) + 2 * margen_x, max(ys) - min(ys) + 2 * margen_y)
+
+    @staticmethod
+    def _recortar(x1, y1, x2, y2):
+        # La línea termina en el borde del ícono, como en el dibujo de matplotlib
+        dx, dy = x2 - x1, y2 - y1
+        largo = math.hypot(dx, dy)
+        if largo == 0:
+            return QLineF(x1, y1, x2, y2)
+        recorte = min(LADO_ICONO / 2, largo / 3) / largo
+        return QLineF(x1 + dx * recorte, y1 + dy * recorte, x2 - dx * recorte, y2 - dy * recorte)
+
+    def boundingRect(self):
+        return self.rect
+
+    def cambiar_capacidad(self, u, v, capacidad):
+        i = self.indice_aristas.get((u, v))
+        if i is not None and self.aristas[i][6] != capacidad:
+            self.aristas[i][6] = capacidad
+            self.update()
+
+    def cambiar_texto_tanque(self, nombre, texto):
+        if nombre in self.textos_tanque and self.textos_tanque[nombre] != texto:
+            self.textos_tanque[nombre] = texto
+            self.update()
+
+    def flechas(self):
+        """Puntas de flecha de todas las aristas en un único ``QPainterPath`` (se arma al pedirlo)."""
+        if self._flechas is None:
+            camino = QPainterPath()
+            for linea in self.lineas:
+                largo = linea.length()
+                if largo == 0:
+                    continue
+                dx, dy = linea.dx() / largo, linea.dy() / largo
+                punta = linea.p2()
+                base = QPointF(punta.x() - dx * LARGO_FLECHA, punta.y() - dy * LARGO_FLECHA)
+                ancho = LARGO_FLECHA * 0.4
+                camino.addPolygon(QPolygonF([
+                    punta,
+                    QPointF(base.x() - dy * ancho, base.y() + dx * ancho),
+                    QPointF(base.x() + dy * ancho, base.y() - dx * ancho),
+                    punta,
+                ]))
+            self._flechas = camino
+        return self._flechas
+
+    def _fragmentos_iconos(self, tipo, pixmap):
+        clave = (tipo, pixmap.width())
+        if clave not in self._fragmentos:
+            escala = LADO_ICONO / max(pixmap.width(), pixmap.height())
+            origen = QRectF(pixmap.rect())
+            self._fragmentos[clave] = [
+                QPainter.PixmapFragment.create(p, origen, escala, escala)
+                for _, t, p in self.nodos if t == tipo
+            ]
+        return self._fragmentos[clave]
+
+    def paint(self, painter, option, widget=None):
+        escala = option.levelOfDetailFromTransform(painter.worldTransform())
+        self.pintar(painter, LADO_ICONO * escala, self.iconos.pixmap)
+
+    def pintar(self, painter, lado, icono):
+        """
+        Pintar con ``lado`` píxeles de ícono en pantalla.
+
+        ``icono(tipo, lado)`` devuelve un ``QPixmap`` o, fuera del hilo de la
+        interfaz, un ``QImage``.
+        """
+        pluma = QPen(COLOR_ARISTA, 0)  # cosmética: un píxel a cualquier zoom
+        painter.setPen(pluma)
+        painter.drawLines(self.lineas)
+
+        if lado < LADO_MINIMO_ICONO:
+            # Vista de ciudad: un punto por nodo
+            for tipo, puntos in self.puntos.items():
+                pluma = QPen(COLORES_NODO.get(tipo, COLOR_NODO), max(2.0, lado), Qt.SolidLine, Qt.RoundCap)
+                pluma.setCosmetic(True)  # el ancho está en píxeles
+                painter.setPen(pluma)
+                painter.drawPoints(puntos)
+            return
+
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(COLOR_ARISTA)
+        painter.drawPath(self.flechas())
+
+        for tipo in self.puntos:
+            imagen = icono(tipo, lado)
+            if imagen is None:
+                painter.setPen(QPen(COLORES_NODO.get(tipo, COLOR_NODO), LADO_ICONO / 2, Qt.SolidLine, Qt.RoundCap))
+                painter.drawPoints(self.puntos[tipo])
+                painter.setPen(Qt.NoPen)
+            elif isinstance(imagen, QPixmap):
+                painter.drawPixmapFragments(self._fragmentos_iconos(tipo, imagen), imagen)
+            else:
+                # drawPixmapFragments solo acepta QPixmap, que no se puede usar fuera del hilo de la interfaz
+                escala = LADO_ICONO / max(imagen.width(), imagen.height())
+                ancho, alto = imagen.width() * escala, imagen.height() * escala
+                for p in self.puntos[tipo]:
+                    painter.drawImage(QRectF(p.x() - ancho / 2, p.y() - alto / 2, ancho, alto), imagen)
+
+        if lado >= LADO_MINIMO_ETIQUETAS:
+            self._pintar_etiquetas(painter)
+
+    def _pintar_etiquetas(self, painter):
+        fuente = QFont()
+        fuente.setPixelSize(max(1, int(ALTO_TEXTO)))
+        painter.setFont(fuente)
+        ancho = ESCALA
+
+        painter.setPen(Qt.black)
+        for nombre, tipo, p in self.nodos:
+            painter.drawText(QRectF(p.x() - ancho / 2, p.y() - LADO_ICONO / 2 - ALTO_TEXTO * 1.4, ancho, ALTO_TEXTO * 1.4),
+                             Qt.AlignHCenter | Qt.AlignBottom, nombre)
+            if nombre in self.textos_tanque:
+                painter.drawText(QRectF(p.x() - ancho / 2, p.y() + LADO_ICONO / 2, ancho, ALTO_TEXTO * 1.4),
+                                 Qt.AlignHCenter | Qt.AlignTop, self.textos_tanque[nombre])
+
+        painter.setPen(COLOR_CAPACIDAD)
+        for (u, v, _, _, _, _, capacidad, direction), linea in zip(self.aristas, self.lineas):
+            # Las tuberías en ambos sentidos son dos aristas: una sola etiqueta
+            if direction == 'both' and u > v:
+                continue
+            centro = linea.center()
+            painter.drawText(QRectF(centro.x() - ancho / 2, centro.y() - ALTO_TEXTO * 0.7, ancho, ALTO_TEXTO * 1.4),
+                             Qt.AlignCenter, f"{capacidad} L/s")
+
+
+def pintar_mosaico(clave, bloques, iconos):
+    """Pintar en un ``QImage`` transparente los ``bloques`` que cruzan el mosaico ``clave``."""
+    nivel, tx, ty = clave
+    escala = 2 ** nivel
+    imagen = QImage(LADO_MOSAICO, LADO_MOSAICO, QImage.Format_ARGB32_Premultiplied)
+    imagen.fill(Qt.transparent)
+    painter = QPainter(imagen)
+    painter.scale(escala, escala)
+    painter.translate(-tx * LADO_MOSAICO / escala, -ty * LADO_MOSAICO / escala)
+    for bloque in bloques:
+        bloque.pintar(painter, LADO_ICONO * escala, iconos.imagen)
+    painter.end()
+    return imagen
+
+
+class SenalesMosaico(QObject):
+    """Señales de los trabajos de mosaicos; se entregan en el hilo de la interfaz."""
+    terminado = pyqtSignal(object, int, object)  # trabajo, generación, QImage o None
+
+
+class TrabajoMosaico(QRunnable):
+    """Pintar un mosaico en un hilo del pool, salvo que ya no se lo necesite al empezar."""
+
+    def __init__(self, mosaicos, clave, bloques):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.mosaicos = mosaicos
+        self.clave = clave
+        self.bloques = bloques
+        self.generacion = mosaicos.generacion
+
+    def run(self):
+        imagen = None
+        if self.generacion == self.mosaicos.generacion and self.clave in self.mosaicos.deseados:
+            imagen = pintar_mosaico(self.clave, self.bloques, self.mosaicos.iconos)
+        self.mosaicos.senales.terminado.emit(self, self.generacion, imagen)
+
+
+class MosaicosRed(QObject):
+    """
+    Caché LRU de mosaicos de la red pintados en segundo plano.
+
+    ``pintar`` dibuja los mosaicos expuestos que ya están en la caché; los
+    que faltan se reemplazan por un nivel más grueso estirado (o se pintan
+    en el momento si no hay ninguno) y se piden al pool junto con un margen
+    de ``MARGEN_MOSAICOS`` alrededor de la vista, del centro hacia afuera.
+    ``bloques_en(rect)`` selecciona en el hilo de la interfaz los bloques de
+    cada mosaico; los hilos solo pintan.
+    """
+    listo = pyqtSignal()  # llegó un mosaico: hay que repintar la vista
+
+    def __init__(self, bloques_en, iconos, max_mosaicos=MAX_MOSAICOS, max_hilos=2, parent=None):
+        super().__init__(parent)
+        self.bloques_en = bloques_en
+        self.iconos = iconos
+        self.max_mosaicos = max_mosaicos
+        self.cache = OrderedDict()  # clave -> QImage
+        self.generacion = 0
+        self.deseados = frozenset()
+        self.activos = False
+        self._pedidos = {}  # clave -> trabajo de la generación actual
+        self._trabajos = set()  # todos los trabajos en el pool (el pool no los borra)
+        self.senales = SenalesMosaico()
+        self.senales.terminado.connect(self._recibir)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_hilos)
+
+    def invalidar(self):
+        """Descartar los mosaicos pintados y los pedidos en curso (la red cambió)."""
+        self.generacion += 1
+        self.cache.clear()
+        self._pedidos = {}
+
+    def cerrar(self):
+        self.invalidar()
+        self.deseados = frozenset()
+        self.pool.waitForDone()
+
+    def _guardar(self, clave, imagen):
+        self.cache[clave] = imagen
+        self.cache.move_to_end(clave)
+        while len(self.cache) > self.max_mosaicos:
+            self.cache.popitem(last=False)
+
+    def _recibir(self, trabajo, generacion, imagen):
+        self._trabajos.discard(trabajo)
+        if self._pedidos.get(trabajo.clave) is trabajo:
+            del self._pedidos[trabajo.clave]
+        if imagen is not None and generacion == self.generacion:
+            self._guardar(trabajo.clave, imagen)
+            self.listo.emit()
+
+    def _aproximar(self, painter, clave):
+        """Estirar la parte de un mosaico más grueso que cubre ``clave``; False si no hay ninguno."""
+        nivel, tx, ty = clave
+        for subir in range(1, NIVELES_APROXIMACION + 1):
+            padre = self.cache.get((nivel - subir, tx >> subir, ty >> subir))
+            if padre is None:
+                continue
+            lado = LADO_MOSAICO >> subir
+            origen = QRectF((tx % (1 << subir)) * lado, (ty % (1 << subir)) * lado, lado, lado)
+            painter.drawImage(rect_mosaico(clave), padre, origen)
+            return True
+        return False
+
+    def pintar(self, painter, expuesto, visible, zoom):
+        """Dibujar los mosaicos que cubren ``expuesto`` y pedir los de ``visible`` y su margen."""
+        nivel = nivel_mosaico(zoom)
+        painter.setRenderHint(QPainter.SmoothPixmapTransform)
+        for clave in claves_mosaicos(expuesto, nivel):
+            imagen = self.cache.get(clave)
+            if imagen is None and not self._aproximar(painter, clave):
+                imagen = pintar_mosaico(clave, self.bloques_en(rect_mosaico(clave)), self.iconos)
+                self._guardar(clave, imagen)
+            if imagen is not None:
+                self.cache.move_to_end(clave)
+                painter.drawImage(rect_mosaico(clave), imagen)
+
+        centro = visible.center()
+        deseados = claves_mosaicos(visible, nivel, MARGEN_MOSAICOS)
+        deseados.sort(key=lambda clave: (rect_mosaico(clave).center() - centro).manhattanLength())
+        self.deseados = frozenset(deseados)
+        for clave in deseados:
+            if clave not in self.cache and clave not in self._pedidos:
+                trabajo = TrabajoMosaico(self, clave, self.bloques_en(rect_mosaico(clave)))
+                self._pedidos[clave] = trabajo
+                self._trabajos.add(trabajo)
+                self.pool.start(trabajo)
+
+
+class VistaRed(QGraphicsView):
+    """Vista con zoom por rueda (centrado en el cursor) y desplazamiento arrastrando."""
+
+    zoom_cambiado = pyqtSignal(float)
+
+    def __init__(self, scene, parent=None):
+        super().__init__(scene, parent)
+        self.setDragMode(QGraphicsView.ScrollHandDrag)
+        self.setTransformationAnchor(QGraphicsView.AnchorUnderMouse)
+        self.setViewportUpdateMode(QGraphicsView.SmartViewportUpdate)
+        self.setOptimizationFlag(QGraphicsView.DontAdjustForAntialiasing, True)
+        self.setBackgroundBrush(Qt.white)
+        self.mosaicos = None  # MosaicosRed: si están activos se dibujan como fondo
+
+    def drawBackground(self, painter, rect):
+        super().drawBackground(painter, rect)
+        if self.mosaicos is not None and self.mosaicos.activos:
+            visible = self.mapToScene(self.viewport().rect()).boundingRect()
+            self.mosaicos.pintar(painter, rect, visible, self.zoom())
+
+    def zoom(self):
+        return self.transform().m11()
+
+    def wheelEvent(self, event):
+        factor = 1.25 ** (event.angleDelta().y() / 120)
+        nuevo = min(ZOOM_MAXIMO, max(ZOOM_MINIMO, self.zoom() * factor))
+        if nuevo != self.zoom():
+            self.scale(nuevo / self.zoom(), nuevo / self.zoom())
+            self.zoom_cambiado.emit(self.zoom())
+
+    def ajustar(self):
+        """Mostrar toda la red."""
+        rect = self.sceneRect()
+        if not rect.isEmpty():
+            self.fitInView(rect, Qt.KeepAspectRatio)
+            self.zoom_cambiado.emit(self.zoom())
+
+
+class RenderizadorEscena:
+    """
+    Dibujo de la red en una ``QGraphicsScene`` con la misma interfaz que ``RenderizadorRed``.
+
+    Sin etiquetas (``usar_mosaicos``) los bloques se ocultan y la vista
+    muestra los mosaicos de ``MosaicosRed``. A nivel de calle se dibujan los
+    bloques, y los chicos en pantalla se guardan como pixmap
+    (``DeviceCoordinateCache``): desplazar la vista solo copia pixmaps y el
+    bloque se vuelve a pintar al cambiar el zoom o al editarse. Con
+    ``mosaicos=False`` se usan siempre los bloques.
+    """
+
+    def __init__(self, vista=None, iconos=None, mosaicos=True):
+        self.escena = QGraphicsScene()
+        self.escena.setItemIndexMethod(QGraphicsScene.BspTreeIndex)
+        self.vista = vista if vista is not None else VistaRed(self.escena)
+        self.vista.setScene(self.escena)
+        self.vista.zoom_cambiado.connect(self._ajustar_zoom)
+        self.iconos = iconos if iconos is not None else CacheIconos()
+        self.mosaicos = None
+        if mosaicos:
+            self.mosaicos = MosaicosRed(self.bloques_en, self.iconos)
+            self.mosaicos.listo.connect(self.vista.viewport().update)
+            self.vista.mosaicos = self.mosaicos
+        self.pos = {}
+        self.bloques = []
+        self._celdas = {}  # (cx, cy) -> bloques cuyo rectángulo cruza la celda
+        self._bloque_de_nodo = {}
+        self._bloque_de_arista = {}
+        self._barrios = None
+
+    @property
+    def widget(self):
+        return self.vista
+
+    def dibujar(self, graph, pos, data):
+        """Dibujo completo: recrea los bloques. El zoom se conserva si los barrios son los mismos."""
+        self.escena.clear()
+        if self.mosaicos is not None:
+            self.mosaicos.invalidar()
+        self.pos = dict(pos)
+        self.bloques = []
+        self._celdas = {}
+        self._bloque_de_nodo = {}
+        self._bloque_de_arista = {}
+
+        grupos = [(barrio['name'], [e['name'] for e in barrio['elements'] if e['name'] in pos]) for barrio in data]
+        en_barrios = {nombre for _, nombres in grupos for nombre in nombres}
+        sueltos = [n for n in graph.nodes() if n in pos and n not in en_barrios]
+        if sueltos:
+            grupos.append((None, sueltos))
+
+        # Bloques de hasta MAX_NODOS_BLOQUE nodos vecinos (ordenados por x dentro del barrio)
+        ids = {}
+        numero = 0
+        for _, nombres in grupos:
+            nombres = sorted(nombres, key=lambda n: pos[n][0])
+            for inicio in range(0, len(nombres), MAX_NODOS_BLOQUE):
+                for nombre in nombres[inicio:inicio + MAX_NODOS_BLOQUE]:
+                    ids[nombre] = numero
+                numero += 1
+        escena = {nombre: a_escena(*pos[nombre]) for nombre in ids}
+        contenido = {}
+        for nombre, numero in ids.items():
+            contenido.setdefault(numero, ([], []))[0].append((nombre, graph.nodes[nombre].get('type'), *escena[nombre]))
+
+        # Cada arista va en el bloque de su origen; las que unen bloques distintos se agrupan aparte
+        cruzadas = []
+        for u, v, edge_data in graph.edges(data=True):
+            if u == v or u not in ids or v not in ids:
+                continue
+            arista = [u, v, *escena[u], *escena[v], edge_data.get('capacidad', 0), edge_data.get('direction')]
+            if ids[u] == ids[v]:
+                contenido[ids[u]][1].append(arista)
+            else:
+                cruzadas.append(arista)
+
+        for nodos, aristas in contenido.values():
+            self._agregar_bloque(graph, nodos, aristas)
+        # Las aristas largas no se pueden descartar por su rectángulo: pocas llamadas grandes a drawLines
+        cruzadas.sort(key=lambda arista: arista[2])
+        for inicio in range(0, len(cruzadas), MAX_ARISTAS_CRUZADAS):
+            self._agregar_bloque(graph, [], cruzadas[inicio:inicio + MAX_ARISTAS_CRUZADAS])
+
+        for nombre, nombres in grupos:
+            if nombre is not None and nombres:
+                self._agregar_nombre_barrio(nombre, [pos[n] for n in nombres])
+
+        self.escena.setSceneRect(self.escena.itemsBoundingRect().adjusted(-ESCALA, -ESCALA, ESCALA, ESCALA))
+        barrios = [nombre for nombre, _ in grupos]
+        if barrios != self._barrios:
+            self._barrios = barrios
+            self.vista.ajustar()
+        self._ajustar_zoom(self.vista.zoom(), forzar=True)
+
+    def _agregar_bloque(self, graph, nodos, aristas):
+        bloque = BloqueRed(nodos, aristas, self.iconos)
+        for nombre, tipo, _, _ in nodos:
+            self._bloque_de_nodo[nombre] = bloque
+            if tipo == 'tank':
+                bloque.textos_tanque[nombre] = texto_tanque(graph.nodes[nombre])
+        for arista in aristas:
+            self._bloque_de_arista[(arista[0], arista[1])] = bloque
+        self.escena.addItem(bloque)
+        bloque.orden = len(self.bloques)
+        self.bloques.append(bloque)
+        for celda in self._celdas_de(bloque.rect):
+            self._celdas.setdefault(celda, []).append(bloque)
+
+    @staticmethod
+    def _celdas_de(rect):
+        x0, x1 = math.floor(rect.left() / CELDA_INDICE), math.floor(rect.right() / CELDA_INDICE)
+        y0, y1 = math.floor(rect.top() / CELDA_INDICE), math.floor(rect.bottom() / CELDA_INDICE)
+        return [(cx, cy) for cx in range(x0, x1 + 1) for cy in range(y0, y1 + 1)]
+
+    def bloques_en(self, rect):
+        """Bloques cuyo rectángulo cruza ``rect``, en el orden en que se apilan en la escena."""
+        encontrados = {}
+        for celda in self._celdas_de(rect):
+            for bloque in self._celdas.get(celda, ()):
+                if bloque.orden not in encontrados and bloque.rect.intersects(rect):
+                    encontrados[bloque.orden] = bloque
+        return [encontrados[orden] for orden in sorted(encontrados)]
+
+    def _agregar_nombre_barrio(self, nombre, coords):
+        xs = [x for x, _ in coords]
+        ys = [y for _, y in coords]
+        texto = QGraphicsSimpleTextItem(nombre)
+        fuente = QFont()
+        fuente.setBold(True)
+        texto.setFont(fuente)
+        # Legible a cualquier zoom: el texto no se escala con la vista
+        texto.setFlag(QGraphicsItem.ItemIgnoresTransformations)
+        texto.setPos(*a_escena((min(xs) + max(xs)) / 2, max(ys) + 0.5))
+        texto.setZValue(1)
+        self.escena.addItem(texto)
+
+    def _ajustar_zoom(self, zoom, forzar=False):
+        """Pasar de mosaicos a bloques según el zoom y cachear como pixmap los bloques chicos en pantalla."""
+        if self.mosaicos is not None:
+            activos = usar_mosaicos(zoom)
+            if forzar or activos != self.mosaicos.activos:
+                self.mosaicos.activos = activos
+                for bloque in self.bloques:
+                    bloque.setVisible(not activos)
+                self.vista.viewport().update()
+            if activos:
+                return
+        for bloque in self.bloques:
+            rect = bloque.rect
+            modo = (QGraphicsItem.DeviceCoordinateCache
+                    if max(rect.width(), rect.height()) * zoom <= LADO_MAXIMO_CACHE
+                    else QGraphicsItem.NoCache)
+            if bloque.cacheMode() != modo:
+                bloque.setCacheMode(modo)
+
+    def cerrar(self):
+        """Esperar a los hilos que pintan mosaicos."""
+        if self.mosaicos is not None:
+            self.mosaicos.cerrar()
+
+    def cambiar_grafo(self, graph):
+        """Los bloques no guardan el grafo: con el mismo contenido no hay nada que cambiar."""
+
+    def puede_actualizar(self, graph, cambios):
+        """True si los cambios son solo de atributos y pueden aplicarse en su lugar."""
+        if not self.bloques or cambios.estructura:
+            return False
+        return all(self.pos.get(n) is not None for n in cambios.nodos if graph.has_node(n))
+
+    def actualizar(self, graph, cambios):
+        """Actualizar en su lugar las capacidades afectadas por ``cambios``."""
+        for node in cambios.nodos:
+            bloque = self._bloque_de_nodo.get(node)
+            if bloque is not None and graph.has_node(node) and graph.nodes[node].get('type') == 'tank':
+                bloque.cambiar_texto_tanque(node, texto_tanque(graph.nodes[node]))
+        for u, v in cambios.aristas:
+            bloque = self._bloque_de_arista.get((u, v))
+            if bloque is not None and graph.has_edge(u, v):
+                bloque.cambiar_capacidad(u, v, graph.edges[u, v].get('capacidad', 0))
@@ -0,0 +1,213 @@
+"""Cálculo de flujo máximo: selección de algoritmo y cálculo por lotes."""
+import csv
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import networkx as nx
+from networkx.algorithms import flow as nx_flow
+
+TAMANO_LOTE = 256  # casas por tarea enviada al pool
+
+# Algoritmos de flujo máximo disponibles en networkx
+BACKENDS = {
+    'preflow_push': nx_flow.preflow_push,
+    'dinitz': nx_flow.dinitz,
+    'edmonds_karp': nx_flow.edmonds_karp,
+    'boykov_kolmogorov': nx_flow.boykov_kolmogorov,
+    'shortest_augmenting_path': nx_flow.shortest_augmenting_path,
+}
+BACKEND_AUTO = 'auto'
+
+# Estado de cada proceso trabajador: el grafo se envía una sola vez por proceso
+_GRAFO = None
+_BACKEND = BACKEND_AUTO
+_ALCANZABLE = (None, None)  # (fuente, subgrafo alcanzable desde la fuente)
+
+
+def elegir_backend(graph):
+    """
+    Elegir el algoritmo de flujo según el tamaño y la densidad del grafo.
+
+    - Grafos pequeños: Edmonds-Karp (menor costo fijo).
+    - Grafos densos: preflow-push (no depende de la cantidad de caminos).
+    - Grafos grandes y ralos (pocas tuberías por elemento): Boykov-Kolmogorov.
+    - En el resto: Dinitz.
+    """
+    n = graph.number_of_nodes()
+    m = graph.number_of_edges()
+    if n <= 100:
+        return 'edmonds_karp'
+    densidad = m / (n * (n - 1))
+    if densidad >= 0.1:
+        return 'preflow_push'
+    if m / n <= 3:
+        return 'boykov_kolmogorov'
+    return 'dinitz'
+
+
+def maximo_flujo(graph, source, sink, backend=BACKEND_AUTO, capacity='capacidad', con_flujo=True):
+    """
+    Calcular el flujo máximo con el algoritmo indicado (o elegido con ``'auto'``).
+
+    Retorna un diccionario con ``source``, ``sink``, ``valor``, ``flujo``
+    (dict de flujo por arista, vacío si ``con_flujo`` es False), ``backend``
+    (algoritmo que realmente se usó) y ``tiempo`` en segundos.
+    """
+    if backend == BACKEND_AUTO:
+        backend = elegir_backend(graph)
+    if backend not in BACKENDS:
+        raise ValueError(f"Algoritmo de flujo desconocido: {backend}")
+
+    inicio = time.perf_counter()
+    if con_flujo:
+        valor, flujo = nx.maximum_flow(graph, source, sink, capacity=capacity, flow_func=BACKENDS[backend])
+    else:
+        valor = nx.maximum_flow_value(graph, source, sink, capacity=capacity, flow_func=BACKENDS[backend])
+        flujo = {}
+
+    return {
+        'source': source,
+        'sink': sink,
+        'valor': valor,
+        'flujo': flujo,
+        'backend': backend,
+        'tiempo': time.perf_counter() - inicio,
+    }
+
+
+def tanques_y_casas(graph):
+    """Listas de tanques y casas del grafo, en el orden de sus nodos."""
+    tanks = [n for n, d in graph.nodes(data=True) if d.get('type') == 'tank']
+    houses = [n for n, d in graph.nodes(data=True) if d.get('type') == 'house']
+    return tanks, houses
+
+
+def _inicializar_trabajador(graph, backend=BACKEND_AUTO):
+    global _GRAFO, _BACKEND, _ALCANZABLE
+    _GRAFO = graph
+    _BACKEND = backend
+    _ALCANZABLE = (None, None)
+
+
+def _subgrafo_alcanzable(source):
+    """Subgrafo de lo alcanzable desde ``source`` (reutilizado entre lotes de la misma fuente)."""
+    global _ALCANZABLE
+    if _ALCANZABLE[0] != source:
+        nodos = nx.descendants(_GRAFO, source)
+        nodos.add(source)
+        _ALCANZABLE = (source, _GRAFO.subgraph(nodos).copy())
+    return _ALCANZABLE[1]
+
+
+def _flujos_lote(source, sinks):
+    """Flujo máximo desde ``source`` hacia cada casa de ``sinks``."""
+    subgrafo = _subgrafo_alcanzable(source)
+    backend = elegir_backend(subgrafo) if _BACKEND == BACKEND_AUTO else _BACKEND
+    resultados = []
+    for sink in sinks:
+        if sink == source or sink not in subgrafo:
+            # Casa inalcanzable: el flujo es cero sin necesidad de calcularlo
+            resultados.append({'source': source, 'sink': sink, 'valor': 0, 'flujo': {},
+                               'backend': None, 'tiempo': 0.0})
+            continue
+        resultados.append(maximo_flujo(subgrafo, source, sink, backend, con_flujo=False))
+    return resultados
+
+
+def iterar_flujos_maximos(graph, tanks=None, houses=None, workers=None, tamano_lote=TAMANO_LOTE,
+                          backend=BACKEND_AUTO):
+    """
+    Generar el resultado de cada par (tanque, casa) a medida que termina.
+
+    Cada resultado tiene el formato de ``maximo_flujo`` (sin el dict de flujo).
+
+    Los pares se reparten en lotes (un tanque y hasta ``tamano_lote`` casas)
+    entre un pool de procesos; cada proceso recibe el grafo una sola vez.
+    Con ``workers=1`` o un único lote se calcula en el proceso actual.
+    Cerrar el generador cancela los lotes pendientes.
+    """
+    if tanks is None or houses is None:
+        todos_tanques, todas_casas = tanques_y_casas(graph)
+        tanks = todos_tanques if tanks is None else tanks
+        houses = todas_casas if houses is None else houses
+
+    tareas = [
+        (source, houses[i:i + tamano_lote])
+        for source in tanks
+        for i in range(0, len(houses), tamano_lote)
+    ]
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    if workers <= 1 or len(tareas) <= 1:
+        _inicializar_trabajador(graph, backend)
+        try:
+            for source, sinks in tareas:
+                yield from _flujos_lote(source, sinks)
+        finally:
+            _inicializar_trabajador(None)
+        return
+
+    # spawn: la matriz se calcula desde un hilo del pool de la interfaz y hacer fork
+    # de un proceso con varios hilos puede trabar al hijo en un lock tomado por otro
+    with ProcessPoolExecutor(max_workers=min(workers, len(tareas)),
+                             mp_context=multiprocessing.get_context('spawn'),
+                             initializer=_inicializar_trabajador,
+                             initargs=(graph, backend)) as pool:
+        futuros = [pool.submit(_flujos_lote, source, sinks) for source, sinks in tareas]
+        try:
+            for futuro in as_completed(futuros):
+                yield from futuro.result()
+        finally:
+            for futuro in futuros:
+                futuro.cancel()
+
+
+def calcular_matriz_flujo(graph, tanks=None, houses=None, workers=None, callback=None,
+                          backend=BACKEND_AUTO):
+    """
+    Calcular la matriz tanques x casas de flujo máximo.
+
+    ``callback(completados, total)`` se llama cada vez que llega un resultado;
+    si devuelve True el cálculo se cancela y se retorna la matriz parcial.
+    """
+    if tanks is None or houses is None:
+        todos_tanques, todas_casas = tanques_y_casas(graph)
+        tanks = todos_tanques if tanks is None else tanks
+        houses = todas_casas if houses is None else houses
+
+    fila = {t: i for i, t in enumerate(tanks)}
+    columna = {h: j for j, h in enumerate(houses)}
+    matriz = [[0] * len(houses) for _ in tanks]
+    total = len(tanks) * len(houses)
+
+    resultados = iterar_flujos_maximos(graph, tanks, houses, workers, backend=backend)
+    try:
+        for completados, resultado in enumerate(resultados, start=1):
+            matriz[fila[resultado['source']]][columna[resultado['sink']]] = resultado['valor']
+            if callback is not None and callback(completados, total):
+                break
+    finally:
+        resultados.close()
+
+    return tanks, houses, matriz
+
+
+def exportar_matriz_csv(file_path, tanks, houses, matriz):
+    """Guardar la matriz de flujo en CSV con tanques como filas y casas como columnas."""
+    with open(file_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(["tanque"] + list(houses))
+        for tank, valores in zip(tanks, matriz):
+            writer.writerow([tank] + list(valores))
+
+
+def exportar_matriz_npy(file_path, matriz):
+    """Guardar la matriz de flujo como arreglo de NumPy (.npy)."""
+    try:
+        import numpy as np
+    except ImportError:
+        raise ImportError("Se necesita NumPy para exportar en formato .npy: pip install numpy")
+    np.save(file_path, np.asarray(matriz, dtype=float))
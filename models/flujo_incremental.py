@@ -0,0 +1,189 @@
+"""Flujo máximo que se repara de forma incremental tras cambios de capacidad."""
+import time
+from collections import OrderedDict, deque
+
+from models.flujo import BACKEND_AUTO, maximo_flujo
+
+INFINITO = float('inf')
+MAX_PARES_EN_CACHE = 16
+
+
+class FlujoIncremental:
+    """
+    Último flujo máximo entre ``source`` y ``sink`` con su grafo residual.
+
+    Se inicializa con un flujo máximo completo y luego se repara ante
+    cambios de capacidad de una tubería:
+
+    - Si la capacidad aumenta, basta con buscar nuevos caminos aumentantes.
+    - Si disminuye por debajo del flujo que pasa por la tubería, el exceso se
+      intenta desviar por otros caminos; lo que no cabe se devuelve a la
+      fuente y se retira del sumidero, y al final se buscan caminos nuevos.
+
+    El residual de u -> v es ``cap(u, v) - f(u, v) + f(v, u)``.
+    """
+
+    def __init__(self, graph, source, sink, backend=BACKEND_AUTO, capacity='capacidad'):
+        self.source = source
+        self.sink = sink
+        self.capacity = capacity
+        self.cap = {u: {} for u in graph.nodes()}
+        self.pred = {u: set() for u in graph.nodes()}
+        for u, v, data in graph.edges(data=True):
+            self.cap[u][v] = data.get(capacity, INFINITO)
+            self.pred[v].add(u)
+
+        resultado = maximo_flujo(graph, source, sink, backend, capacity=capacity)
+        self.valor = resultado['valor']
+        self.flujo = {u: dict(resultado['flujo'].get(u, {})) for u in graph.nodes()}
+        self.backend = resultado['backend']
+        self.tiempo = resultado['tiempo']
+
+    # ------------------------------------------------------------------
+    # Grafo residual
+    # ------------------------------------------------------------------
+    def _residual(self, u, v):
+        return (self.cap[u].get(v, 0) - self.flujo[u].get(v, 0)
+                + self.flujo[v].get(u, 0))
+
+    def _empujar(self, u, v, delta):
+        """Enviar ``delta`` por u -> v cancelando primero flujo en v -> u."""
+        retorno = min(delta, self.flujo[v].get(u, 0))
+        if retorno:
+            self.flujo[v][u] -= retorno
+        if delta - retorno:
+            self.flujo[u][v] = self.flujo[u].get(v, 0) + delta - retorno
+
+    def _camino(self, a, b):
+        """Camino más corto (BFS) de ``a`` a ``b`` en el residual, como dict de padres."""
+        padre = {a: None}
+        cola = deque([a])
+        while cola:
+            x = cola.popleft()
+            for y in self.cap[x].keys() | self.pred[x]:
+                if y not in padre and self._residual(x, y) > 0:
+                    padre[y] = x
+                    if y == b:
+                        return padre
+                    cola.append(y)
+        return None
+
+    def _aumentar(self, a, b, limite=INFINITO):
+        """Enviar hasta ``limite`` unidades de ``a`` a ``b`` por caminos residuales."""
+        total = 0
+        while total < limite:
+            padre = self._camino(a, b)
+            if padre is None:
+                break
+            delta = limite - total
+            y = b
+            while padre[y] is not None:
+                delta = min(delta, self._residual(padre[y], y))
+                y = padre[y]
+            y = b
+            while padre[y] is not None:
+                self._empujar(padre[y], y, delta)
+                y = padre[y]
+            total += delta
+        return total
+
+    # ------------------------------------------------------------------
+    # Reparación
+    # ------------------------------------------------------------------
+    def actualizar_capacidad(self, u, v, capacidad):
+        """Reparar el flujo tras cambiar la capacidad de la arista u -> v."""
+        inicio = time.perf_counter()
+        anterior = self.cap[u].get(v, 0)
+        self.cap[u][v] = capacidad
+        self.pred[v].add(u)
+
+        if capacidad > anterior:
+            # Solo pueden aparecer caminos aumentantes nuevos
+            self.valor += self._aumentar(self.source, self.sink)
+        else:
+            exceso = self.flujo[u].get(v, 0) - capacidad
+            if exceso > 0:
+                self.flujo[u][v] = capacidad
+                # Desviar lo que ya no cabe por otros caminos de u a v
+                exceso -= self._aumentar(u, v, exceso)
+                if exceso > 0:
+                    # Lo que no se pudo desviar vuelve a la fuente y sale del sumidero
+                    if u != self.source:
+                        self._aumentar(u, self.source, exceso)
+                    if v != self.sink:
+                        self._aumentar(self.sink, v, exceso)
+                    self.valor -= exceso
+                    self.valor += self._aumentar(self.source, self.sink)
+
+        self.tiempo = time.perf_counter() - inicio
+        self.backend = 'incremental'
+        return self.valor
+
+    def resultado(self):
+        """Resultado en el mismo formato que ``maximo_flujo``."""
+        return {
+            'source': self.source,
+            'sink': self.sink,
+            'valor': self.valor,
+            'flujo': self.flujo,
+            'backend': self.backend,
+            'tiempo': self.tiempo,
+        }
+
+
+class CacheFlujos:
+    """Flujos máximos recientes por (fuente, sumidero), reparados tras cada edición."""
+
+    def __init__(self, max_pares=MAX_PARES_EN_CACHE):
+        self.max_pares = max_pares
+        self._flujos = OrderedDict()
+
+    def __len__(self):
+        return len(self._flujos)
+
+    def pares(self):
+        return list(self._flujos)
+
+    def invalidar(self):
+        """Descartar todo (tras agregar o quitar nodos o aristas)."""
+        self._flujos.clear()
+
+    def buscar(self, source, sink):
+        """Resultado guardado de ``source`` a ``sink``, o None si no está en caché."""
+        clave = (source, sink)
+        if clave not in self._flujos:
+            return None
+        self._flujos.move_to_end(clave)
+        flujo = self._flujos[clave]
+        resultado = flujo.resultado()
+        resultado['backend'] = f"caché ({flujo.backend})"
+        return resultado
+
+    def agregar(self, flujo):
+        """Guardar un ``FlujoIncremental`` ya calculado (p. ej. en otro hilo)."""
+        self._flujos[(flujo.source, flujo.sink)] = flujo
+        self._flujos.move_to_end((flujo.source, flujo.sink))
+        if len(self._flujos) > self.max_pares:
+            self._flujos.popitem(last=False)
+
+    def consultar(self, graph, source, sink, backend=BACKEND_AUTO):
+        """Flujo máximo de ``source`` a ``sink``, reutilizando el último resultado si existe."""
+        resultado = self.buscar(source, sink)
+        if resultado is not None:
+            return resultado
+        flujo = FlujoIncremental(graph, source, sink, backend)
+        self.agregar(flujo)
+        return flujo.resultado()
+
+    def actualizar_capacidad(self, u, v, capacidad):
+        """
+        Reparar todos los flujos guardados tras cambiar la capacidad de u -> v.
+
+        Retorna una lista de ``(source, sink, valor_anterior, valor_nuevo, tiempo)``.
+        """
+        cambios = []
+        for (source, sink), flujo in self._flujos.items():
+            anterior = flujo.valor
+            nuevo = flujo.actualizar_capacidad(u, v, capacidad)
+            cambios.append((source, sink, anterior, nuevo, flujo.tiempo))
+        return cambios
@@ -1,41 +1,21 @@
-import networkx as nx
-import json
-import math
-from PyQt5.QtWidgets import QMessageBox, QInputDialog
+from models.carga import cargar_red_en_flujo
+from models.flujo import maximo_flujo
+from models.layout import calcular_layouts, hash_barrio
 
-def load_graph_from_json(file_path):
-    """Cargar un grafo desde un archivo JSON."""
-    with open(file_path, 'r') as f:
-        data = json.load(f)
-
-    # Crear grafo dirigido
-    G = nx.DiGraph()
-
-    for neighborhood in data:
-        for element in neighborhood['elements']:
-            # Añadir nodo con atributos
-            G.add_node(element['name'], **{k: v for k, v in element.items() if k not in ['connections', 'input_rate', 'output_rate']})
-
-            # Procesar conexiones
-            for connection in element.get('connections', []):
-                target = connection['target']
-                capacity = connection.get('capacity', 0)
-
-                if target.startswith('+'):
-                    dest = target[1:]  # Eliminar el prefijo '+'
-                    G.add_edge(element['name'], dest, capacidad=capacity, direction='right')
-                elif target.startswith('-'):
-                    dest = target[1:]  # Eliminar el prefijo '-'
-                    G.add_edge(dest, element['name'], capacidad=capacity, direction='left')
-                else:
-                    G.add_edge(element['name'], target, capacidad=capacity, direction='both')
+def load_graph_from_json(file_path, barrios=None, callback=None):
+    """
+    Cargar un grafo desde un archivo JSON.
 
-    return G, data
+    El archivo se lee barrio por barrio y el grafo se arma a medida que
+    llegan (``cargar_red_en_flujo``); ``barrios`` limita la carga a esos
+    nombres y ``callback(bytes_leidos, bytes_totales)`` informa el avance.
+    """
+    return cargar_red_en_flujo(file_path, barrios=barrios, callback=callback)
 
 
 
-def calculate_max_flow(G, source=None, sink=None):
-    """Calcular flujo máximo usando Ford-Fulkerson"""
+def calculate_max_flow(G, source=None, sink=None, backend='auto'):
+    """Calcular flujo máximo con el algoritmo indicado ('auto' lo elige según el grafo)"""
     # Si no se especifican fuente y sumidero, intentar encontrarlos
     if source is None:
         source = [n for n in G.nodes() if G.nodes[n].get('type') == 'tank'][0]
@@ -45,42 +25,79 @@ def calculate_max_flow(G, source=None, sink=None):
     
     try:
         # Calcular flujo máximo
-        max_flow_value, max_flow_dict = nx.maximum_flow(G, source, sink)
-        return max_flow_value, max_flow_dict
+        resultado = maximo_flujo(G, source, sink, backend)
+        return resultado['valor'], resultado['flujo']
     except Exception as e:
         print(f"Error calculando flujo máximo: {e}")
         return 0, {}
 
 
-import networkx as nx
-import math
-
-def assign_graph_positions(graph, data):
+def preparar_layout(graph, data, cache=None, hashes_conocidos=None):
     """
-    Asigna posiciones a los nodos con un espaciado más amplio entre barrios 
-    y dentro de cada barrio.
+    Separar los barrios que pueden reutilizar su layout de los que hay que distribuir.
+
+    ``hashes_conocidos`` son los ``hash_barrio`` ya calculados de cada
+    barrio (p. ej. los del snapshot); sin ellos se recorre el grafo.
+
+    Retorna un plan ``(layouts, hashes, pendientes, tareas, nombres)``:
+    ``tareas`` son datos simples para ``calcular_layouts`` (se pueden calcular
+    en otro hilo o proceso sin tocar el grafo) y ``pendientes`` los índices de
+    sus barrios.
     """
-    pos = {}
-    # Aumentar significativamente el desplazamiento horizontal entre barrios
-    HORIZONTAL_SPACING = 3  # Incrementado de 5 a 10
     # Aumentar el espaciado dentro de cada barrio
     INTERNAL_SPACING = 40  # Nuevo parámetro para espaciado interno
 
+    layouts = [None] * len(data)
+    hashes = [None] * len(data)
+    pendientes = []  # índices de los barrios a distribuir
+    tareas = []
+
     for i, neighborhood in enumerate(data):
         # Extraer los nodos del barrio
         nodes = [element['name'] for element in neighborhood['elements']]
-        
+
+        # Reutilizar el layout del barrio si su contenido no cambió
+        if cache is not None:
+            hashes[i] = hashes_conocidos[i] if hashes_conocidos is not None else hash_barrio(graph, nodes)
+            layouts[i] = cache.obtener(neighborhood['name'], hashes[i])
+        if layouts[i] is not None:
+            continue
+
         # Usar spring_layout con parámetros más separados
         subgraph = graph.subgraph(nodes)
-        
-        # Configuraciones para separar más los nodos
-        neighborhood_pos = nx.spring_layout(
-            subgraph, 
-            k=INTERNAL_SPACING,  # Aumentar distancia entre nodos
-            iterations=50,  # Más iteraciones para estabilidad
-            seed=42  # Semilla para reproducibilidad
-        )
+        previas = cache.previas(neighborhood['name']) if cache is not None else None
+        if previas:
+            previas = {n: p for n, p in previas.items() if n in subgraph} or None
+
+        # Configuraciones para separar más los nodos: k (distancia entre nodos),
+        # 50 iteraciones para estabilidad y semilla 42 para reproducibilidad
+        pendientes.append(i)
+        tareas.append((nodes, list(subgraph.edges()), previas, INTERNAL_SPACING, 50, 42))
 
+    nombres = [neighborhood['name'] for neighborhood in data]
+    return layouts, hashes, pendientes, tareas, nombres
+
+
+def completar_layout(plan, resultados, cache=None):
+    """
+    Unir los layouts calculados con los reutilizados y desplazar cada barrio.
+
+    ``resultados`` puede tener menos barrios que los pendientes (un cálculo
+    cancelado): los que faltan quedan sin posiciones y conservan su lugar en la fila.
+    """
+    layouts, hashes, pendientes, _, nombres = plan
+    pos = {}
+    # Aumentar significativamente el desplazamiento horizontal entre barrios
+    HORIZONTAL_SPACING = 3  # Incrementado de 5 a 10
+
+    for i, neighborhood_pos in zip(pendientes, resultados):
+        layouts[i] = neighborhood_pos
+        if cache is not None:
+            cache.guardar(nombres[i], hashes[i], neighborhood_pos)
+
+    for i, neighborhood_pos in enumerate(layouts):
+        if neighborhood_pos is None:
+            continue  # Layout cancelado antes de llegar a este barrio
         # Aplicar desplazamiento horizontal
         for node, (x, y) in neighborhood_pos.items():
             pos[node] = (
@@ -88,111 +105,25 @@ def assign_graph_positions(graph, data):
                 y  # Mantener la posición vertical original
             )
 
+    if cache is not None:
+        cache.descartar_otros(nombres)
+
     return pos
 
-def agregar_conexion(self):
-    """Agregar una nueva conexión entre elementos del grafo."""
-    if not self.original_data:
-        QMessageBox.warning(self, "Error", "Primero cargue un grafo")
-        return
-
-    # Recopilar todos los elementos de todos los barrios
-    all_elements = []
-    for barrio in self.original_data:
-        all_elements.extend(barrio['elements'])
-
-    # Nombres de todos los elementos para selección
-    element_names = [element['name'] for element in all_elements]
-
-    if len(element_names) < 2:
-        QMessageBox.warning(self, "Error", "Se necesitan al menos dos elementos para crear una conexión")
-        return
-
-    # Seleccionar elemento de origen
-    origen, ok1 = QInputDialog.getItem(
-        self, 
-        "Seleccionar Origen", 
-        "Selecciona el elemento de origen:", 
-        element_names, 
-        0, 
-        False
-    )
-    if not ok1:
-        return
-
-    # Seleccionar elemento de destino (excluyendo el origen)
-    destino_options = [name for name in element_names if name != origen]
-    destino, ok2 = QInputDialog.getItem(
-        self, 
-        "Seleccionar Destino", 
-        f"Selecciona el elemento de destino para {origen}:", 
-        destino_options, 
-        0, 
-        False
-    )
-    if not ok2:
-        return
-
-    # Pedir capacidad de la conexión
-    capacidad, ok3 = QInputDialog.getInt(
-        self, 
-        "Capacidad de Conexión", 
-        f"Ingrese la capacidad de la conexión entre {origen} y {destino}:", 
-        min=1
-    )
-    if not ok3:
-        return
-
-    # Pedir dirección de la conexión
-    direccion, ok4 = QInputDialog.getItem(
-        self, 
-        "Dirección de Conexión", 
-        f"Seleccione la dirección de la conexión entre {origen} y {destino}:",
-        ["both", "right", "left"], 
-        0, 
-        False
-    )
-    if not ok4:
-        return
-
-    # Buscar y actualizar los elementos originales
-    for barrio in self.original_data:
-        for element in barrio['elements']:
-            # Actualizar elemento de origen
-            if element['name'] == origen:
-                connection_target = (f"+{destino}" if direccion == "right" 
-                                     else f"-{destino}" if direccion == "left" 
-                                     else destino)
-                element['connections'].append({
-                    "target": connection_target,
-                    "capacity": capacidad
-                })
-            
-            # Actualizar elemento de destino para conexión bidireccional o inversa
-            if element['name'] == destino:
-                if direccion == "right":
-                    element['connections'].append({
-                        "target": f"-{origen}",
-                        "capacity": capacidad
-                    })
-                elif direccion == "left":
-                    element['connections'].append({
-                        "target": f"+{origen}",
-                        "capacity": capacidad
-                    })
-                else:  # bidirectional
-                    element['connections'].append({
-                        "target": origen,
-                        "capacity": capacidad
-                    })
-
-    # Guardar cambios y actualizar grafo
-    self.save_json(self.original_data)
-    self.update_graph()
-
-    # Mensaje de confirmación
-    QMessageBox.information(
-        self, 
-        "Conexión Agregada", 
-        f"Conexión entre {origen} y {destino} agregada exitosamente."
-    )
\ No newline at end of file
+
+def assign_graph_positions(graph, data, cache=None, workers=None, callback=None, hashes_conocidos=None):
+    """
+    Asigna posiciones a los nodos con un espaciado más amplio entre barrios 
+    y dentro de cada barrio.
+
+    Si se pasa una ``CacheLayout``, los barrios cuyo contenido no cambió
+    reutilizan sus posiciones y los modificados se recalculan partiendo de
+    las posiciones anteriores. Los barrios a recalcular son independientes y
+    se distribuyen en un pool de procesos (``workers``). Si ``callback``
+    cancela el cálculo, los barrios sin terminar quedan sin posiciones.
+    ``hashes_conocidos`` se pasa a ``preparar_layout``.
+    """
+    plan = preparar_layout(graph, data, cache, hashes_conocidos)
+    # Los barrios son independientes: calcularlos en paralelo y unirlos en orden
+    resultados = calcular_layouts(plan[3], workers, callback)
+    return completar_layout(plan, resultados, cache)
@@ -0,0 +1,108 @@
+"""Generador determinista de redes sintéticas con el formato JSON del proyecto."""
+import json
+import math
+import os
+import random
+
+DISTRIBUCIONES = ('uniforme', 'normal', 'lognormal')
+
+
+def _sorteador_capacidad(rng, distribucion, minimo, maximo):
+    """Función sin argumentos que devuelve capacidades enteras en [minimo, maximo]."""
+    if distribucion == 'uniforme':
+        return lambda: rng.randint(minimo, maximo)
+    if distribucion == 'normal':
+        media, desvio = (minimo + maximo) / 2, (maximo - minimo) / 6
+        return lambda: min(maximo, max(minimo, round(rng.gauss(media, desvio))))
+    if distribucion == 'lognormal':
+        # Muchas tuberías chicas y pocas troncales grandes
+        mu, sigma = math.log(max(minimo, 1)) + 1, 0.75
+        return lambda: min(maximo, max(minimo, round(rng.lognormvariate(mu, sigma))))
+    raise ValueError(f"Distribución de capacidad desconocida: {distribucion}")
+
+
+def generar_red(barrios=4, tanques=3, casas=30, densidad=2.0, distribucion='uniforme',
+                capacidad_minima=5, capacidad_maxima=50, entre_barrios=0.02, semilla=0):
+    """
+    Generar una red de ``barrios`` barrios con ``tanques`` tanques y ``casas`` casas cada uno.
+
+    Dentro de cada barrio los elementos forman un árbol (cada casa se une a un
+    elemento anterior) y se agregan tuberías al azar hasta tener ``densidad``
+    tuberías por elemento. ``entre_barrios`` es la fracción de tuberías que
+    unen tanques de barrios distintos. Las tuberías que salen de un tanque van
+    hacia la derecha (``+``); las demás son aleatorias (``+``, ``-`` o sin
+    prefijo). La misma semilla produce siempre la misma red.
+    """
+    rng = random.Random(semilla)
+    sortear = _sorteador_capacidad(rng, distribucion, capacidad_minima, capacidad_maxima)
+    data = []
+    elementos = {}  # nombre -> elemento
+    tuberias = set()
+
+    def conectar(origen, destino, direccion):
+        if origen == destino or (origen, destino) in tuberias or (destino, origen) in tuberias:
+            return False
+        tuberias.add((origen, destino))
+        capacidad = sortear()
+        prefijo, inverso = {'right': ('+', '-'), 'left': ('-', '+'), 'both': ('', '')}[direccion]
+        elementos[origen]['connections'].append({"target": prefijo + destino, "capacity": capacidad})
+        elementos[destino]['connections'].append({"target": inverso + origen, "capacity": capacidad})
+        return True
+
+    for b in range(barrios):
+        nombre_barrio = f"Barrio {b + 1}"
+        nombres = []
+        barrio = {"name": nombre_barrio, "elements": []}
+        for t in range(tanques):
+            maxima = rng.randint(500, 5000)
+            element = {"name": f"B{b + 1}-T{t + 1}", "type": "tank", "max_capacity": maxima,
+                       "current_capacity": rng.randint(0, maxima), "connections": []}
+            barrio["elements"].append(element)
+        for c in range(casas):
+            barrio["elements"].append({"name": f"B{b + 1}-C{c + 1}", "type": "house", "connections": []})
+        for element in barrio["elements"]:
+            elementos[element["name"]] = element
+            nombres.append(element["name"])
+        data.append(barrio)
+
+        # Árbol: cada casa cuelga de un tanque o de una casa anterior
+        for i in range(tanques, len(nombres)):
+            padre = nombres[rng.randrange(i)]
+            conectar(padre, nombres[i], 'right' if rng.random() < 0.7 else 'both')
+
+        # Tuberías extra hasta alcanzar la densidad pedida
+        objetivo = int(densidad * len(nombres)) - (len(nombres) - tanques)
+        intentos = 0
+        while objetivo > 0 and intentos < 10 * objetivo + 100 and len(nombres) > 1:
+            intentos += 1
+            origen, destino = rng.sample(nombres, 2)
+            direccion = 'right' if elementos[origen]['type'] == 'tank' else rng.choice(('right', 'left', 'both'))
+            if conectar(origen, destino, direccion):
+                objetivo -= 1
+
+    # Troncales entre tanques de barrios distintos
+    if barrios > 1 and tanques:
+        for _ in range(int(entre_barrios * len(tuberias))):
+            a, b = rng.sample(range(barrios), 2)
+            conectar(f"B{a + 1}-T{rng.randint(1, tanques)}", f"B{b + 1}-T{rng.randint(1, tanques)}", 'both')
+
+    return data
+
+
+def generar_por_tamano(nodos, elementos_por_barrio=250, proporcion_tanques=0.1, **opciones):
+    """Red de aproximadamente ``nodos`` elementos repartidos en barrios de ``elementos_por_barrio``."""
+    por_barrio = max(2, min(nodos, elementos_por_barrio))
+    barrios = max(1, round(nodos / por_barrio))
+    tanques = max(1, round(por_barrio * proporcion_tanques))
+    return generar_red(barrios=barrios, tanques=tanques, casas=por_barrio - tanques, **opciones)
+
+
+def guardar_red(data, file_path):
+    """Escribir la red con el mismo formato que guarda la interfaz."""
+    carpeta = os.path.dirname(file_path)
+    if carpeta:
+        os.makedirs(carpeta, exist_ok=True)
+    temporal = file_path + '.tmp'
+    with open(temporal, 'w') as f:
+        json.dump(data, f, indent=4)
+    os.replace(temporal, file_path)
@@ -0,0 +1,87 @@
+"""Historial de acciones acotado en memoria y guardado en un log rotativo en segundo plano."""
+import logging
+import logging.handlers
+import os
+import queue
+from collections import deque
+from datetime import datetime
+
+MAX_ENTRADAS = 10_000            # entradas conservadas en memoria
+MAX_BYTES_ARCHIVO = 5 * 1024 ** 2  # tamaño de cada archivo antes de rotar
+ARCHIVOS_RESPALDO = 3            # archivos rotados que se conservan
+RUTA_HISTORIAL = os.path.join(os.path.expanduser('~'), '.tuberias', 'historial.log')
+
+
+class _EscritorHistorial(logging.handlers.QueueListener):
+    """Recibe en la cola las entradas como texto y arma el ``LogRecord`` en su propio hilo."""
+
+    def prepare(self, entrada):
+        return logging.makeLogRecord({'msg': entrada, 'levelno': logging.INFO, 'levelname': 'INFO'})
+
+
+class Historial:
+    """
+    Registro de acciones con tres destinos de distinto costo:
+
+    - ``entradas``: buffer circular con las últimas ``max_entradas``.
+    - Un archivo rotativo escrito por un ``QueueListener``: ``registrar`` solo
+      encola el texto; el registro de ``logging`` se arma y se escribe a
+      disco en otro hilo.
+    - ``tomar_pendientes()``: las entradas que la vista todavía no mostró,
+      para agregarlas de a lotes.
+
+    Si el archivo no se puede abrir el historial sigue funcionando en memoria.
+    """
+
+    def __init__(self, ruta_archivo=RUTA_HISTORIAL, max_entradas=MAX_ENTRADAS):
+        self.entradas = deque(maxlen=max_entradas)
+        self.pendientes = deque(maxlen=max_entradas)
+        self.ruta_archivo = None
+        self.error_archivo = None
+        self._cola = None
+        self._listener = None
+        if ruta_archivo:
+            self._abrir_archivo(ruta_archivo)
+
+    def _abrir_archivo(self, ruta_archivo):
+        try:
+            carpeta = os.path.dirname(ruta_archivo)
+            if carpeta:
+                os.makedirs(carpeta, exist_ok=True)
+            archivo = logging.handlers.RotatingFileHandler(
+                ruta_archivo, maxBytes=MAX_BYTES_ARCHIVO, backupCount=ARCHIVOS_RESPALDO, encoding='utf-8'
+            )
+        except OSError as e:
+            self.error_archivo = str(e)
+            return
+        archivo.setFormatter(logging.Formatter('%(message)s'))
+        self._cola = queue.SimpleQueue()
+        self._listener = _EscritorHistorial(self._cola, archivo)
+        self._listener.start()
+        self.ruta_archivo = ruta_archivo
+
+    def registrar(self, accion):
+        """Agregar una acción con marca de tiempo y devolver la entrada."""
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        entrada = f"[{timestamp}] {accion}"
+        self.entradas.append(entrada)
+        self.pendientes.append(entrada)
+        if self._cola is not None:
+            self._cola.put_nowait(entrada)
+        return entrada
+
+    def tomar_pendientes(self):
+        """Entradas registradas desde la última llamada (las más viejas se pierden si superan el buffer)."""
+        pendientes = []
+        while self.pendientes:
+            pendientes.append(self.pendientes.popleft())
+        return pendientes
+
+    def cerrar(self):
+        """Escribir lo encolado y cerrar el archivo."""
+        if self._listener is None:
+            return
+        self._listener.stop()
+        for handler in self._listener.handlers:
+            handler.close()
+        self._cola = self._listener = None
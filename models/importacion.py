@@ -0,0 +1,174 @@
+"""Importación masiva de barrios, tanques, casas y tuberías desde CSV o JSON-lines."""
+import csv
+import json
+import math
+import os
+
+TIPOS = ('tank', 'house')
+DIRECCIONES = ('right', 'left', 'both')
+
+# Columnas reconocidas (en CSV se pueden combinar en un mismo archivo)
+COLUMNAS_ELEMENTO = ('barrio', 'name', 'type', 'max_capacity', 'current_capacity')
+COLUMNAS_CONEXION = ('source', 'target', 'capacity', 'direction')
+
+
+def leer_filas(file_path):
+    """
+    Recorrer las filas de un archivo ``.csv`` o JSON-lines como ``(linea, dict)``.
+
+    En CSV la primera línea es la cabecera; en JSON-lines cada línea no vacía
+    es un objeto. Las celdas vacías se ignoran.
+    """
+    extension = os.path.splitext(file_path)[1].lower()
+    with open(file_path, 'r', encoding='utf-8-sig', newline='') as f:
+        if extension == '.csv':
+            lector = csv.DictReader(f)
+            for fila in lector:
+                yield lector.line_num, {k.strip(): v.strip() for k, v in fila.items()
+                                        if k and isinstance(v, str) and v.strip()}
+        else:
+            for linea, texto in enumerate(f, 1):
+                if not texto.strip():
+                    continue
+                try:
+                    fila = json.loads(texto)
+                except ValueError as e:
+                    raise ValueError(f"Línea {linea}: JSON inválido ({e})") from None
+                if not isinstance(fila, dict):
+                    raise ValueError(f"Línea {linea}: se esperaba un objeto JSON")
+                yield linea, {k: v for k, v in fila.items() if v not in (None, '')}
+
+
+def _numero(valor):
+    """Número finito de una celda (texto en CSV); enteros como int."""
+    if isinstance(valor, bool):
+        raise ValueError
+    if isinstance(valor, int):
+        return valor
+    numero = float(valor)
+    # float() acepta 'nan' e 'inf' (y JSON-lines NaN/Infinity), que no son capacidades
+    if not math.isfinite(numero):
+        raise ValueError
+    if isinstance(valor, float):
+        return valor
+    return int(numero) if numero.is_integer() else numero
+
+
+class PlanImportacion:
+    """Resultado de validar un archivo: lo que se va a agregar y los errores por línea."""
+
+    def __init__(self):
+        self.filas = 0
+        self.barrios = {}       # barrios nuevos por nombre, en orden de aparición
+        self.elementos = []     # (barrio, elemento) para barrios que ya existen
+        self.conexiones = []    # (origen, destino, capacidad, direccion)
+        self.errores = []       # (linea, mensaje)
+
+    def cantidad_elementos(self):
+        return len(self.elementos) + sum(len(b['elements']) for b in self.barrios.values())
+
+    def resumen(self):
+        return (f"{len(self.barrios)} barrios nuevos, {self.cantidad_elementos()} elementos y "
+                f"{len(self.conexiones)} conexiones ({self.filas} filas)")
+
+
+def validar_importacion(network, filas):
+    """
+    Validar en una pasada las filas contra los índices de ``network``.
+
+    Una fila con ``source`` es una tubería; si no, con ``name`` es un tanque o
+    una casa del barrio ``barrio`` (que se crea si no existe). Las tuberías
+    pueden referir elementos del propio archivo. La red no se modifica.
+    """
+    plan = PlanImportacion()
+    nuevos = set()    # nombres de elementos del archivo
+    tuberias = set()  # pares ya presentes en el archivo
+
+    for linea, fila in filas:
+        plan.filas += 1
+        try:
+            if 'source' in fila:
+                plan.conexiones.append(_validar_conexion(network, fila, nuevos, tuberias))
+            elif 'name' in fila:
+                barrio, element = _validar_elemento(network, fila, nuevos)
+                if network.barrio(barrio) is not None:
+                    plan.elementos.append((barrio, element))
+                else:
+                    plan.barrios.setdefault(barrio, {'name': barrio, 'elements': []})['elements'].append(element)
+        except ValueError as e:
+            plan.errores.append((linea, str(e)))
+        except KeyError as e:
+            plan.errores.append((linea, f"falta la columna {e}"))
+    return plan
+
+
+def _validar_elemento(network, fila, nuevos):
+    name, barrio, tipo = str(fila['name']), str(fila['barrio']), fila['type']
+    if tipo not in TIPOS:
+        raise ValueError(f"tipo '{tipo}' inválido (se espera {' o '.join(TIPOS)})")
+    if name in nuevos or network.elemento(name) is not None:
+        raise ValueError(f"ya existe un elemento con el nombre '{name}'")
+
+    element = {"name": name, "type": tipo}
+    if tipo == 'tank':
+        try:
+            max_capacity = _numero(fila['max_capacity'])
+            current_capacity = _numero(fila.get('current_capacity', 0))
+        except (TypeError, ValueError):
+            raise ValueError(f"capacidades no numéricas en el tanque '{name}'") from None
+        if max_capacity < 1 or not 0 <= current_capacity <= max_capacity:
+            raise ValueError(f"capacidades fuera de rango en el tanque '{name}'")
+        element.update(max_capacity=max_capacity, current_capacity=current_capacity)
+    element["connections"] = []
+    nuevos.add(name)
+    return barrio, element
+
+
+def _validar_conexion(network, fila, nuevos, tuberias):
+    origen, destino = str(fila['source']), str(fila['target'])
+    direccion = fila.get('direction', 'both')
+    for nombre in (origen, destino):
+        if nombre not in nuevos and network.elemento(nombre) is None:
+            raise ValueError(f"no existe el elemento '{nombre}'")
+    if origen == destino:
+        raise ValueError("el origen y el destino deben ser distintos")
+    if direccion not in DIRECCIONES:
+        raise ValueError(f"dirección '{direccion}' inválida (se espera {', '.join(DIRECCIONES)})")
+    try:
+        capacidad = _numero(fila['capacity'])
+    except (TypeError, ValueError):
+        raise ValueError(f"capacidad no numérica entre {origen} y {destino}") from None
+    if capacidad <= 0:
+        raise ValueError(f"la capacidad entre {origen} y {destino} debe ser positiva")
+
+    par = frozenset((origen, destino))
+    if par in tuberias or network.tiene_conexion(origen, destino):
+        raise ValueError(f"ya existe una conexión entre {origen} y {destino}")
+    tuberias.add(par)
+    return origen, destino, capacidad, direccion
+
+
+def aplicar_importacion(network, plan):
+    """
+    Agregar a la red todo lo validado en una sola transacción.
+
+    Las tuberías se escriben con ``agregar_conexion`` (entradas espejadas
+    ``+``/``-``/sin prefijo). Si algo falla no queda nada aplicado.
+    """
+    if plan.errores:
+        raise ValueError(f"La importación tiene {len(plan.errores)} errores")
+    with network.batch():
+        for barrio in plan.barrios.values():
+            network.agregar_barrio(barrio)
+        for barrio, element in plan.elementos:
+            network.agregar_elemento(barrio, element)
+        for origen, destino, capacidad, direccion in plan.conexiones:
+            network.agregar_conexion(origen, destino, capacidad, direccion)
+
+
+def importar_archivo(network, file_path):
+    """Leer, validar y, si no hay errores, aplicar un archivo. Retorna el plan."""
+    plan = validar_importacion(network, leer_filas(file_path))
+    if not plan.errores:
+        aplicar_importacion(network, plan)
+    return plan
@@ -1,21 +1,66 @@
 import sys
-import networkx as nx
-import matplotlib.pyplot as plt
+import time
 from PyQt5.QtWidgets import *
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QTimer, pyqtSignal
 from PyQt5.QtGui import QIcon
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-from matplotlib.figure import Figure
-import random
 import json
 import os
-import matplotlib.image as mpimg
-from datetime import datetime
 
-from models.funtions import load_graph_from_json,  assign_graph_positions, agregar_conexion
+from models.tareas import GestorTareas
+from models.recomendaciones import NOMBRES_TIPOS, MotorRecomendaciones
+from models.lista_recomendaciones import FiltroRecomendaciones, ModeloRecomendaciones
+from models.importacion import aplicar_importacion, leer_filas, validar_importacion
+from models.perfil import medidor_importaciones, perfilador, tramo
+from models.historial import Historial
+
+MAX_LINEAS_HISTORIAL = 5000  # líneas que muestra la vista (el archivo guarda todo)
+INTERVALO_HISTORIAL = 100  # ms entre actualizaciones de la vista del historial
+INTERVALO_INDICE_CORTES = 500  # ms sin ediciones antes de reconstruir el índice de cortes
+VISTA_MATPLOTLIB = "Matplotlib"
+VISTA_ESCENA = "Escena Qt (redes grandes)"
+
+
+def importar_dependencias(tarea=None):
+    """
+    Importar networkx, numpy, matplotlib y los módulos que los usan.
+
+    Se llama en segundo plano una vez que la ventana está visible: importarlos
+    al cargar este módulo demoraba el arranque más de un segundo. Los nombres
+    quedan como globales del módulo; los controles que los usan se habilitan
+    recién en ``WaterSystemGraphVisualizer.completar_inicio``.
+    """
+    global load_graph_from_json, assign_graph_positions, preparar_layout, completar_layout
+    global WaterNetwork, podar_conexiones, CacheFlujos, FlujoIncremental, IndiceCorteMinimo, RenderizadorRed
+    global RenderizadorEscena
+    global BACKEND_AUTO, BACKENDS, calcular_matriz_flujo, exportar_matriz_csv, exportar_matriz_npy, tanques_y_casas
+    global CacheLayout, calcular_layouts, ruta_cache_layout, listar_barrios, abrir_snapshot, cargar_red
+    global MAX_PENDIENTES, Diario
+    global FigureCanvas, NavigationToolbar, Figure
+    with tramo('importacion'):
+        from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+        from matplotlib.backends.backend_qt5agg import NavigationToolbar2QT as NavigationToolbar
+        from matplotlib.figure import Figure
+        from models.funtions import load_graph_from_json, assign_graph_positions, preparar_layout, completar_layout
+        from models.red import WaterNetwork
+        from models.optimizacion import podar_conexiones
+        from models.flujo import (BACKEND_AUTO, BACKENDS, calcular_matriz_flujo, exportar_matriz_csv,
+                                  exportar_matriz_npy, tanques_y_casas)
+        from models.flujo_incremental import CacheFlujos, FlujoIncremental
+        from models.corte_minimo import IndiceCorteMinimo
+        from models.render import RenderizadorRed
+        from models.escena import RenderizadorEscena
+        from models.layout import CacheLayout, calcular_layouts, ruta_cache_layout
+        from models.carga import listar_barrios
+        from models.snapshot import abrir_snapshot, cargar_red
+        from models.diario import MAX_PENDIENTES, Diario
+
 
 class WaterSystemGraphVisualizer(QMainWindow):
     file=""
+    # Tramos medidos en cualquier hilo; la señal los entrega en el hilo de la interfaz
+    tramo_medido = pyqtSignal(str, float, object)
+    iniciada = pyqtSignal()  # dependencias importadas y controles habilitados
+
     def __init__(self):
         super().__init__()
         self.initUI()
@@ -32,12 +77,21 @@ class WaterSystemGraphVisualizer(QMainWindow):
         # Layout para controles y visualización
         left_layout = QVBoxLayout()
         left_layout.setSpacing(1)
+        # Deshabilitados hasta que terminen de importarse networkx y matplotlib
+        self.controles = QWidget()
+        self.controles.setLayout(left_layout)
+        self.controles.setEnabled(False)
         
 
         # Botón de carga de grafo
         load_button = QPushButton("Cargar Grafo")
         load_button.clicked.connect(self.load_graph)
         left_layout.addWidget(load_button)
+
+        # Carga parcial (solo lectura) de algunos barrios de un archivo grande
+        load_partial_button = QPushButton("Cargar Barrios...")
+        load_partial_button.clicked.connect(self.cargar_barrios_seleccionados)
+        left_layout.addWidget(load_partial_button)
         
         
         # Otros botones (como estaban antes)
@@ -62,15 +116,46 @@ class WaterSystemGraphVisualizer(QMainWindow):
         add_house_button = QPushButton("Agregar Casa")
         add_house_button.clicked.connect(self.agregar_casa)
         left_layout.addWidget(add_house_button)
+
+        # Importación masiva (exportaciones de GIS en CSV o JSON-lines)
+        import_button = QPushButton("Importar CSV/JSONL...")
+        import_button.clicked.connect(self.importar_archivo)
+        left_layout.addWidget(import_button)
         
         optimize_button = QPushButton("Optimizar Conexiones")
         optimize_button.clicked.connect(self.optimize_graph_connections)
         left_layout.addWidget(optimize_button)
 
+        # Matplotlib para redes chicas y exportar la figura; la escena Qt para redes grandes
+        left_layout.addWidget(QLabel("Vista:"))
+        self.renderer_combo = QComboBox()
+        self.renderer_combo.addItems([VISTA_MATPLOTLIB, VISTA_ESCENA])
+        self.renderer_combo.currentTextChanged.connect(self.cambiar_renderizador)
+        left_layout.addWidget(self.renderer_combo)
+
+        # Algoritmo de flujo máximo ('auto' lo elige según el tamaño y la densidad)
+        left_layout.addWidget(QLabel("Algoritmo de flujo:"))
+        self.flow_backend_combo = QComboBox()  # Los algoritmos se agregan en completar_inicio
+        left_layout.addWidget(self.flow_backend_combo)
+
         max_flow_button = QPushButton("Calcular Flujo Máximo")
         max_flow_button.clicked.connect(self.calculate_max_flow)
         left_layout.addWidget(max_flow_button)
+
+        # Botón para calcular el flujo máximo de todos los tanques a todas las casas
+        flow_matrix_button = QPushButton("Matriz de Flujo Máximo")
+        flow_matrix_button.clicked.connect(self.calcular_matriz_flujo_maximo)
+        left_layout.addWidget(flow_matrix_button)
         
+        # Índice de Gomory-Hu para responder cortes mínimos sin calcular flujos
+        self.min_cut_index_checkbox = QCheckBox("Índice de cortes (Gomory-Hu)")
+        self.min_cut_index_checkbox.toggled.connect(self.reconstruir_indice_cortes)
+        left_layout.addWidget(self.min_cut_index_checkbox)
+
+        min_cut_button = QPushButton("Consultar Corte Mínimo")
+        min_cut_button.clicked.connect(self.consultar_corte_minimo)
+        left_layout.addWidget(min_cut_button)
+
         change_direction_button = QPushButton("Cambiar Dirección de Conexión")
         change_direction_button.clicked.connect(self.change_connection_direction)
         left_layout.addWidget(change_direction_button)
@@ -80,22 +165,110 @@ class WaterSystemGraphVisualizer(QMainWindow):
         simulate_obstruction_button.clicked.connect(self.cambiar_capacidad_conexion)
         left_layout.addWidget(simulate_obstruction_button)
 
+        # Modo lote: las ediciones se acumulan y se guardan y redibujan una vez al confirmar
+        self.batch_mode_checkbox = QCheckBox("Modo lote")
+        self.batch_mode_checkbox.toggled.connect(self.cambiar_modo_lote)
+        left_layout.addWidget(self.batch_mode_checkbox)
+
+        confirm_batch_button = QPushButton("Confirmar Lote")
+        confirm_batch_button.clicked.connect(self.confirmar_lote)
+        left_layout.addWidget(confirm_batch_button)
+
+        discard_batch_button = QPushButton("Descartar Lote")
+        discard_batch_button.clicked.connect(self.descartar_lote)
+        left_layout.addWidget(discard_batch_button)
+
+        # Cola de tareas en segundo plano (carga, layout, optimización, flujos)
+        left_layout.addWidget(QLabel("Tareas en curso:"))
+        self.job_list = QListWidget()
+        self.job_list.setMaximumHeight(120)
+        left_layout.addWidget(self.job_list)
+
+        cancel_job_button = QPushButton("Cancelar Tarea")
+        cancel_job_button.clicked.connect(self.cancelar_tarea)
+        left_layout.addWidget(cancel_job_button)
+
+        # Tiempos por etapa (carga, layout, dibujo, guardado...) en el historial
+        self.profile_checkbox = QCheckBox("Perfilar etapas")
+        self.profile_checkbox.setChecked(perfilador.activo)
+        self.profile_checkbox.toggled.connect(self.cambiar_perfilado)
+        left_layout.addWidget(self.profile_checkbox)
+
+        export_profile_button = QPushButton("Exportar Perfil...")
+        export_profile_button.clicked.connect(self.exportar_perfil)
+        left_layout.addWidget(export_profile_button)
+
+        cprofile_button = QPushButton("cProfile Próxima Acción...")
+        cprofile_button.clicked.connect(self.capturar_cprofile)
+        left_layout.addWidget(cprofile_button)
+
+        self.tramo_medido.connect(self._registrar_tramo)
+        self._oyente_perfil = self.tramo_medido.emit
+        perfilador.oyentes.append(self._oyente_perfil)
+
+        self.tareas = GestorTareas(self)
+        self.tareas.cambio.connect(self.actualizar_lista_tareas)
+
         # Layout para gráfico y log
-        visualization_layout = QVBoxLayout()
+        self.visualization_layout = visualization_layout = QVBoxLayout()
 
-        # Figura de matplotlib para visualización
-        self.figure = Figure(figsize=(12, 10))
-        self.canvas = FigureCanvas(self.figure)
-        visualization_layout.addWidget(self.canvas)
+        # La figura de matplotlib se crea en completar_inicio; mientras tanto se ve un aviso
+        self.figure = self.canvas = self.renderizador = self.renderizadores = None
+        self.canvas_placeholder = QLabel("Cargando componentes...")
+        self.canvas_placeholder.setAlignment(Qt.AlignCenter)
+        visualization_layout.addWidget(self.canvas_placeholder, 1)
 
         # Área de texto para el historial de optimización
-        self.log_text = QTextEdit()
+        # Las entradas se acumulan y la vista se actualiza de a lotes; las más viejas se descartan
+        self.historial = Historial()
+        self.log_text = QPlainTextEdit()
         self.log_text.setReadOnly(True)
+        self.log_text.setMaximumBlockCount(MAX_LINEAS_HISTORIAL)
         self.log_text.setPlaceholderText("El historial aparecerá aquí...")
-        visualization_layout.addWidget(self.log_text)
+        self.temporizador_historial = QTimer(self)
+        self.temporizador_historial.setSingleShot(True)
+        self.temporizador_historial.setInterval(INTERVALO_HISTORIAL)
+        self.temporizador_historial.timeout.connect(self.mostrar_historial_pendiente)
+        if self.historial.error_archivo:
+            self.log_action(f"El historial no se guardará en disco: {self.historial.error_archivo}")
+
+        # Recomendaciones: índice incremental en una lista virtualizada y filtrable
+        self.motor_recomendaciones = MotorRecomendaciones()
+        self.modelo_recomendaciones = ModeloRecomendaciones(self.motor_recomendaciones, self)
+        self.filtro_recomendaciones = FiltroRecomendaciones(self)
+        self.filtro_recomendaciones.setSourceModel(self.modelo_recomendaciones)
+        self.filtro_recomendaciones.sort(0)
+
+        recommendations_layout = QVBoxLayout()
+        self.recommendations_label = QLabel("Recomendaciones:")
+        recommendations_layout.addWidget(self.recommendations_label)
+        filter_layout = QHBoxLayout()
+        self.recommendation_filter = QLineEdit()
+        self.recommendation_filter.setPlaceholderText("Filtrar por elemento o texto...")
+        self.recommendation_filter.textChanged.connect(self.filtro_recomendaciones.setFilterFixedString)
+        filter_layout.addWidget(self.recommendation_filter)
+        self.recommendation_type_combo = QComboBox()
+        self.recommendation_type_combo.addItem("Todas", None)
+        for tipo, nombre in NOMBRES_TIPOS.items():
+            self.recommendation_type_combo.addItem(nombre, tipo)
+        self.recommendation_type_combo.currentIndexChanged.connect(
+            lambda: self.filtro_recomendaciones.filtrar_tipo(self.recommendation_type_combo.currentData())
+        )
+        filter_layout.addWidget(self.recommendation_type_combo)
+        recommendations_layout.addLayout(filter_layout)
+        self.recommendation_list = QListView()
+        self.recommendation_list.setUniformItemSizes(True)  # la vista no mide cada fila
+        self.recommendation_list.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.recommendation_list.setModel(self.filtro_recomendaciones)
+        recommendations_layout.addWidget(self.recommendation_list)
+
+        bottom_layout = QHBoxLayout()
+        bottom_layout.addWidget(self.log_text)
+        bottom_layout.addLayout(recommendations_layout)
+        visualization_layout.addLayout(bottom_layout)
 
         # Combinar layouts
-        main_layout.addLayout(left_layout)
+        main_layout.addWidget(self.controles)
         main_layout.addLayout(visualization_layout)
         main_layout.setStretch(2, 1)  # Botones
         main_layout.setStretch(1, 3)  # Visualización y log
@@ -104,32 +277,329 @@ class WaterSystemGraphVisualizer(QMainWindow):
         self.setCentralWidget(central_widget)
 
         self.graph = None
-        self.original_data = None
-        self.optimization_log = []  # Nuevo atributo para mantener el registro
+        self.network = None  # Se crean en completar_inicio
+        self.original_data = []
+        self.flujos = None
+        self.indice_cortes = None
+        self.cache_layout = None
+        self.optimization_log = self.historial.entradas  # Últimas entradas del registro
+        self.solo_lectura = False  # True si se cargó solo una parte de los barrios
+        self.diario = None  # Diario de cambios del archivo abierto
+
+        # Los cambios se agregan al diario; el JSON completo se reescribe de vez en cuando
+        self.temporizador_compactacion = QTimer(self)
+        self.temporizador_compactacion.setInterval(30000)
+        self.temporizador_compactacion.timeout.connect(self.compactar_diario)
+        self.temporizador_compactacion.start()
+
+        # Varias ediciones seguidas se juntan en una sola reconstrucción del índice de cortes
+        self.temporizador_indice_cortes = QTimer(self)
+        self.temporizador_indice_cortes.setSingleShot(True)
+        self.temporizador_indice_cortes.setInterval(INTERVALO_INDICE_CORTES)
+        self.temporizador_indice_cortes.timeout.connect(self._lanzar_indice_cortes)
+
+        # La ventana se muestra enseguida; networkx y matplotlib se importan en segundo plano
+        self.tareas.lanzar("Inicio", importar_dependencias,
+                           al_terminar=self.completar_inicio, al_fallar=self._error_al_iniciar)
+
+    def completar_inicio(self, _=None):
+        """Crear la figura, la red vacía y las cachés una vez importadas las dependencias"""
+        with tramo('construccion', ventana=True):
+            # Figura de matplotlib para visualización
+            self.figure = Figure(figsize=(12, 10))
+            self.canvas = FigureCanvas(self.figure)
+
+            # Íconos decodificados una vez y artistas conservados entre dibujos
+            self.renderizadores = {
+                VISTA_MATPLOTLIB: RenderizadorRed(self.figure, self.canvas),
+                VISTA_ESCENA: RenderizadorEscena(),
+            }
+            # Zoom y desplazamiento de la figura con la barra de matplotlib
+            figure_page = QWidget()
+            figure_layout = QVBoxLayout(figure_page)
+            figure_layout.setContentsMargins(0, 0, 0, 0)
+            figure_layout.addWidget(NavigationToolbar(self.canvas, figure_page))
+            figure_layout.addWidget(self.canvas, 1)
+            self.visualization_stack = QStackedWidget()
+            self.visualization_stack.addWidget(figure_page)
+            self.visualization_stack.addWidget(self.renderizadores[VISTA_ESCENA].widget)
+            self.visualization_layout.replaceWidget(self.canvas_placeholder, self.visualization_stack)
+            self.canvas_placeholder.deleteLater()
+            self.cambiar_renderizador(self.renderer_combo.currentText())
+
+            self.flow_backend_combo.addItems([BACKEND_AUTO] + list(BACKENDS))
+            self.network = WaterNetwork([])
+            self.original_data = self.network.data
+            self.flujos = CacheFlujos()  # Últimos flujos máximos, reparados tras cada edición
+            self.indice_cortes = IndiceCorteMinimo()
+            self.cache_layout = CacheLayout()  # Posiciones por barrio (se asocia al archivo al cargarlo)
+        self.controles.setEnabled(True)
+        self.iniciada.emit()
+
+    def cambiar_renderizador(self, nombre):
+        """Mostrar la red con matplotlib o con la escena Qt (pensada para decenas de miles de nodos)"""
+        if self.renderizadores is None:
+            return  # Se vuelve a llamar en completar_inicio
+        self.renderizador = self.renderizadores[nombre]
+        self.visualization_stack.setCurrentIndex(0 if nombre == VISTA_MATPLOTLIB else 1)
+        # La otra vista no se actualizó mientras estaba oculta
+        self.visualize_graph()
 
-        self.graph = None
-        self.original_data = None
+    def _error_al_iniciar(self, mensaje):
+        self.canvas_placeholder.setText(f"No se pudieron cargar los componentes: {mensaje}")
+        self.log_action(f"Error al iniciar: {mensaje}")
 
     def load_graph(self):
         """Cargar grafo desde un archivo JSON"""
-        self.file, _ = QFileDialog.getOpenFileName(self, "Abrir Archivo JSON", "", "JSON Files (*.json)")
-        
-        if self.file:
-            try:
-                # Cargar grafo desde JSON
-                self.graph, self.original_data = load_graph_from_json(self.file)
-                
-                
-                self.log_action(f"Grafo cargado desde: {os.path.basename(self.file)}")
-                # Visualizar grafo
-                self.visualize_graph()
-                
-                
-                self.analizar_grafo_y_generar_recomendaciones()
-            except Exception as e:
-                QMessageBox.critical(self, "Error", f"No se pudo cargar el grafo: {str(e)}")
-                self.log_action(f"Error al cargar el grafo: {str(e)}")
-                
+        # self.file cambia recién en _grafo_cargado: una carga fallida o cancelada no redirige los guardados
+        file_path, _ = QFileDialog.getOpenFileName(self, "Abrir Archivo JSON", "", "JSON Files (*.json)")
+
+        if file_path:
+            self._lanzar_carga(file_path)
+
+    def cargar_barrios_seleccionados(self):
+        """Cargar solo algunos barrios de un archivo grande (vista de solo lectura)"""
+        file_path, _ = QFileDialog.getOpenFileName(self, "Abrir Archivo JSON", "", "JSON Files (*.json)")
+        if not file_path:
+            return
+
+        def progreso(tarea, leidos, total):
+            tarea.reportar_progreso(leidos // 1024, total // 1024)
+            return tarea.cancelada()
+
+        # Los nombres se obtienen con una pasada por el archivo, también en segundo plano
+        self.tareas.lanzar(
+            "Listar barrios",
+            lambda tarea: listar_barrios(file_path, lambda leidos, total: progreso(tarea, leidos, total)),
+            al_terminar=lambda nombres: self._elegir_barrios(file_path, nombres),
+            al_fallar=self._error_al_cargar,
+        )
+
+    def _elegir_barrios(self, file_path, nombres):
+        dialogo = QDialog(self)
+        dialogo.setWindowTitle("Seleccionar Barrios")
+        layout = QVBoxLayout()
+        lista = QListWidget()
+        lista.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        lista.addItems(nombres)
+        layout.addWidget(lista)
+        botones = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        botones.accepted.connect(dialogo.accept)
+        botones.rejected.connect(dialogo.reject)
+        layout.addWidget(botones)
+        dialogo.setLayout(layout)
+
+        if dialogo.exec_() != QDialog.Accepted:
+            return
+        seleccion = [item.text() for item in lista.selectedItems()]
+        if not seleccion:
+            return
+        self._lanzar_carga(file_path, seleccion)
+
+    def _lanzar_carga(self, file_path, barrios=None):
+        # Leer, construir el grafo y distribuir los barrios fuera del hilo de la interfaz
+        self.tareas.cancelar_todas("Cargar grafo")
+        self.tareas.lanzar(
+            "Cargar grafo", self._cargar_en_segundo_plano, file_path, barrios,
+            al_terminar=self._grafo_cargado,
+            al_fallar=self._error_al_cargar,
+        )
+
+    @staticmethod
+    def _cargar_en_segundo_plano(tarea, file_path, barrios=None):
+        """
+        Leer la red y calcular las posiciones (corre en un hilo del pool).
+
+        Con un snapshot vigente y sin cambios del diario por reproducir solo
+        se arma lo que necesita la primera vista: los nombres de los barrios y,
+        si todos tienen su layout en la caché, una ``VistaGrafo`` en lugar del
+        ``nx.DiGraph``. El grafo, los datos y la red editable se arman después
+        en "Preparar edición" y el resultado lleva ``network=None``.
+        """
+        def progreso(leidos, total):
+            # En KB para no desbordar la señal con archivos de cientos de MB
+            tarea.reportar_progreso(leidos // 1024, total // 1024)
+            return tarea.cancelada()
+
+        def progreso_pasos(hechos, total):
+            tarea.reportar_progreso(hechos, total)
+            return tarea.cancelada()
+
+        snapshot, diario, network, reproducidos = None, None, None, (0, 0)
+        # La caché de layout es del archivo completo: una vista parcial no la usa
+        cache = CacheLayout(ruta_cache_layout(file_path) if barrios is None else None)
+        with tramo('carga', archivo=os.path.basename(file_path)):
+            if barrios is None:
+                diario = Diario(file_path)
+                if not diario.por_reproducir():
+                    snapshot = abrir_snapshot(file_path)
+            if snapshot is not None:
+                data = snapshot.esqueleto()
+                if all(cache.obtener(nombre, h) is not None
+                       for nombre, h in zip(snapshot.barrio_names(), snapshot.hashes_barrios())):
+                    # Ningún barrio por distribuir: para dibujar alcanza la vista del snapshot
+                    graph = snapshot.vista()
+                else:
+                    graph = snapshot.grafo(callback=progreso_pasos)
+            elif barrios is None:
+                # Sin snapshot vigente (o con cambios que reproducir) se arma la red completa
+                graph, data, _ = cargar_red(file_path, callback=progreso)
+            else:
+                graph, data = load_graph_from_json(file_path, barrios, callback=progreso)
+        if tarea.cancelada():
+            if snapshot is not None:
+                snapshot.cerrar()
+            if diario is not None:
+                diario.cerrar()
+            return None
+
+        if snapshot is None:
+            with tramo('construccion', nodos=graph.number_of_nodes()):
+                network = WaterNetwork(data, graph)
+
+                # Aplicar las ediciones del diario que todavía no se compactaron en el JSON
+                if diario is not None:
+                    reproducidos = diario.reproducir(network)
+                    network.tomar_cambios()
+                graph = network.graph
+
+        with tramo('layout', barrios=len(data)):
+            pos = assign_graph_positions(graph, data, cache, callback=progreso_pasos,
+                                         hashes_conocidos=snapshot.hashes_barrios() if snapshot is not None else None)
+        if tarea.cancelada():
+            if snapshot is not None:
+                snapshot.cerrar()
+            if diario is not None:
+                diario.cerrar()
+            return None
+        return file_path, barrios, graph, network, diario, reproducidos, cache, pos, snapshot
+
+    def _grafo_cargado(self, resultado):
+        """Instalar la red recién cargada (en el hilo de la interfaz)."""
+        file_path, barrios, graph, network, diario, reproducidos, cache, pos, snapshot = resultado
+        # Lo pendiente en el lote de la red anterior se confirma antes de cerrarla
+        self.network.confirmar_lote()
+        self.compactar_diario(sincronico=True)
+        if self.diario is not None:
+            self.diario.cerrar()
+        self.file = file_path
+        self.solo_lectura = barrios is not None
+        if network is None:
+            # Primera vista desde el snapshot; la red editable llega con "Preparar edición"
+            self.network, self.diario = WaterNetwork([]), None
+            self.graph, self.original_data = graph, snapshot.esqueleto()
+            self.controles.setEnabled(False)
+        else:
+            self._instalar_red(network, diario)
+        self.flujos.invalidar()
+        self.cache_layout = cache
+        self.tareas.cancelar_todas("Layout")
+
+        self.log_action(f"Grafo cargado desde: {os.path.basename(self.file)}")
+        if self.solo_lectura:
+            self.log_action(f"  - Vista parcial de solo lectura ({len(barrios)} barrios): los cambios no se guardan")
+        aplicados, fallidos = reproducidos
+        if aplicados or fallidos:
+            self.log_action(f"  - Cambios recuperados del diario: {aplicados} (no aplicables: {fallidos})")
+        # Visualizar grafo con las posiciones ya calculadas
+        self._guardar_cache_layout()
+        with tramo('render', nodos=self.graph.number_of_nodes()):
+            self.renderizador.dibujar(self.graph, pos, self.original_data)
+
+        if network is None:
+            # Las recomendaciones recorren el grafo completo: se generan con la red editable
+            tarea = self.tareas.lanzar(
+                "Preparar edición", self._preparar_en_segundo_plano, snapshot, diario,
+                al_terminar=lambda resultado: self._red_preparada(*resultado),
+                al_fallar=self._error_al_cargar,
+            )
+            # Cancelada (incluso antes de empezar) o fallida: los controles se habilitan igual
+            tarea.senales.terminada.connect(self._preparacion_terminada)
+        else:
+            self.analizar_grafo_y_generar_recomendaciones()
+
+    def _instalar_red(self, network, diario):
+        """Usar ``network`` como la red editable de la ventana."""
+        self.network = network
+        self.graph, self.original_data = network.graph, network.data
+        self.diario = diario
+        if diario is not None:
+            network.oyentes.append(diario.registrar)
+        if self.batch_mode_checkbox.isChecked():
+            network.iniciar_lote()
+        self.reconstruir_indice_cortes()
+
+    @staticmethod
+    def _preparar_en_segundo_plano(tarea, snapshot, diario):
+        """Armar los datos del JSON y la red editable desde el snapshot (corre en un hilo del pool)."""
+        def progreso(hechos, total):
+            tarea.reportar_progreso(hechos, total)
+            return tarea.cancelada()
+
+        try:
+            with tramo('construccion', nodos=snapshot.num_nodos):
+                graph = snapshot.grafo(callback=progreso)
+                data = snapshot.datos(callback=progreso) if graph is not None else None
+                if data is None:
+                    return None  # Cancelada
+                # El diario no tenía cambios: la red usa el grafo del snapshot tal cual
+                network = WaterNetwork(data, graph)
+                diario.reproducir(network)
+                network.tomar_cambios()
+        finally:
+            snapshot.cerrar()
+        return network, diario
+
+    def _red_preparada(self, network, diario):
+        """Reemplazar la vista del snapshot por la red editable (mismo contenido, no se redibuja)."""
+        self._instalar_red(network, diario)
+        self.renderizador.cambiar_grafo(self.graph)
+        self.analizar_grafo_y_generar_recomendaciones()
+
+    def _preparacion_terminada(self):
+        if self.network.graph is not self.graph:
+            # Sin la red editable la vista no sirve para editar ni analizar: queda vacía
+            self.solo_lectura = True
+            self._instalar_red(WaterNetwork([]), None)
+            self.renderizador.dibujar(self.graph, {}, self.original_data)
+            self.log_action("  - La red no se preparó para edición: vuelva a cargar el archivo")
+        self.controles.setEnabled(True)
+
+    def _error_al_cargar(self, mensaje):
+        QMessageBox.critical(self, "Error", f"No se pudo cargar el grafo: {mensaje}")
+        self.log_action(f"Error al cargar el grafo: {mensaje}")
+
+    def actualizar_lista_tareas(self):
+        """Mostrar la cola de tareas en segundo plano con su estado y avance"""
+        self.job_list.clear()
+        for tarea in self.tareas.tareas():
+            self.job_list.addItem(tarea.descripcion())
+
+    def cancelar_tarea(self):
+        """Cancelar la tarea seleccionada en la cola (o la más reciente)"""
+        tareas = self.tareas.tareas()
+        if not tareas:
+            return
+        fila = self.job_list.currentRow()
+        tarea = tareas[fila] if 0 <= fila < len(tareas) else tareas[-1]
+        self.tareas.cancelar(tarea)
+        self.log_action(f"Tarea cancelada: {tarea.nombre}")
+
+    def closeEvent(self, event):
+        # No dejar hilos calculando resultados que nadie va a usar
+        self.tareas.cancelar_todas()
+        self.tareas.pool.waitForDone(5000)
+        if self._oyente_perfil in perfilador.oyentes:
+            perfilador.oyentes.remove(self._oyente_perfil)
+        if self.network is not None:
+            self.network.confirmar_lote()
+        self.compactar_diario(sincronico=True)
+        if self.diario is not None:
+            self.diario.cerrar()
+        if self.renderizadores is not None:
+            self.renderizadores[VISTA_ESCENA].cerrar()
+        self.historial.cerrar()
+        super().closeEvent(event)
 
 
 
@@ -142,7 +612,7 @@ class WaterSystemGraphVisualizer(QMainWindow):
             return
 
         # Verificar si el barrio ya existe
-        if any(barrio['name'] == barrio_name for barrio in self.original_data):
+        if self.network.barrio(barrio_name.strip()) is not None:
             QMessageBox.warning(self, "Error", f"Ya existe un barrio con el nombre '{barrio_name}'.")
             return
 
@@ -299,32 +769,110 @@ class WaterSystemGraphVisualizer(QMainWindow):
                 break
 
         # Agregar el nuevo barrio a los datos originales
-        self.original_data.append(nuevo_barrio)
+        try:
+            self.network.agregar_barrio(nuevo_barrio)
+        except ValueError as e:
+            QMessageBox.warning(self, "Error", str(e))
+            return
 
-        # Guardar cambios y actualizar grafo
-        self.save_json(self.original_data)
-        self.update_graph()
-        
-        self.analizar_grafo_y_generar_recomendaciones()
+        # Log de la acción
+        self.log_action(f"Barrio agregado: {barrio_name}")
+        self.log_action(f"  - Tanques: {', '.join(tanque['name'] for tanque in tanques)}")
+        self.log_action(f"  - Casas: {', '.join(casa['name'] for casa in casas)}")
 
-        # Mensaje de confirmación
-        QMessageBox.information(
-            self, 
+        # Guardar cambios, actualizar grafo y confirmar
+        self.terminar_edicion(
             "Barrio Agregado", 
             f"Barrio {barrio_name} agregado exitosamente con {len(tanques)} tanques y {len(casas)} casas."
         )
 
-        # Log de la acción
-        self.log_action(f"Barrio agregado: {barrio_name}")
-        self.log_action(f"  - Tanques: {', '.join(tanque['name'] for tanque in tanques)}")
-        self.log_action(f"  - Casas: {', '.join(casa['name'] for casa in casas)}")
-        
+    def terminar_edicion(self, titulo, mensaje):
+        """Guardar, redibujar y analizar tras una edición, o dejarla pendiente en el lote."""
+        if self.network.en_lote():
+            self.log_action(f"Pendiente en el lote: {mensaje}")
+            return
+        self.save_json(self.original_data)
+        self.aplicar_cambios()
+        QMessageBox.information(self, titulo, mensaje)
+
+    def cambiar_modo_lote(self, activo):
+        """Abrir un lote al activar el modo; al desactivarlo se confirma lo pendiente"""
+        if activo:
+            self.network.iniciar_lote()
+            self.log_action("Modo lote activado: los cambios se aplicarán al confirmar el lote")
+        else:
+            self.confirmar_lote()
+            self.log_action("Modo lote desactivado")
+
+    def confirmar_lote(self):
+        """Guardar, actualizar la vista y analizar una sola vez para todo el lote"""
+        lote = self.network.confirmar_lote()
+        if lote:
+            self.log_action(f"Lote confirmado: {len(lote)} cambios")
+            self.terminar_edicion("Lote Confirmado", f"Se aplicaron {len(lote)} cambios.")
+        if self.batch_mode_checkbox.isChecked():
+            self.network.iniciar_lote()
+
+    def descartar_lote(self):
+        """Revertir todos los cambios del lote abierto"""
+        lote = self.network.descartar_lote()
+        if lote:
+            # Los cambios revertidos siguen marcados: la vista se actualiza con lo que tocaron
+            self.aplicar_cambios()
+            self.log_action(f"Lote descartado: {len(lote)} cambios revertidos")
+        if self.batch_mode_checkbox.isChecked():
+            self.network.iniciar_lote()
+
+    def cambiar_perfilado(self, activo):
+        perfilador.activo = activo
+        self.log_action("Perfilado de etapas " + ("activado" if activo else "desactivado"))
+
+    def _registrar_tramo(self, nombre, segundos, args):
+        self.log_action(f"Tiempo de {nombre}: {segundos * 1000:.1f} ms")
+        if 'cprofile' in args:
+            self.log_action(f"cProfile de {nombre} guardado en {args['cprofile']}\n{args['estadisticas']}")
+        elif 'cprofile_error' in args:
+            self.log_action(f"No se pudo guardar el cProfile de {nombre}: {args['cprofile_error']}")
+
+    def exportar_perfil(self):
+        """Guardar los tramos medidos como trace de Chrome (chrome://tracing o Perfetto)"""
+        if not perfilador.eventos:
+            QMessageBox.information(self, "Perfil Vacío", "Active 'Perfilar etapas' y realice alguna acción primero.")
+            return
+        file_path, _ = QFileDialog.getSaveFileName(self, "Exportar Perfil", "", "JSON Files (*.json)")
+        if not file_path:
+            return
+        try:
+            perfilador.exportar(file_path)
+        except OSError as e:
+            QMessageBox.critical(self, "Error", f"No se pudo exportar el perfil: {e}")
+            return
+        self.log_action(f"Perfil exportado ({len(perfilador.eventos)} tramos): {file_path}")
+
+    def capturar_cprofile(self):
+        """Perfilar con cProfile la próxima etapa medida"""
+        file_path, _ = QFileDialog.getSaveFileName(self, "Guardar cProfile", "", "cProfile (*.prof)")
+        if not file_path:
+            return
+        perfilador.capturar_proximo(file_path)
+        # La captura ocurre dentro de un tramo: el perfilado tiene que estar activo
+        self.profile_checkbox.setChecked(True)
+        self.log_action(f"La próxima etapa medida se perfilará con cProfile en {file_path}")
+
     def log_action(self, action):
         """Método genérico para registrar acciones en el historial"""
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        full_log_entry = f"[{timestamp}] {action}"
-        self.optimization_log.append(full_log_entry)
-        self.log_text.append(full_log_entry)
+        self.historial.registrar(action)
+        # La vista se actualiza una vez por lote de entradas, no por cada una
+        if not self.temporizador_historial.isActive():
+            self.temporizador_historial.start()
+
+    def mostrar_historial_pendiente(self):
+        """Agregar a la vista las entradas acumuladas desde la última actualización"""
+        pendientes = self.historial.tomar_pendientes()
+        if not pendientes:
+            return
+        # Más entradas que las que muestra la vista: agregar solo las últimas
+        self.log_text.appendPlainText("\n".join(pendientes[-MAX_LINEAS_HISTORIAL:]))
         self.log_text.verticalScrollBar().setValue(
             self.log_text.verticalScrollBar().maximum()
         )
@@ -333,7 +881,7 @@ class WaterSystemGraphVisualizer(QMainWindow):
         """Eliminar un barrio existente del grafo y del JSON."""
         try:
             # Obtener los nombres de los barrios actuales
-            barrio_names = [barrio['name'] for barrio in self.original_data]
+            barrio_names = self.network.barrio_names()
 
             if not barrio_names:
                 QMessageBox.warning(self, "No hay barrios", "No hay barrios disponibles para eliminar.")
@@ -346,12 +894,8 @@ class WaterSystemGraphVisualizer(QMainWindow):
             if not ok or not barrio_name:
                 return
 
-            # Buscar el barrio en self.original_data
-            barrio_a_eliminar = None
-            for barrio in self.original_data:
-                if barrio['name'] == barrio_name:
-                    barrio_a_eliminar = barrio
-                    break
+            # Buscar el barrio en el índice de la red
+            barrio_a_eliminar = self.network.barrio(barrio_name)
 
             if not barrio_a_eliminar:
                 QMessageBox.warning(self, "Barrio no encontrado", "No se encontró el barrio seleccionado.")
@@ -360,45 +904,16 @@ class WaterSystemGraphVisualizer(QMainWindow):
             tanques_en_barrio = [elem['name'] for elem in barrio_a_eliminar['elements'] if elem.get('type') == 'tank']
             casas_en_barrio = [elem['name'] for elem in barrio_a_eliminar['elements'] if elem.get('type') == 'house']
 
-            # Eliminar los nodos y aristas correspondientes al barrio en el grafo
-            for element in barrio_a_eliminar["elements"]:
-                # Eliminar las conexiones en las aristas del grafo
-                for connection in element["connections"]:
-                    target_node = connection['target']
-                    if target_node.startswith('+'):
-                        target_node = target_node[1:]  # Eliminar el prefijo '+'
-                    elif target_node.startswith('-'):
-                        target_node = target_node[1:]  # Eliminar el prefijo '-'
-                    
-                    if self.graph.has_edge(element['name'], target_node):
-                        self.graph.remove_edge(element['name'], target_node)
-                    elif self.graph.has_edge(target_node, element['name']):
-                        self.graph.remove_edge(target_node, element['name'])
-
-            # Eliminar los nodos del barrio del grafo
-            for element in barrio_a_eliminar["elements"]:
-                self.graph.remove_node(element['name'])
-
-            # Eliminar el barrio de la estructura de datos
-            self.original_data.remove(barrio_a_eliminar)
-
-            # Actualizar la visualización del grafo
-            self.visualize_graph()
+            # Eliminar el barrio, sus nodos y las conexiones que lo tocan
+            self.network.eliminar_barrio(barrio_name)
 
-            # Guardar los cambios en el archivo JSON actualizado
-            self.save_json(self.original_data) 
-            
-            # Pasar 'self.original_data' correctamente
-            
-                
-            self.analizar_grafo_y_generar_recomendaciones()
-            # Confirmación de eliminación
-            QMessageBox.information(self, "Barrio Eliminado", f"El barrio '{barrio_name}' ha sido eliminado exitosamente.")
-            
             self.log_action(f"Barrio eliminado: {barrio_name}")
             self.log_action(f"  - Tanques eliminados: {', '.join(tanques_en_barrio)}")
             self.log_action(f"  - Casas eliminadas: {', '.join(casas_en_barrio)}")
 
+            # Guardar, actualizar la visualización y confirmar la eliminación
+            self.terminar_edicion("Barrio Eliminado", f"El barrio '{barrio_name}' ha sido eliminado exitosamente.")
+
         except Exception as e:
             # En caso de error, mostrar mensaje y evitar que la aplicación se cierre
             QMessageBox.critical(self, "Error", f"Ocurrió un error al eliminar el barrio: {str(e)}")
@@ -411,100 +926,104 @@ class WaterSystemGraphVisualizer(QMainWindow):
         try:
             
             #file_path, _ = QFileDialog.getSaveFileName(self, "Guardar Archivo", "", "JSON Files (*.json)")
-            if self.file:
-                with open(self.file, 'w') as f:
-                    json.dump(data, f, indent=4)  # Usar 'data' que pasamos desde 'eliminar_barrio'
+            if self.solo_lectura:
+                # Guardar una vista parcial borraría del archivo los barrios no cargados
+                self.log_action("Vista parcial: los cambios no se guardan en el archivo")
+                return
+            if self.diario is not None:
+                # Cada edición ya quedó en el diario; el JSON se compacta en segundo plano
+                if self.diario.pendientes() >= MAX_PENDIENTES:
+                    self.compactar_diario()
+                QMessageBox.information(self, "Archivo Guardado", "El archivo JSON se ha guardado exitosamente.")
+            elif self.file:
+                with tramo('guardado', archivo=os.path.basename(self.file)):
+                    temporal = self.file + '.tmp'
+                    with open(temporal, 'w') as f:
+                        json.dump(data, f, indent=4)  # Usar 'data' que pasamos desde 'eliminar_barrio'
+                    os.replace(temporal, self.file)
                 QMessageBox.information(self, "Archivo Guardado", "El archivo JSON se ha guardado exitosamente.")
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Error al guardar el archivo JSON: {str(e)}")
+
+    def compactar_diario(self, sincronico=False, forzar=False):
+        """Volcar los cambios del diario al JSON (reemplazo atómico)"""
+        diario, network = self.diario, self.network
+        if diario is None or not (diario.pendientes() or forzar) or network.en_lote():
+            return
+        if sincronico:
+            try:
+                compactados = self._compactar(None, diario, network)
+                self.log_action(f"JSON compactado: {compactados} cambios del diario")
+            except OSError as e:
+                self.log_action(f"No se pudo compactar el diario: {str(e)}")
+            return
+        if any(tarea.nombre == "Compactar JSON" for tarea in self.tareas.tareas()):
+            return
+        self.tareas.lanzar(
+            "Compactar JSON", self._compactar, diario, network,
+            al_terminar=lambda compactados: self.log_action(f"JSON compactado: {compactados} cambios del diario"),
+            al_fallar=lambda mensaje: self.log_action(f"No se pudo compactar el diario: {mensaje}"),
+        )
             
-    def visualize_graph(self):
+    @staticmethod
+    def _compactar(tarea, diario, network):
+        with tramo('guardado', pendientes=diario.pendientes()):
+            return diario.compactar(network)
+
+    def visualize_graph(self, cambios=None):
         """Visualizar el grafo de tuberías"""
         if self.graph is None:
             return
 
-        # Limpiar figura anterior
-        self.figure.clear()
-        ax = self.figure.add_subplot(111)
-
-        # Obtener posiciones de los nodos
-        pos = assign_graph_positions(self.graph, self.original_data)
-
-        # Separar tipos de nodos
-        tanks = [n for n, d in self.graph.nodes(data=True) if d.get('type') == 'tank']
-        houses = [n for n, d in self.graph.nodes(data=True) if d.get('type') == 'house']
+        # Si solo cambiaron atributos, actualizar los textos en su lugar
+        if cambios is not None and self.renderizador.puede_actualizar(self.graph, cambios):
+            with tramo('render', en_su_lugar=True):
+                self.renderizador.actualizar(self.graph, cambios)
+            return
 
-        # Cargar imágenes para nodos
-        import matplotlib.image as mpimg
-        import os
+        # Obtener posiciones de los nodos (solo se recalculan los barrios modificados)
+        plan = preparar_layout(self.graph, self.original_data, self.cache_layout)
+        tareas_layout = plan[3]
+        if not tareas_layout:
+            self._dibujar_con_layout(plan, [], self.network.version)
+            return
 
-        # Ruta a los iconos (ajusta estas rutas según tu estructura de directorios)
-        tank_icon = mpimg.imread('icons\\tanque.png')  # Reemplaza con la ruta a tu ícono de tanque
-        house_icon = mpimg.imread('icons\\casa.png')  # Reemplaza con la ruta a tu ícono de casa
+        # El spring layout corre en segundo plano; un pedido nuevo reemplaza al anterior
+        self.tareas.cancelar_todas("Layout")
+        version = self.network.version
+        self.tareas.lanzar(
+            "Layout", self._layout_en_segundo_plano, tareas_layout,
+            al_terminar=lambda resultados: self._dibujar_con_layout(plan, resultados, version),
+            al_fallar=lambda mensaje: self.log_action(f"Error al calcular el layout: {mensaje}"),
+        )
 
-        # Dibujar nodos con imágenes
-        for node_type, nodes, icon in [('tank', tanks, tank_icon), ('house', houses, house_icon)]:
-            for node in nodes:
-                x, y = pos[node]
-                # Dibujar imagen del nodo
-                ax.imshow(icon, extent=(x-0.15, x+0.15, y-0.15, y+0.15), zorder=10)
-                
-                # Añadir etiqueta de texto SOBRE la imagen
-                ax.text(x, y+0.2, node, ha='center', va='bottom', fontsize=8, 
-                        bbox=dict(facecolor='white', edgecolor='gray', alpha=0.7))
-
-                # Si es un tanque, añadir información de capacidad
-                node_data = self.graph.nodes[node]
-                if node_type == 'tank':
-                    capacity_text = f"{node_data.get('current_capacity', 0)}/{node_data.get('max_capacity', 0)}L"
-                    ax.text(x, y-0.2, capacity_text, ha='center', va='top', fontsize=7,
-                            bbox=dict(facecolor='white', edgecolor='gray', alpha=0.7))
-
-        # Dibujar aristas con dirección correcta y estilos
-        for (u, v, data) in self.graph.edges(data=True):
-            direction = data.get('direction', 'both')
-
-            # Dibujar arista con estilo de flecha correcto
-            nx.draw_networkx_edges(
-                self.graph,
-                pos,
-                edgelist=[(u, v)],
-                edge_color='gray',
-                connectionstyle='arc3,rad=0.1',
-                arrows=True,
-                arrowsize=35,
-                ax=ax
-            )
+    @staticmethod
+    def _layout_en_segundo_plano(tarea, tareas_layout):
+        def progreso(hechos, total):
+            tarea.reportar_progreso(hechos, total)
+            return tarea.cancelada()
+        with tramo('layout', barrios=len(tareas_layout)):
+            return calcular_layouts(tareas_layout, callback=progreso)
+
+    def _dibujar_con_layout(self, plan, resultados, version):
+        """Completar las posiciones y dibujar, si la red no cambió mientras se calculaban"""
+        # Las posiciones calculadas quedan en la caché aunque la red haya cambiado
+        pos = completar_layout(plan, resultados, self.cache_layout)
+        if version != self.network.version:
+            # Hubo ediciones durante el cálculo: volver a planificar con la red actual
+            self.visualize_graph()
+            return
+        self._guardar_cache_layout()
 
-        # Etiquetas de las capacidades de las aristas
-        edge_labels = {
-            (u, v): f"{data.get('capacidad', 0)} L/s" for u, v, data in self.graph.edges(data=True)
-        }
-        nx.draw_networkx_edge_labels(self.graph, pos, edge_labels=edge_labels, font_size=10, font_color='blue', rotate = True, ax=ax)
+        # Dibujo completo: íconos en un único atlas, aristas y etiquetas agrupadas por estilo
+        with tramo('render', nodos=self.graph.number_of_nodes()):
+            self.renderizador.dibujar(self.graph, pos, self.original_data)
 
-        # Añadir nombres de barrios
-        for neighborhood in self.original_data:
-            # Encontrar las posiciones de los nodos en este barrio
-            barrio_nodes = [element['name'] for element in neighborhood['elements']]
-            barrio_pos = {node: coords for node, coords in pos.items() if node in barrio_nodes}
-            
-            if barrio_pos:
-                # Calcular el centro del barrio
-                x_coords = [coord[0] for coord in barrio_pos.values()]
-                y_coords = [coord[1] for coord in barrio_pos.values()]
-                center_x = (max(x_coords) + min(x_coords)) / 2
-                center_y = max(y_coords) + 0.5  # Posicionar sobre los nodos
-
-                # Añadir nombre del barrio
-                ax.text(center_x, center_y, neighborhood['name'], 
-                        ha='center', va='bottom', 
-                        fontsize=12, fontweight='bold', 
-                        bbox=dict(facecolor='white', edgecolor='gray', alpha=0.7))
-
-        ax.axis('off')
-
-        # Dibujar canvas
-        self.canvas.draw()
+    def _guardar_cache_layout(self):
+        try:
+            self.cache_layout.guardar_archivo()
+        except OSError as e:
+            self.log_action(f"No se pudo guardar la caché de layout: {str(e)}")
             
     def optimize_graph_connections(self):
         """Optimizar conexiones de grafo dirigido""" 
@@ -512,55 +1031,54 @@ class WaterSystemGraphVisualizer(QMainWindow):
             QMessageBox.warning(self, "Error", "Primero cargue un grafo") 
             return 
 
-        try: 
-            # Registrar inicio de optimización usando log_action 
-            self.log_action("Iniciando Optimización de Conexiones") 
-
-            # Crear una copia del grafo original para optimizar 
-            optimized_graph = self.graph.copy() 
+        # Registrar inicio de optimización usando log_action 
+        self.log_action("Iniciando Optimización de Conexiones") 
 
-            # Collect all edges with their capacities 
-            edges_with_capacity = [(u, v, data.get('capacidad', 0)) for (u, v, data) in optimized_graph.edges(data=True)] 
+        # La poda se calcula sobre una copia del grafo fuera del hilo de la interfaz
+        self.tareas.lanzar(
+            "Optimizar conexiones", self._podar_en_segundo_plano, self.graph.copy(),
+            al_terminar=lambda resultado, version=self.network.version: self._aplicar_optimizacion(resultado, version),
+            al_fallar=self._error_al_optimizar,
+        )
 
-            # Sort edges by capacity in ascending order 
-            edges_with_capacity.sort(key=lambda x: x[2]) 
+    @staticmethod
+    def _podar_en_segundo_plano(tarea, graph):
+        # Bosque de expansión de máxima capacidad (Kruskal + union-find) en una pasada
+        with tramo('optimizacion', aristas=graph.number_of_edges()):
+            return podar_conexiones(graph)
+
+    def _aplicar_optimizacion(self, resultado, version):
+        """Quitar de la red las conexiones podadas (en el hilo de la interfaz)"""
+        if version != self.network.version:
+            self.log_action("Optimización descartada: la red cambió mientras se calculaba")
+            QMessageBox.warning(self, "Optimización", "La red cambió durante el cálculo; vuelva a optimizar.")
+            return
 
-            # Keep track of connected components 
-            connected_components = list(nx.weakly_connected_components(optimized_graph)) 
+        try: 
+            removed_edges, puentes = resultado
 
-            # Remove unnecessary edges 
-            removed_edges = [] 
-            for u, v, capacity in edges_with_capacity: 
-                # Remove the edge temporarily 
-                optimized_graph.remove_edge(u, v) 
+            # Todas las podas forman una transacción (un solo registro en el diario)
+            with self.network.batch():
+                for u, v, capacity, motivo in removed_edges:
+                    self.log_action(f"Conexión eliminada: {u} <-> {v} (Capacidad: {capacity} L/s) - {motivo}")
 
-                # Check if graph remains connected after removing the edge 
-                new_components = list(nx.weakly_connected_components(optimized_graph)) 
+                    # Quitar la arista también de la red (datos y grafo vivo)
+                    self.network.eliminar_arista(u, v)
 
-                if len(new_components) > len(connected_components): 
-                    # If removing this edge breaks connectivity, add it back 
-                    optimized_graph.add_edge(u, v, capacidad=capacity) 
-                else: 
-                    # Edge is unnecessary, log the removal 
-                    removed_edges.append((u, v, capacity)) 
-                    self.log_action(f"Conexión eliminada: {u} <-> {v} (Capacidad: {capacity} L/s)") 
-                    connected_components = new_components 
+            self.log_action(f"Conexiones puente conservadas (imprescindibles para la conectividad): {len(puentes)}")
 
-                    # Actualizar self.original_data para eliminar la conexión
-                    self.remove_connection_from_data(u, v)
+            if self.network.en_lote():
+                self.log_action(f"Pendiente en el lote: optimización ({len(removed_edges)} conexiones eliminadas)")
+                return
 
             # Update the graph's edges 
-            self.graph = optimized_graph 
+            self.aplicar_cambios(redibujar=False) 
 
             # Visualize the optimized graph 
             self.visualize_graph() 
 
             # Log optimization results 
             self.log_action(f"Optimización completada. Se eliminaron {len(removed_edges)} conexiones innecesarias.") 
-            
-            
-                
-            self.analizar_grafo_y_generar_recomendaciones()
 
             # Show optimization results 
             results_message = ( 
@@ -573,55 +1091,81 @@ class WaterSystemGraphVisualizer(QMainWindow):
             self.save_json(self.original_data)
 
         except Exception as e: 
-            # Log any errors that occur 
-            self.log_action(f"Error en optimización de conexiones: {str(e)}") 
-            QMessageBox.critical(self, "Error", f"Ocurrió un error al optimizar: {str(e)}") 
+            self._error_al_optimizar(str(e))
+
+    def _error_al_optimizar(self, mensaje):
+        # Log any errors that occur 
+        self.log_action(f"Error en optimización de conexiones: {mensaje}") 
+        QMessageBox.critical(self, "Error", f"Ocurrió un error al optimizar: {mensaje}") 
 
     def remove_connection_from_data(self, source, target):
         """Eliminar la conexión de los elementos en self.original_data."""
-        for barrio in self.original_data:
-            for element in barrio['elements']:
-                # Eliminar conexión del elemento de origen
-                element['connections'] = [conn for conn in element['connections'] if not (conn['target'] == target or conn['target'] == f"+{target}" or conn['target'] == f"-{target}")]
-                # Eliminar conexión del elemento de destino
-                element['connections'] = [conn for conn in element['connections'] if not (conn['target'] == source or conn['target'] == f"+{source}" or conn['target'] == f"-{source}")]
-            
+        if self.network.tiene_conexion(source, target):
+            self.network.eliminar_conexion(source, target)
+
         
     def update_graph(self):
         """Rebuild the graph from self.original_data with correct edge handling"""
-        # Clear the existing graph
-        self.graph = nx.DiGraph()
-        
-        # Rebuild the graph from original data
-        for barrio in self.original_data:
-            for element in barrio["elements"]:
-                # Add node with attributes
-                self.graph.add_node(
-                    element["name"], 
-                    type=element.get("type", ""), 
-                    max_capacity=element.get("max_capacity", 0), 
-                    current_capacity=element.get("current_capacity", 0)
-                )
-                
-                # Process connections
-                for conn in element.get("connections", []):
-                    target = conn["target"]
-                    capacity = conn.get("capacity", 0)
-                    
-                    # Handle different connection types
-                    if target.startswith('+'):
-                        dest = target[1:]
-                        self.graph.add_edge(element["name"], dest, capacidad=capacity, direction='right')
-                    elif target.startswith('-'):
-                        dest = target[1:]
-                        self.graph.add_edge(dest, element["name"], capacidad=capacity, direction='left')
-                    else:
-                        # Bidirectional or default connection
-                        self.graph.add_edge(element["name"], target, capacidad=capacity, direction='both')
-                        self.graph.add_edge(target, element["name"], capacidad=capacity, direction='both')
-        
-        # Visualize the updated graph
-        self.visualize_graph()
+        # Solo necesario si original_data se editó por fuera de la red
+        with tramo('construccion', completa=True):
+            self.network.reconstruir_grafo()
+        # El diario no puede describir una edición externa: volcar todo al JSON
+        if self.diario is not None and not self.solo_lectura:
+            self.compactar_diario(sincronico=True, forzar=True)
+        self.aplicar_cambios()
+
+    def aplicar_cambios(self, redibujar=True):
+        """Aplicar en la vista los cambios acumulados por la red sin reconstruir el grafo"""
+        self.graph = self.network.graph
+        cambios = self.network.tomar_cambios()
+
+        # Los flujos guardados se reparan si solo cambiaron capacidades
+        if cambios.estructura:
+            self.flujos.invalidar()
+        elif len(self.flujos):
+            for u, v in cambios.aristas:
+                if not self.graph.has_edge(u, v):
+                    continue
+                capacidad = self.graph.edges[u, v].get('capacidad', 0)
+                for source, sink, anterior, nuevo, tiempo in self.flujos.actualizar_capacidad(u, v, capacidad):
+                    if nuevo != anterior:
+                        self.log_action(
+                            f"Flujo Máximo {source} -> {sink}: {anterior} -> {nuevo} L/s "
+                            f"(reparado en {tiempo * 1000:.1f} ms)"
+                        )
+
+        if cambios:
+            self.reconstruir_indice_cortes()
+            self.analizar_grafo_y_generar_recomendaciones(cambios)
+        if cambios and redibujar:
+            self.visualize_graph(cambios)
+        return cambios
+
+    def reconstruir_indice_cortes(self):
+        """Programar la reconstrucción del índice de cortes mínimos si está activado"""
+        if self.graph is None or not self.min_cut_index_checkbox.isChecked():
+            self.temporizador_indice_cortes.stop()
+            return
+        if not self.indice_cortes.listo(self.network.version):
+            self.temporizador_indice_cortes.start()  # Reinicia la espera si ya estaba programada
+
+    def _lanzar_indice_cortes(self, al_terminar=None):
+        """Reconstruir el índice en una tarea cancelable que reemplaza a la anterior"""
+        self.temporizador_indice_cortes.stop()
+        self.tareas.cancelar_todas("Índice de cortes")
+        version = self.network.version
+        # La vista simétrica se copia aquí: la tarea no lee el grafo mientras se edita
+        simetrico = self.indice_cortes.preparar(self.graph, version)
+        return self.tareas.lanzar(
+            "Índice de cortes", self._indice_en_segundo_plano, self.indice_cortes, simetrico, version,
+            al_terminar=al_terminar,
+            al_fallar=lambda mensaje: self.log_action(f"Error al construir el índice de cortes: {mensaje}"),
+        )
+
+    @staticmethod
+    def _indice_en_segundo_plano(tarea, indice, simetrico, version):
+        with tramo('indice_cortes', nodos=simetrico.number_of_nodes()):
+            return indice.construir_preparado(simetrico, version, cancelada=tarea.cancelada)
         
     def agregar_conexion(self):
         """Agregar una nueva conexión entre elementos del grafo.""" 
@@ -629,13 +1173,8 @@ class WaterSystemGraphVisualizer(QMainWindow):
             QMessageBox.warning(self, "Error", "Primero cargue un grafo") 
             return 
 
-        # Recopilar todos los elementos de todos los barrios 
-        all_elements = [] 
-        for barrio in self.original_data: 
-            all_elements.extend(barrio['elements']) 
-
         # Nombres de todos los elementos para selección 
-        element_names = [element['name'] for element in all_elements] 
+        element_names = self.network.element_names() 
 
         if len(element_names) < 2: 
             QMessageBox.warning(self, "Error", "Se necesitan al menos dos elementos para crear una conexión") 
@@ -688,56 +1227,25 @@ class WaterSystemGraphVisualizer(QMainWindow):
         if not ok4: 
             return 
 
-        # Buscar y actualizar los elementos originales 
-        for barrio in self.original_data: 
-            for element in barrio['elements']: 
-                # Actualizar elemento de origen 
-                if element['name'] == origen: 
-                    connection_target = (f"+{destino}" if direccion == "right" 
-                                        else f"-{destino}" if direccion == "left" 
-                                        else destino) 
-
-                    # Aquí se limita la capacidad a la capacidad máxima del tanque 
-                    if element['type'] == 'tank': 
-                        capacidad_conexion = min(element['max_capacity'], capacidad)  # Limitar a la capacidad máxima del tanque 
-                    else: 
-                        capacidad_conexion = capacidad  # Para casas, usar la capacidad proporcionada 
+        # Aquí se limita la capacidad a la capacidad máxima del tanque 
+        element = self.network.elemento(origen) 
+        if element['type'] == 'tank': 
+            capacidad_conexion = min(element['max_capacity'], capacidad)  # Limitar a la capacidad máxima del tanque 
+        else: 
+            capacidad_conexion = capacidad  # Para casas, usar la capacidad proporcionada 
 
-                    element['connections'].append({ 
-                        "target": connection_target, 
-                        "capacity": capacidad_conexion  # Usar capacidad limitada 
-                    }) 
-
-                # Actualizar elemento de destino para conexión bidireccional o inversa 
-                if element['name'] == destino: 
-                    if direccion == "right": 
-                        element['connections'].append({ 
-                            "target": f"-{origen}", 
-                            "capacity": capacidad_conexion 
-                        }) 
-                    elif direccion == "left": 
-                        element['connections'].append({ 
-                            "target": f"+{origen}", 
-                            "capacity": capacidad_conexion 
-                        }) 
-                    else:  # bidirectional 
-                        element['connections'].append({ 
-                            "target": origen, 
-                            "capacity": capacidad_conexion 
-                        }) 
-
-        # Guardar cambios y actualizar grafo 
-        self.save_json(self.original_data) 
-        self.update_graph() 
+        # Escribir las dos entradas espejadas de la conexión 
+        try: 
+            self.network.agregar_conexion(origen, destino, capacidad_conexion, direccion) 
+        except ValueError as e: 
+            QMessageBox.warning(self, "Error", str(e)) 
+            return 
 
         # Registrar la acción en el historial 
         self.log_action(f"Conexión agregada: {origen} <-> {destino} (Capacidad: {capacidad_conexion} L/s, Dirección: {direccion})") 
 
-        self.analizar_grafo_y_generar_recomendaciones()
-
-        # Mensaje de confirmación 
-        QMessageBox.information( 
-            self, 
+        # Guardar cambios, actualizar grafo y confirmar 
+        self.terminar_edicion( 
             "Conexión Agregada", 
             f"Conexión entre {origen} y {destino} agregada exitosamente." 
         ) 
@@ -788,10 +1296,10 @@ class WaterSystemGraphVisualizer(QMainWindow):
                 "name": barrio_name,
                 "elements": []
             }
-            self.original_data.append(nuevo_barrio)
+            self.network.agregar_barrio(nuevo_barrio)
 
         # Preguntar en qué barrio agregar el tanque
-        barrio_names = [barrio['name'] for barrio in self.original_data]
+        barrio_names = self.network.barrio_names()
         barrio_name, ok7 = QInputDialog.getItem(
             self, 
             "Seleccionar Barrio", 
@@ -803,31 +1311,25 @@ class WaterSystemGraphVisualizer(QMainWindow):
         if not ok7:
             return
 
-        # Encontrar el barrio seleccionado y agregar el tanque
-        for barrio in self.original_data:
-            if barrio['name'] == barrio_name:
-                nuevo_tanque = {
-                    "name": tanque_name,
-                    "type": "tank",
-                    "max_capacity": max_capacity,
-                    "current_capacity": current_capacity,
-                    "connections": []
-                }
-                barrio['elements'].append(nuevo_tanque)
-                break
-
-        # Guardar cambios
-        self.save_json(self.original_data)
-        self.update_graph()
+        # Agregar el tanque al barrio seleccionado
+        nuevo_tanque = {
+            "name": tanque_name,
+            "type": "tank",
+            "max_capacity": max_capacity,
+            "current_capacity": current_capacity,
+            "connections": []
+        }
+        try:
+            self.network.agregar_elemento(barrio_name, nuevo_tanque)
+        except ValueError as e:
+            QMessageBox.warning(self, "Error", str(e))
+            return
 
         # Log de la acción
         self.log_action(f"Tanque agregado: {tanque_name} en {barrio_name}")
-        
-        self.analizar_grafo_y_generar_recomendaciones()
-        
-        # Mensaje de confirmación
-        QMessageBox.information(
-            self, 
+
+        # Guardar cambios y confirmar
+        self.terminar_edicion(
             "Tanque Agregado", 
             f"Tanque {tanque_name} agregado exitosamente a {barrio_name}."
         )
@@ -845,7 +1347,7 @@ class WaterSystemGraphVisualizer(QMainWindow):
             return
 
         # Preguntar en qué barrio agregar la casa
-        barrio_names = [barrio['name'] for barrio in self.original_data]
+        barrio_names = self.network.barrio_names()
         barrio_name, ok2 = QInputDialog.getItem(
             self, 
             "Seleccionar Barrio", 
@@ -857,34 +1359,77 @@ class WaterSystemGraphVisualizer(QMainWindow):
         if not ok2:
             return
 
-        # Encontrar el barrio seleccionado y agregar la casa
-        for barrio in self.original_data:
-            if barrio['name'] == barrio_name:
-                nueva_casa = {
-                    "name": casa_name,
-                    "type": "house",
-                    "connections": []
-                }
-                barrio['elements'].append(nueva_casa)
-                break
-
-        # Guardar cambios
-        self.save_json(self.original_data)
-        self.update_graph()
+        # Agregar la casa al barrio seleccionado
+        nueva_casa = {
+            "name": casa_name,
+            "type": "house",
+            "connections": []
+        }
+        try:
+            self.network.agregar_elemento(barrio_name, nueva_casa)
+        except ValueError as e:
+            QMessageBox.warning(self, "Error", str(e))
+            return
 
         # Log de la acción
         self.log_action(f"Casa agregada: {casa_name} en {barrio_name}")
-        
-        
-                
-        self.analizar_grafo_y_generar_recomendaciones()
-        # Mensaje de confirmación
-        QMessageBox.information(
-            self, 
+
+        # Guardar cambios y confirmar
+        self.terminar_edicion(
             "Casa Agregada", 
             f"Casa {casa_name} agregada exitosamente a {barrio_name}."
         )
         
+    def importar_archivo(self):
+        """Agregar barrios, tanques, casas y conexiones desde un CSV o JSON-lines"""
+        file_path, _ = QFileDialog.getOpenFileName(
+            self, "Importar Elementos y Conexiones", "",
+            "CSV / JSON-lines (*.csv *.jsonl *.ndjson);;Todos los archivos (*)"
+        )
+        if not file_path:
+            return
+        version = self.network.version
+        self.tareas.lanzar(
+            f"Importar {os.path.basename(file_path)}", self._validar_en_segundo_plano,
+            self.network, file_path,
+            al_terminar=lambda plan: self._aplicar_importacion(plan, file_path, version),
+            al_fallar=self._error_al_importar,
+        )
+
+    @staticmethod
+    def _validar_en_segundo_plano(tarea, network, file_path):
+        filas = list(leer_filas(file_path))
+        with network.lock:
+            return validar_importacion(network, filas)
+
+    def _aplicar_importacion(self, plan, file_path, version):
+        """Aplicar el archivo validado como una sola transacción"""
+        if plan.errores:
+            detalle = "\n".join(f"Línea {linea}: {mensaje}" for linea, mensaje in plan.errores[:20])
+            if len(plan.errores) > 20:
+                detalle += f"\n... y {len(plan.errores) - 20} errores más"
+            self.log_action(f"Importación rechazada ({os.path.basename(file_path)}): {len(plan.errores)} errores")
+            QMessageBox.warning(self, "Importación Rechazada", f"No se importó nada:\n{detalle}")
+            return
+        if version != self.network.version:
+            # La red cambió mientras se validaba: validar de nuevo contra la red actual
+            plan = validar_importacion(self.network, leer_filas(file_path))
+            if plan.errores:
+                self._aplicar_importacion(plan, file_path, self.network.version)
+                return
+        try:
+            aplicar_importacion(self.network, plan)
+        except (KeyError, ValueError) as e:
+            self._error_al_importar(str(e))
+            return
+
+        self.log_action(f"Importado {os.path.basename(file_path)}: {plan.resumen()}")
+        self.terminar_edicion("Importación Completada", f"Se importaron {plan.resumen()}.")
+
+    def _error_al_importar(self, mensaje):
+        self.log_action(f"Error al importar: {mensaje}")
+        QMessageBox.critical(self, "Error", f"No se pudo importar el archivo: {mensaje}")
+
     def bfs_find_augmenting_path(self,G, source, sink):
         """Buscar un camino aumentante usando BFS y retornar el flujo posible."""
         visited = {node: False for node in G.nodes()}
@@ -935,43 +1480,185 @@ class WaterSystemGraphVisualizer(QMainWindow):
             if not ok2:
                 return
 
-            # Calcular flujo máximo usando networkx
-            max_flow_value, max_flow_dict = nx.maximum_flow(self.graph, source, sink, capacity='capacidad')
+            # Reutilizar el flujo guardado (no vale con un lote sin aplicar a la vista)
+            resultado = None if self.network.en_lote() else self.flujos.buscar(source, sink)
+            if resultado is not None:
+                self._mostrar_flujo_maximo(resultado)
+                return
+
+            version = self.network.version
+            self.tareas.lanzar(
+                f"Flujo máximo {source} -> {sink}", self._flujo_en_segundo_plano,
+                self.graph.copy(), source, sink, self.flow_backend_combo.currentText(),
+                al_terminar=lambda flujo: self._flujo_calculado(flujo, version),
+                al_fallar=self._error_flujo_maximo,
+            )
+
+        except Exception as e:
+            self._error_flujo_maximo(str(e))
+
+    @staticmethod
+    def _flujo_en_segundo_plano(tarea, graph, source, sink, backend):
+        # Calcular flujo máximo con el algoritmo seleccionado
+        with tramo('flujo', source=source, sink=sink):
+            return FlujoIncremental(graph, source, sink, backend)
+
+    def _flujo_calculado(self, flujo, version):
+        # Solo se guarda para repararlo si corresponde a la red actual
+        if version == self.network.version:
+            self.flujos.agregar(flujo)
+        self._mostrar_flujo_maximo(flujo.resultado())
+
+    def _mostrar_flujo_maximo(self, resultado):
+        source, sink = resultado['source'], resultado['sink']
+        try:
+            max_flow_value = resultado['valor']
 
             # Preparar mensaje de resultados
             results_message = (
                 f"Flujo Máximo Calculado:\n"
                 f"Desde {source} hasta {sink}\n"
-                f"Valor de Flujo Máximo: {max_flow_value} L/s"
+                f"Valor de Flujo Máximo: {max_flow_value} L/s\n"
+                f"Algoritmo: {resultado['backend']} ({resultado['tiempo'] * 1000:.1f} ms)"
             )
 
             # Mostrar detalles del flujo máximo
             QMessageBox.information(self, "Resultado de Flujo Máximo", results_message)
-        
-                
-            self.analizar_grafo_y_generar_recomendaciones()
             # Log de la acción
-            self.log_action(f"Flujo Máximo calculado: {max_flow_value} L/s desde {source} a {sink}")
+            self.log_action(
+                f"Flujo Máximo calculado: {max_flow_value} L/s desde {source} a {sink} "
+                f"({resultado['backend']}, {resultado['tiempo'] * 1000:.1f} ms)"
+            )
+
+        except Exception as e:
+            self._error_flujo_maximo(str(e))
+
+    def _error_flujo_maximo(self, mensaje):
+        # Manejo de errores detallado
+        error_message = f"Error al calcular flujo máximo: {mensaje}"
+        QMessageBox.critical(self, "Error", error_message)
+        self.log_action(error_message)
+            
+    def calcular_matriz_flujo_maximo(self):
+        """Calcular el flujo máximo de todos los tanques a todas las casas y exportarlo"""
+        if self.graph is None:
+            QMessageBox.warning(self, "Error", "Primero cargue un grafo")
+            return
+
+        tanks, houses = tanques_y_casas(self.graph)
+        if not tanks or not houses:
+            QMessageBox.warning(self, "Error", "Se necesitan tanques y casas para calcular el flujo máximo")
+            return
+
+        file_path, filtro = QFileDialog.getSaveFileName(
+            self, "Exportar Matriz de Flujo", "", "CSV Files (*.csv);;NumPy Files (*.npy)"
+        )
+        if not file_path:
+            return
+
+        self.log_action(f"Calculando matriz de flujo máximo: {len(tanks)} tanques x {len(houses)} casas")
+        # El avance se ve en la cola de tareas; al cancelar se exporta la matriz parcial
+        tarea = self.tareas.lanzar(
+            "Matriz de flujo máximo", self._matriz_en_segundo_plano,
+            self.graph.copy(), tanks, houses, self.flow_backend_combo.currentText(),
+            al_terminar=lambda resultado: self._exportar_matriz(resultado, file_path, filtro, tarea.cancelada()),
+            al_fallar=self._error_matriz,
+            conservar_parcial=True,
+        )
+
+    @staticmethod
+    def _matriz_en_segundo_plano(tarea, graph, tanks, houses, backend):
+        def progreso(completados, total):
+            # Informar cada cierto número de resultados para no saturar la interfaz
+            if completados % 64 == 0 or completados == total:
+                tarea.reportar_progreso(completados, total)
+            return tarea.cancelada()
+        with tramo('flujo', pares=len(tanks) * len(houses)):
+            return calcular_matriz_flujo(graph, tanks, houses, callback=progreso, backend=backend)
+
+    def _exportar_matriz(self, resultado, file_path, filtro, cancelado):
+        tanks, houses, matriz = resultado
+        try:
+            if file_path.endswith('.npy') or filtro.startswith('NumPy'):
+                exportar_matriz_npy(file_path, matriz)
+            else:
+                exportar_matriz_csv(file_path, tanks, houses, matriz)
+
+            estado = "parcial (cancelada)" if cancelado else "completa"
+            self.log_action(f"Matriz de flujo máximo {estado} exportada a: {os.path.basename(file_path)}")
+            QMessageBox.information(
+                self,
+                "Matriz de Flujo Máximo",
+                f"Matriz {estado} de {len(tanks)} x {len(houses)} exportada a {file_path}"
+            )
+        except Exception as e:
+            self._error_matriz(str(e))
 
+    def _error_matriz(self, mensaje):
+        error_message = f"Error al calcular la matriz de flujo máximo: {mensaje}"
+        QMessageBox.critical(self, "Error", error_message)
+        self.log_action(error_message)
+
+    def consultar_corte_minimo(self):
+        """Consultar el corte mínimo entre dos elementos usando el árbol de Gomory-Hu"""
+        if self.graph is None:
+            QMessageBox.warning(self, "Error", "Primero cargue un grafo")
+            return
+
+        element_names = list(self.graph.nodes())
+        if len(element_names) < 2:
+            QMessageBox.warning(self, "Error", "Se necesitan al menos dos elementos para consultar un corte")
+            return
+
+        origen, ok1 = QInputDialog.getItem(self, "Seleccionar Origen", "Selecciona el primer elemento:", element_names, 0, False)
+        if not ok1:
+            return
+        destino_options = [name for name in element_names if name != origen]
+        destino, ok2 = QInputDialog.getItem(self, "Seleccionar Destino", "Selecciona el segundo elemento:", destino_options, 0, False)
+        if not ok2:
+            return
+
+        if self.indice_cortes.listo(self.network.version):
+            self._mostrar_corte_minimo(origen, destino)
+            return
+        # Sin índice al día (desactivado o aún en construcción): construirlo en segundo plano
+        self.log_action("Construyendo índice de cortes mínimos (Gomory-Hu)...")
+        self._lanzar_indice_cortes(al_terminar=lambda _: self._corte_minimo_construido(origen, destino))
+
+    def _corte_minimo_construido(self, origen, destino):
+        if not self.indice_cortes.listo(self.network.version):
+            self.log_action(f"La red cambió mientras se construía el índice: vuelva a consultar "
+                            f"el corte entre {origen} y {destino}")
+            return
+        self._mostrar_corte_minimo(origen, destino)
+
+    def _mostrar_corte_minimo(self, origen, destino):
+        try:
+            valor, aristas_corte = self.indice_cortes.consultar(origen, destino)
+            detalle = "\n".join(f"  {u} <-> {v} ({capacidad} L/s)" for u, v, capacidad in aristas_corte[:20])
+            if len(aristas_corte) > 20:
+                detalle += f"\n  ... y {len(aristas_corte) - 20} más"
+
+            QMessageBox.information(
+                self,
+                "Corte Mínimo",
+                f"Corte mínimo entre {origen} y {destino}: {valor} L/s\n"
+                f"Tuberías del corte ({len(aristas_corte)}):\n{detalle}"
+            )
+            self.log_action(f"Corte mínimo entre {origen} y {destino}: {valor} L/s ({len(aristas_corte)} tuberías)")
         except Exception as e:
-            # Manejo de errores detallado
-            error_message = f"Error al calcular flujo máximo: {str(e)}"
+            error_message = f"Error al consultar el corte mínimo: {str(e)}"
             QMessageBox.critical(self, "Error", error_message)
             self.log_action(error_message)
-            
+
     def change_connection_direction(self):
         """Cambiar la dirección de una conexión existente en el grafo."""
         if not self.original_data:
             QMessageBox.warning(self, "Error", "Primero cargue un grafo")
             return
 
-        # Recopilar todos los elementos de todos los barrios
-        all_elements = []
-        for barrio in self.original_data:
-            all_elements.extend(barrio['elements'])
-
         # Nombres de todos los elementos para selección
-        element_names = [element['name'] for element in all_elements]
+        element_names = self.network.element_names()
 
         if len(element_names) < 2:
             QMessageBox.warning(self, "Error", "Se necesitan al menos dos elementos para cambiar la dirección de una conexión")
@@ -1014,69 +1701,17 @@ class WaterSystemGraphVisualizer(QMainWindow):
         if not ok3:
             return
 
-        # Actualizar la dirección en los elementos originales
-        for barrio in self.original_data:
-            for element in barrio['elements']:
-                # Actualizar elemento de origen
-                if element['name'] == origen:
-                    # Buscar la conexión existente
-                    for conn in element['connections']:
-                        if conn['target'] == destino or conn['target'] == f"+{destino}" or conn['target'] == f"-{destino}":
-                            # Mantener la capacidad de la conexión existente
-                            existing_capacity = conn['capacity']
-                            # Eliminar la conexión existente
-                            element['connections'].remove(conn)
-                            break  # Salir del bucle una vez que se encuentra y elimina la conexión
-
-                    # Agregar nueva conexión
-                    connection_target = (f"+{destino}" if nueva_direccion == "right"
-                                        else f"-{destino}" if nueva_direccion == "left"
-                                        else destino)
-                    element['connections'].append({
-                        "target": connection_target,
-                        "capacity": existing_capacity
-                    })
-
-                # Actualizar elemento de destino para conexión bidireccional o inversa
-                if element['name'] == destino:
-                    # Buscar la conexión existente
-                    for conn in element['connections']:
-                        if conn['target'] == origen or conn['target'] == f"+{origen}" or conn['target'] == f"-{origen}":
-                            # Mantener la capacidad de la conexión existente
-                            existing_capacity = conn['capacity']
-                            # Eliminar la conexión existente
-                            element['connections'].remove(conn)
-                            break  # Salir del bucle una vez que se encuentra y elimina la conexión
-
-                    if nueva_direccion == "right":
-                        element['connections'].append({
-                            "target": f"-{origen}",
-                            "capacity": existing_capacity  # Mantener la capacidad
-                        })
-                    elif nueva_direccion == "left":
-                        element['connections'].append({
-                            "target": f"+{origen}",
-                            "capacity": existing_capacity  # Mantener la capacidad
-                        })
-                    else:  # bidirectional
-                        element['connections'].append({
-                            "target": origen,
-                            "capacity": existing_capacity  # Mantener la capacidad
-                        })
-
-        # Guardar cambios en el JSON
-        self.save_json(self.original_data)
-        self.update_graph()
+        # Actualizar la dirección en los elementos originales (mantiene la capacidad)
+        if not self.network.tiene_conexion(origen, destino):
+            QMessageBox.warning(self, "Error", f"No existe una conexión entre {origen} y {destino}")
+            return
+        self.network.cambiar_direccion(origen, destino, nueva_direccion)
 
         # Log de la acción
         self.log_action(f"Dirección de la conexión entre {origen} y {destino} cambiada a '{nueva_direccion}'.")
 
-
-                
-        self.analizar_grafo_y_generar_recomendaciones()
-        # Mensaje de confirmación
-        QMessageBox.information(
-            self,
+        # Guardar cambios en el JSON y confirmar
+        self.terminar_edicion(
             "Dirección Cambiada",
             f"Dirección de la conexión entre {origen} y {destino} cambiada exitosamente."
         )
@@ -1088,13 +1723,8 @@ class WaterSystemGraphVisualizer(QMainWindow):
             QMessageBox.warning(self, "Error", "Primero cargue un grafo")
             return
 
-        # Recopilar todos los elementos de todos los barrios
-        all_elements = []
-        for barrio in self.original_data:
-            all_elements.extend(barrio['elements'])
-
         # Nombres de todos los elementos para selección
-        element_names = [element['name'] for element in all_elements]
+        element_names = self.network.element_names()
 
         if len(element_names) < 2:
             QMessageBox.warning(self, "Error", "Se necesitan al menos dos elementos para cambiar la capacidad de una conexión")
@@ -1135,91 +1765,73 @@ class WaterSystemGraphVisualizer(QMainWindow):
         if not ok3:
             return
 
-        # Actualizar la capacidad en los elementos originales
-        for barrio in self.original_data:
-            for element in barrio['elements']:
-                # Actualizar elemento de origen
-                if element['name'] == origen:
-                    for conn in element['connections']:
-                        if conn['target'] == destino or conn['target'] == f"+{destino}" or conn['target'] == f"-{destino}":
-                            conn['capacity'] = nueva_capacidad  # Cambiar la capacidad
-                            break  # Salir del bucle una vez que se encuentra y actualiza la conexión
-
-                # Actualizar elemento de destino para conexión bidireccional o inversa
-                if element['name'] == destino:
-                    for conn in element['connections']:
-                        if conn['target'] == origen or conn['target'] == f"+{origen}" or conn['target'] == f"-{origen}":
-                            conn['capacity'] = nueva_capacidad  # Cambiar la capacidad
-                            break  # Salir del bucle una vez que se encuentra y actualiza la conexión
-
-        # Guardar cambios en el JSON
-        self.save_json(self.original_data)
-        self.update_graph()
+        # Actualizar la capacidad en las dos entradas de la conexión
+        if not self.network.tiene_conexion(origen, destino):
+            QMessageBox.warning(self, "Error", f"No existe una conexión entre {origen} y {destino}")
+            return
+        self.network.cambiar_capacidad(origen, destino, nueva_capacidad)
 
         # Log de la acción
         self.log_action(f"Capacidad de la conexión entre {origen} y {destino} cambiada a {nueva_capacidad} L/s.")
 
-
-                
-        self.analizar_grafo_y_generar_recomendaciones()
-        # Mensaje de confirmación
-        QMessageBox.information(
-            self,
+        # Guardar cambios en el JSON y confirmar
+        self.terminar_edicion(
             "Capacidad Cambiada",
             f"Capacidad de la conexión entre {origen} y {destino} cambiada exitosamente a {nueva_capacidad} L/s."
         )
         
-    def analizar_grafo_y_generar_recomendaciones(self):
-        """Analizar el grafo y generar recomendaciones automáticamente."""
-        if not self.graph:
+    def analizar_grafo_y_generar_recomendaciones(self, cambios=None):
+        """
+        Actualizar las recomendaciones con los cambios de la red.
+
+        Solo se reevalúan los nodos y aristas de ``cambios``; sin cambios
+        (p. ej. al cargar) se revisa el grafo completo.
+        """
+        if self.graph is None:
             return
 
-        recomendaciones = []
-
-        # Verificar conexiones de baja capacidad
-        for (u, v, data) in self.graph.edges(data=True):
-            capacidad_actual = data.get('capacidad', 0)
-            UMBRAL_BAJO = 20  # L/s
-
-            if capacidad_actual < UMBRAL_BAJO:
-                recomendaciones.append(f"Conexión de baja capacidad detectada: {u} -> {v} (Capacidad: {capacidad_actual} L/s)")
-
-        # Verificar tanques y casas sin conexiones
-        for node in self.graph.nodes(data=True):
-            if node[1]['type'] == 'tank':
-                if not self.graph.out_degree(node[0]):
-                    recomendaciones.append(f"Tanque {node[0]} sin conexiones. Considera conectarlo a una casa.")
-            elif node[1]['type'] == 'house':
-                if not self.graph.in_degree(node[0]):
-                    recomendaciones.append(f"Casa {node[0]} sin conexiones. Considera conectarla a un tanque.")
-
-        # Mostrar recomendaciones si hay alguna
-        if recomendaciones:
-            self.mostrar_recomendaciones(recomendaciones)
-
-    def mostrar_recomendaciones(self, recomendaciones):
-        """Mostrar las recomendaciones en un cuadro de diálogo."""
-        dialogo_recomendaciones = QDialog(self)
-        dialogo_recomendaciones.setWindowTitle("Recomendaciones de Optimización")
-        layout = QVBoxLayout()
+        with tramo('analisis', cambios=None if cambios is None else len(cambios.nodos) + len(cambios.aristas)):
+            agregadas, actualizadas, quitadas = self.motor_recomendaciones.actualizar(self.graph, cambios)
+
+        if agregadas or actualizadas or quitadas:
+            self.mostrar_recomendaciones(agregadas, actualizadas, quitadas)
 
-        for recomendacion in recomendaciones:
-            label = QLabel(recomendacion)
-            layout.addWidget(label)
+    def mostrar_recomendaciones(self, agregadas, actualizadas, quitadas):
+        """Reflejar en la lista las recomendaciones nuevas, modificadas y resueltas."""
+        self.modelo_recomendaciones.aplicar(agregadas, actualizadas, quitadas)
+        total = len(self.motor_recomendaciones)
+        self.recommendations_label.setText(f"Recomendaciones ({total}):")
+        self.log_action(
+            f"Recomendaciones: {len(agregadas)} nuevas, {len(quitadas)} resueltas, "
+            f"{len(actualizadas)} modificadas ({total} en total)"
+        )
 
-        # Botón para ignorar
-        btn_ignorar = QPushButton("Ignorar")
-        btn_ignorar.clicked.connect(dialogo_recomendaciones.close)
-        layout.addWidget(btn_ignorar)
 
-        dialogo_recomendaciones.setLayout(layout)
-        dialogo_recomendaciones.exec_()
+def informar_arranque(main_window, visible, lista):
+    """Tiempos de arranque e importación por módulo (``--profile-startup``) en stderr y el historial."""
+    medidor_importaciones.desinstalar()
+    inicio = medidor_importaciones.inicio
+    resumen = (f"Arranque: ventana visible en {(visible - inicio) * 1000:.0f} ms, "
+               f"lista en {(lista - inicio) * 1000:.0f} ms")
+    print(resumen, file=sys.stderr)
+    print(medidor_importaciones.informe(), file=sys.stderr)
+    main_window.log_action(resumen)
 
 
 def main():
+    # main.py instala el medidor antes de importar este módulo; si no, se miden las importaciones diferidas
+    perfilar = '--profile-startup' in sys.argv
+    if perfilar:
+        medidor_importaciones.instalar()
     app = QApplication(sys.argv)
     main_window = WaterSystemGraphVisualizer()
     main_window.show()
+    if perfilar:
+        tiempos = {}
+        QTimer.singleShot(0, lambda: tiempos.setdefault('visible', time.perf_counter()))
+        main_window.iniciada.connect(
+            lambda: informar_arranque(main_window, tiempos.get('visible', time.perf_counter()), time.perf_counter())
+        )
     sys.exit(app.exec_())
 
 if __name__ == "__main__":
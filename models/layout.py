@@ -0,0 +1,148 @@
+"""Layout de barrios: caché persistida junto al JSON y cálculo en paralelo."""
+import hashlib
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import networkx as nx
+
+VERSION_CACHE = 1
+MIN_NODOS_PARALELO = 2000  # por debajo, arrancar procesos cuesta más que distribuir
+
+
+def ruta_cache_layout(file_path):
+    """Archivo de caché de layout que acompaña a un JSON de red."""
+    return os.path.splitext(file_path)[0] + '.layout.json'
+
+
+def hash_barrio(graph, nodes):
+    """
+    Hash del contenido de un barrio: sus nodos y las aristas entre ellos.
+
+    Las capacidades no intervienen porque no afectan al layout.
+    """
+    subgraph = graph.subgraph(nodes)
+    contenido = json.dumps([sorted(nodes), sorted(subgraph.edges())], ensure_ascii=False)
+    return hashlib.sha1(contenido.encode('utf-8')).hexdigest()
+
+
+class CacheLayout:
+    """
+    Posiciones locales (sin desplazamiento horizontal) de cada barrio.
+
+    Cada entrada guarda el hash del barrio con el que se calculó; si el hash
+    no coincide el barrio se vuelve a distribuir partiendo de sus posiciones
+    anteriores.
+    """
+
+    def __init__(self, ruta=None):
+        self.ruta = ruta
+        self._barrios = {}
+        self._modificado = False
+        if ruta and os.path.exists(ruta):
+            self.cargar()
+
+    def __len__(self):
+        return len(self._barrios)
+
+    def obtener(self, barrio, hash_actual):
+        """Posiciones del barrio si su contenido no cambió; si no, None."""
+        entrada = self._barrios.get(barrio)
+        if entrada is None or entrada['hash'] != hash_actual:
+            return None
+        return entrada['pos']
+
+    def previas(self, barrio):
+        """Últimas posiciones conocidas del barrio (aunque su contenido haya cambiado)."""
+        entrada = self._barrios.get(barrio)
+        return dict(entrada['pos']) if entrada is not None else None
+
+    def guardar(self, barrio, hash_actual, pos):
+        self._barrios[barrio] = {
+            'hash': hash_actual,
+            'pos': {node: (float(x), float(y)) for node, (x, y) in pos.items()},
+        }
+        self._modificado = True
+
+    def descartar_otros(self, barrios):
+        """Olvidar los barrios que ya no existen."""
+        for barrio in set(self._barrios) - set(barrios):
+            del self._barrios[barrio]
+            self._modificado = True
+
+    def cargar(self):
+        """Leer la caché del archivo; si está dañada o es de otra versión se ignora."""
+        try:
+            with open(self.ruta, 'r', encoding='utf-8') as f:
+                contenido = json.load(f)
+        except (OSError, ValueError):
+            return
+        if contenido.get('version') != VERSION_CACHE:
+            return
+        self._barrios = {
+            barrio: {'hash': entrada['hash'], 'pos': {n: tuple(p) for n, p in entrada['pos'].items()}}
+            for barrio, entrada in contenido.get('barrios', {}).items()
+        }
+        self._modificado = False
+
+    def guardar_archivo(self):
+        """Escribir la caché (solo si cambió) con reemplazo atómico."""
+        if not self.ruta or not self._modificado:
+            return
+        temporal = self.ruta + '.tmp'
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump({'version': VERSION_CACHE, 'barrios': self._barrios}, f, ensure_ascii=False)
+        os.replace(temporal, self.ruta)
+        self._modificado = False
+
+
+def layout_barrio(tarea):
+    """
+    ``spring_layout`` de un barrio a partir de datos simples (apto para otro proceso).
+
+    ``tarea`` es ``(nodos, aristas, previas, k, iterations, seed)``; el grafo se
+    arma con los nodos en el orden del JSON para que el resultado no dependa
+    de dónde se calcula.
+    """
+    nodos, aristas, previas, k, iterations, seed = tarea
+    subgraph = nx.DiGraph()
+    subgraph.add_nodes_from(nodos)
+    subgraph.add_edges_from(aristas)
+    neighborhood_pos = nx.spring_layout(subgraph, k=k, pos=previas, iterations=iterations, seed=seed)
+    return {node: (float(x), float(y)) for node, (x, y) in neighborhood_pos.items()}
+
+
+def calcular_layouts(tareas, workers=None, callback=None):
+    """
+    Calcular el layout de varios barrios independientes, en el orden recibido.
+
+    Si hay suficientes nodos se reparten en un pool de procesos.
+    ``callback(completados, total)`` se llama tras cada barrio; si devuelve
+    True el cálculo se cancela y se retornan solo los barrios terminados.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    total_nodos = sum(len(tarea[0]) for tarea in tareas)
+    if workers <= 1 or len(tareas) <= 1 or total_nodos < MIN_NODOS_PARALELO:
+        return _recolectar(map(layout_barrio, tareas), len(tareas), callback)
+
+    workers = min(workers, len(tareas))
+    # Lotes de varios barrios por envío para no pagar la comunicación barrio por barrio
+    chunksize = max(1, len(tareas) // (workers * 4))
+    # spawn: se llama desde hilos del pool de la interfaz y hacer fork de un proceso
+    # con varios hilos puede dejar al hijo trabado en un lock tomado por otro hilo
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+        resultados = _recolectar(pool.map(layout_barrio, tareas, chunksize=chunksize), len(tareas), callback)
+        if len(resultados) < len(tareas):
+            pool.shutdown(wait=False, cancel_futures=True)
+        return resultados
+
+
+def _recolectar(resultados, total, callback):
+    layouts = []
+    for layout in resultados:
+        layouts.append(layout)
+        if callback is not None and callback(len(layouts), total):
+            break
+    return layouts
@@ -0,0 +1,102 @@
+"""Modelo Qt (virtualizado) y filtro de la lista de recomendaciones."""
+from PyQt5.QtCore import QAbstractListModel, QModelIndex, QSortFilterProxyModel, Qt
+
+ROL_TIPO = Qt.UserRole
+ROL_ELEMENTOS = Qt.UserRole + 1
+
+# Por encima de tantos cambios sale más barato reiniciar el modelo que avisar fila por fila
+MAX_CAMBIOS_INCREMENTALES = 2000
+
+
+class ModeloRecomendaciones(QAbstractListModel):
+    """
+    Filas del índice de un ``MotorRecomendaciones``.
+
+    La vista solo pide los datos de las filas visibles, y los cambios se
+    aplican fila por fila: una fila quitada se reemplaza por la última para
+    no desplazar las demás.
+    """
+
+    def __init__(self, motor, parent=None):
+        super().__init__(parent)
+        self.motor = motor
+        self.claves = []
+        self.fila = {}  # clave -> fila
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.claves)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        recomendacion = self.motor.indice.get(self.claves[index.row()])
+        if recomendacion is None:
+            return None
+        if role in (Qt.DisplayRole, Qt.ToolTipRole):
+            return recomendacion['mensaje']
+        if role == ROL_TIPO:
+            return recomendacion['tipo']
+        if role == ROL_ELEMENTOS:
+            return recomendacion['elementos']
+        return None
+
+    def reiniciar(self):
+        self.beginResetModel()
+        self.claves = list(self.motor.indice)
+        self.fila = {clave: i for i, clave in enumerate(self.claves)}
+        self.endResetModel()
+
+    def aplicar(self, agregadas, actualizadas, quitadas):
+        """Reflejar un resultado de ``MotorRecomendaciones.actualizar``."""
+        if len(agregadas) + len(actualizadas) + len(quitadas) > MAX_CAMBIOS_INCREMENTALES:
+            self.reiniciar()
+            return
+
+        for clave in quitadas:
+            fila = self.fila.pop(clave, None)
+            if fila is None:
+                continue
+            ultima = len(self.claves) - 1
+            movida = self.claves[ultima]
+            self.beginRemoveRows(QModelIndex(), ultima, ultima)
+            self.claves.pop()
+            self.endRemoveRows()
+            if fila != ultima:
+                self.claves[fila] = movida
+                self.fila[movida] = fila
+                self.dataChanged.emit(self.index(fila), self.index(fila))
+
+        for clave in actualizadas:
+            fila = self.fila.get(clave)
+            if fila is not None:
+                self.dataChanged.emit(self.index(fila), self.index(fila))
+
+        nuevas = [clave for clave in agregadas if clave not in self.fila]
+        if nuevas:
+            inicio = len(self.claves)
+            self.beginInsertRows(QModelIndex(), inicio, inicio + len(nuevas) - 1)
+            for i, clave in enumerate(nuevas, inicio):
+                self.claves.append(clave)
+                self.fila[clave] = i
+            self.endInsertRows()
+
+
+class FiltroRecomendaciones(QSortFilterProxyModel):
+    """Filtrar por tipo y por texto (sin distinguir mayúsculas) y ordenar por mensaje."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.tipo = None  # None: todos los tipos
+        self.setFilterCaseSensitivity(Qt.CaseInsensitive)
+        self.setDynamicSortFilter(True)
+
+    def filtrar_tipo(self, tipo):
+        self.tipo = tipo
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, fila, padre):
+        if self.tipo is not None:
+            index = self.sourceModel().index(fila, 0, padre)
+            if self.sourceModel().data(index, ROL_TIPO) != self.tipo:
+                return False
+        return super().filterAcceptsRow(fila, padre)
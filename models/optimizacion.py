@@ -0,0 +1,124 @@
+"""Poda de conexiones: bosque de expansión de máxima capacidad con union-find."""
+
+MOTIVO_LAZO = "lazo: conecta el elemento consigo mismo"
+MOTIVO_PARALELA = "paralela a una conexión de mayor o igual capacidad entre los mismos elementos"
+MOTIVO_REDUNDANTE = "redundante: sus extremos ya están unidos por conexiones de mayor capacidad"
+
+
+class UnionFind:
+    """Conjuntos disjuntos con compresión de caminos y unión por rango."""
+
+    def __init__(self, elementos=()):
+        self.padre = {e: e for e in elementos}
+        self.rango = dict.fromkeys(self.padre, 0)
+
+    def find(self, x):
+        padre = self.padre
+        if x not in padre:
+            padre[x] = x
+            self.rango[x] = 0
+            return x
+        raiz = x
+        while padre[raiz] != raiz:
+            raiz = padre[raiz]
+        while padre[x] != raiz:
+            padre[x], x = raiz, padre[x]
+        return raiz
+
+    def union(self, a, b):
+        """Unir los conjuntos de ``a`` y ``b``; False si ya estaban unidos."""
+        ra, rb = self.find(a), self.find(b)
+        if ra == rb:
+            return False
+        if self.rango[ra] < self.rango[rb]:
+            ra, rb = rb, ra
+        self.padre[rb] = ra
+        if self.rango[ra] == self.rango[rb]:
+            self.rango[ra] += 1
+        return True
+
+
+def encontrar_puentes(graph):
+    """
+    Aristas dirigidas cuya eliminación desconecta el grafo (vista no dirigida).
+
+    Recorrido DFS iterativo de Tarjan sobre el multigrafo no dirigido: las
+    aristas u -> v y v -> u cuentan como dos tuberías paralelas, así que
+    ninguna de las dos es puente.
+    """
+    adyacencia = {n: [] for n in graph.nodes()}
+    aristas = list(graph.edges())
+    for i, (u, v) in enumerate(aristas):
+        if u == v:
+            continue
+        adyacencia[u].append((v, i))
+        adyacencia[v].append((u, i))
+
+    orden, bajo = {}, {}
+    puentes = set()
+    contador = 0
+    for raiz in adyacencia:
+        if raiz in orden:
+            continue
+        orden[raiz] = bajo[raiz] = contador
+        contador += 1
+        pila = [(raiz, -1, iter(adyacencia[raiz]))]
+        while pila:
+            nodo, arista_padre, vecinos = pila[-1]
+            avanzo = False
+            for vecino, i in vecinos:
+                if i == arista_padre:
+                    continue
+                if vecino in orden:
+                    bajo[nodo] = min(bajo[nodo], orden[vecino])
+                else:
+                    orden[vecino] = bajo[vecino] = contador
+                    contador += 1
+                    pila.append((vecino, i, iter(adyacencia[vecino])))
+                    avanzo = True
+                    break
+            if avanzo:
+                continue
+            pila.pop()
+            if pila:
+                padre = pila[-1][0]
+                bajo[padre] = min(bajo[padre], bajo[nodo])
+                if bajo[nodo] > orden[padre]:
+                    puentes.add(aristas[arista_padre])
+    return puentes
+
+
+def podar_conexiones(graph, capacity='capacidad'):
+    """
+    Eliminar las conexiones que no hacen falta para la conectividad débil.
+
+    Equivale a quitar las aristas de menor a mayor capacidad mientras no
+    aumente el número de componentes débilmente conexas, pero en una sola
+    pasada: Kruskal con union-find sobre las aristas ordenadas de mayor a
+    menor capacidad conserva el bosque de expansión de máxima capacidad.
+
+    Retorna ``(eliminadas, puentes)``: la lista de ``(u, v, capacidad,
+    motivo)`` en el orden en que se habrían eliminado y el conjunto de
+    aristas que son puentes (siempre se conservan).
+    """
+    aristas = [(u, v, data.get(capacity, 0)) for u, v, data in graph.edges(data=True)]
+    # Orden estable ascendente, recorrido al revés: mismo desempate que la poda arista por arista
+    aristas.sort(key=lambda x: x[2])
+
+    conjuntos = UnionFind(graph.nodes())
+    conservadas = set()
+    eliminadas = []
+    for u, v, capacidad in reversed(aristas):
+        if conjuntos.union(u, v):
+            conservadas.add((u, v))
+            continue
+        if u == v:
+            motivo = MOTIVO_LAZO
+        elif (v, u) in conservadas:
+            motivo = MOTIVO_PARALELA
+        else:
+            motivo = MOTIVO_REDUNDANTE
+        eliminadas.append((u, v, capacidad, motivo))
+
+    eliminadas.reverse()
+    return eliminadas, encontrar_puentes(graph)
@@ -0,0 +1,195 @@
+"""Tramos de tiempo por etapa (carga, layout, dibujo, guardado...) y captura con cProfile."""
+import contextlib
+import cProfile
+import importlib.machinery
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import deque
+
+MAX_EVENTOS = 100_000  # tramos conservados para exportar (los más viejos se descartan)
+VARIABLE_ENTORNO = 'TUBERIAS_PERFIL'  # '1' activa el perfilador al iniciar
+CARGADORES_DE_ARCHIVO = (importlib.machinery.SourceFileLoader, importlib.machinery.SourcelessFileLoader,
+                         importlib.machinery.ExtensionFileLoader)
+
+_NULO = contextlib.nullcontext()
+
+
+class Perfilador:
+    """
+    Registro liviano de tramos ``(nombre, inicio, duración, hilo)``.
+
+    Desactivado, ``tramo`` devuelve un contexto nulo compartido (el costo es
+    una comparación). Activado, cada tramo cuesta dos lecturas del reloj y un
+    ``append`` a un deque acotado, de modo que puede quedar encendido.
+    Los ``oyentes(nombre, segundos, args)`` se llaman al cerrar cada tramo,
+    en el hilo que lo midió.
+    """
+
+    def __init__(self, activo=False, max_eventos=MAX_EVENTOS):
+        self.activo = activo
+        self.eventos = deque(maxlen=max_eventos)
+        self.oyentes = []
+        self._origen = time.perf_counter_ns()
+        self._cprofile = None  # ruta donde guardar la próxima captura
+        self._capturando = threading.Lock()
+
+    def tramo(self, nombre, **args):
+        """``with perfilador.tramo('layout', barrios=3): ...``"""
+        if not self.activo:
+            return _NULO
+        return self._medir(nombre, args)
+
+    @contextlib.contextmanager
+    def _medir(self, nombre, args):
+        perfil = self._iniciar_cprofile()
+        inicio = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            fin = time.perf_counter_ns()
+            if perfil is not None:
+                args = dict(args, **self._guardar_cprofile(perfil))
+            self.eventos.append((nombre, inicio - self._origen, fin - inicio, threading.get_ident(), args))
+            for oyente in self.oyentes:
+                oyente(nombre, (fin - inicio) / 1e9, args)
+
+    def limpiar(self):
+        self.eventos.clear()
+
+    def resumen(self):
+        """Por etapa: ``{nombre: (cantidad, total_s, maximo_s)}``."""
+        totales = {}
+        for nombre, _, duracion, _, _ in list(self.eventos):
+            cantidad, total, maximo = totales.get(nombre, (0, 0.0, 0.0))
+            totales[nombre] = (cantidad + 1, total + duracion / 1e9, max(maximo, duracion / 1e9))
+        return totales
+
+    # ------------------------------------------------------------------
+    # Exportación
+    # ------------------------------------------------------------------
+    def trace_chrome(self):
+        """Eventos en el formato de Chrome (``chrome://tracing`` / Perfetto)."""
+        pid = os.getpid()
+        return {
+            'traceEvents': [
+                {'name': nombre, 'cat': 'tuberias', 'ph': 'X', 'ts': inicio / 1000, 'dur': duracion / 1000,
+                 'pid': pid, 'tid': hilo, 'args': args}
+                for nombre, inicio, duracion, hilo, args in list(self.eventos)
+            ],
+            'displayTimeUnit': 'ms',
+        }
+
+    def exportar(self, file_path):
+        """Guardar el trace en JSON (se abre en ``chrome://tracing`` o Perfetto)."""
+        temporal = file_path + '.tmp'
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump(self.trace_chrome(), f, default=str)
+        os.replace(temporal, file_path)
+
+    # ------------------------------------------------------------------
+    # cProfile
+    # ------------------------------------------------------------------
+    def capturar_proximo(self, file_path):
+        """
+        Perfilar con cProfile el próximo tramo y guardar ``file_path`` (.prof).
+
+        El tramo medido lleva en sus args ``cprofile`` (la ruta) y
+        ``estadisticas`` (las 10 funciones con más tiempo acumulado).
+        """
+        self._cprofile = file_path
+
+    def _iniciar_cprofile(self):
+        # Un solo perfil a la vez: cProfile no admite dos activos en el mismo proceso
+        if self._cprofile is None or not self._capturando.acquire(blocking=False):
+            return None
+        perfil = cProfile.Profile()
+        perfil.enable()
+        return perfil
+
+    def _guardar_cprofile(self, perfil):
+        perfil.disable()
+        file_path, self._cprofile = self._cprofile, None
+        try:
+            perfil.dump_stats(file_path)
+            texto = io.StringIO()
+            pstats.Stats(perfil, stream=texto).sort_stats('cumulative').print_stats(10)
+            return {'cprofile': file_path, 'estadisticas': texto.getvalue()}
+        except OSError as e:
+            return {'cprofile_error': str(e)}
+        finally:
+            self._capturando.release()
+
+
+class MedidorImportaciones:
+    """
+    Tiempo de importación de cada módulo, como ``python -X importtime``.
+
+    Se instala al principio de ``sys.meta_path``: delega la búsqueda en los
+    demás buscadores y envuelve ``exec_module`` de los cargadores de archivos
+    (cada módulo tiene el suyo). ``tiempos`` guarda por módulo ``(propio_s,
+    acumulado_s)``; el tiempo propio descuenta los módulos que importó.
+    """
+
+    def __init__(self):
+        self.tiempos = {}
+        self.inicio = None
+        self._pila = threading.local()
+
+    @property
+    def instalado(self):
+        return self in sys.meta_path
+
+    def instalar(self):
+        if not self.instalado:
+            self.inicio = time.perf_counter()
+            sys.meta_path.insert(0, self)
+
+    def desinstalar(self):
+        if self.instalado:
+            sys.meta_path.remove(self)
+
+    def find_spec(self, nombre, path=None, target=None):
+        for buscador in sys.meta_path:
+            if buscador is self or not hasattr(buscador, 'find_spec'):
+                continue
+            spec = buscador.find_spec(nombre, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+        # Los cargadores integrados (builtins, congelados) son compartidos: no se envuelven
+        if isinstance(spec.loader, CARGADORES_DE_ARCHIVO):
+            spec.loader.exec_module = self._medir(nombre, spec.loader.exec_module)
+        return spec
+
+    def _medir(self, nombre, exec_module):
+        def exec_medido(modulo):
+            pila = self._pila.__dict__.setdefault('hijos', [0.0])
+            pila.append(0.0)
+            inicio = time.perf_counter()
+            try:
+                exec_module(modulo)
+            finally:
+                acumulado = time.perf_counter() - inicio
+                hijos = pila.pop()
+                pila[-1] += acumulado
+                self.tiempos[nombre] = (acumulado - hijos, acumulado)
+        return exec_medido
+
+    def informe(self, cantidad=30):
+        """Los ``cantidad`` módulos con más tiempo acumulado, en el formato de ``-X importtime``."""
+        filas = sorted(self.tiempos.items(), key=lambda item: item[1][1], reverse=True)[:cantidad]
+        lineas = [f"{'propio ms':>10} | {'acumulado ms':>12} | módulo ({len(self.tiempos)} importados)"]
+        lineas += [f"{propio * 1000:>10.1f} | {acumulado * 1000:>12.1f} | {nombre}"
+                   for nombre, (propio, acumulado) in filas]
+        return "\n".join(lineas)
+
+
+perfilador = Perfilador(activo=os.environ.get(VARIABLE_ENTORNO) == '1')
+tramo = perfilador.tramo
+medidor_importaciones = MedidorImportaciones()
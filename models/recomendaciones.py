@@ -0,0 +1,152 @@
+"""Recomendaciones sobre la red (sin dependencias de la interfaz gráfica)."""
+
+UMBRAL_BAJO = 20  # L/s
+
+BAJA_CAPACIDAD = 'baja_capacidad'
+TANQUE_AISLADO = 'tanque_sin_conexiones'
+CASA_AISLADA = 'casa_sin_conexiones'
+TANQUE_VACIO = 'tanque_vacio'
+TANQUE_EXCEDIDO = 'tanque_excedido'
+SUMINISTRO_UNICO = 'casa_suministro_unico'
+
+TIPOS_ARISTA = (BAJA_CAPACIDAD,)
+TIPOS_NODO = (TANQUE_AISLADO, CASA_AISLADA, TANQUE_VACIO, TANQUE_EXCEDIDO, SUMINISTRO_UNICO)
+
+NOMBRES_TIPOS = {
+    BAJA_CAPACIDAD: "Baja capacidad",
+    TANQUE_AISLADO: "Tanque sin conexiones",
+    CASA_AISLADA: "Casa sin conexiones",
+    TANQUE_VACIO: "Tanque vacío",
+    TANQUE_EXCEDIDO: "Tanque sobre su capacidad",
+    SUMINISTRO_UNICO: "Casa con un solo suministro",
+}
+
+
+def _recomendacion(tipo, elementos, mensaje):
+    return {'tipo': tipo, 'elementos': elementos, 'mensaje': mensaje}
+
+
+def reglas_arista(graph, u, v, umbral_bajo=UMBRAL_BAJO):
+    """Recomendaciones de la tubería ``u -> v`` como ``{clave: recomendacion}``."""
+    encontradas = {}
+    if not graph.has_edge(u, v):
+        return encontradas
+    capacidad_actual = graph.edges[u, v].get('capacidad', 0)
+    if capacidad_actual < umbral_bajo:
+        encontradas[(BAJA_CAPACIDAD, u, v)] = _recomendacion(
+            BAJA_CAPACIDAD, [u, v],
+            f"Conexión de baja capacidad detectada: {u} -> {v} (Capacidad: {capacidad_actual} L/s)")
+    return encontradas
+
+
+def reglas_nodo(graph, node):
+    """Recomendaciones del elemento ``node`` como ``{clave: recomendacion}``."""
+    encontradas = {}
+    if node not in graph:
+        return encontradas
+    data = graph.nodes[node]
+    if data.get('type') == 'tank':
+        if not graph.out_degree(node):
+            encontradas[(TANQUE_AISLADO, node)] = _recomendacion(
+                TANQUE_AISLADO, [node], f"Tanque {node} sin conexiones. Considera conectarlo a una casa.")
+        actual, maxima = data.get('current_capacity'), data.get('max_capacity')
+        if actual == 0:
+            encontradas[(TANQUE_VACIO, node)] = _recomendacion(
+                TANQUE_VACIO, [node], f"Tanque {node} vacío. Considera llenarlo o redistribuir su demanda.")
+        elif actual is not None and maxima is not None and actual > maxima:
+            encontradas[(TANQUE_EXCEDIDO, node)] = _recomendacion(
+                TANQUE_EXCEDIDO, [node],
+                f"Tanque {node} con {actual} L, más que su capacidad máxima ({maxima} L). Revisa los datos.")
+    elif data.get('type') == 'house':
+        entradas = graph.in_degree(node)
+        if not entradas:
+            encontradas[(CASA_AISLADA, node)] = _recomendacion(
+                CASA_AISLADA, [node], f"Casa {node} sin conexiones. Considera conectarla a un tanque.")
+        elif entradas == 1:
+            origen = next(iter(graph.predecessors(node)))
+            encontradas[(SUMINISTRO_UNICO, node)] = _recomendacion(
+                SUMINISTRO_UNICO, [origen, node],
+                f"Casa {node} abastecida solo por {origen}. Considera una conexión redundante.")
+    return encontradas
+
+
+class MotorRecomendaciones:
+    """
+    Índice de recomendaciones que se mantiene al día con los cambios de la red.
+
+    Todas las reglas son locales (una tubería o un elemento y sus grados),
+    así que tras una edición basta con reevaluar los nodos y aristas del
+    conjunto de cambios (``WaterNetwork.tomar_cambios``): el costo depende
+    del cambio y no del tamaño de la red. El índice va de una clave
+    ``(tipo, *elementos)`` a la recomendación.
+    """
+
+    def __init__(self, umbral_bajo=UMBRAL_BAJO):
+        self.umbral_bajo = umbral_bajo
+        self.graph = None
+        self.indice = {}
+
+    def __len__(self):
+        return len(self.indice)
+
+    def recomendaciones(self):
+        return list(self.indice.values())
+
+    def reconstruir(self, graph):
+        """Revisar el grafo completo. Retorna ``(agregadas, actualizadas, quitadas)`` como en ``actualizar``."""
+        anterior = self.indice
+        self.graph = graph
+        self.indice = {}
+        for u, v in graph.edges():
+            self.indice.update(reglas_arista(graph, u, v, self.umbral_bajo))
+        for node in graph.nodes():
+            self.indice.update(reglas_nodo(graph, node))
+        agregadas = [clave for clave in self.indice if clave not in anterior]
+        actualizadas = [clave for clave, rec in self.indice.items() if clave in anterior and anterior[clave] != rec]
+        quitadas = [clave for clave in anterior if clave not in self.indice]
+        return agregadas, actualizadas, quitadas
+
+    def actualizar(self, graph, cambios=None):
+        """
+        Reevaluar solo lo que tocó ``cambios`` (un ``Cambios`` de la red).
+
+        Sin ``cambios``, o si ``graph`` no es el grafo indexado (otra red o
+        un grafo reconstruido), se revisa todo. Retorna las claves
+        ``(agregadas, actualizadas, quitadas)``.
+        """
+        if cambios is None or graph is not self.graph:
+            return self.reconstruir(graph)
+
+        agregadas, actualizadas, quitadas = [], [], []
+
+        def comparar(claves, nuevas):
+            for clave in claves:
+                anterior, nueva = self.indice.get(clave), nuevas.get(clave)
+                if nueva is None:
+                    if anterior is not None:
+                        del self.indice[clave]
+                        quitadas.append(clave)
+                elif anterior is None:
+                    self.indice[clave] = nueva
+                    agregadas.append(clave)
+                elif anterior != nueva:
+                    self.indice[clave] = nueva
+                    actualizadas.append(clave)
+
+        for u, v in cambios.aristas:
+            comparar([(tipo, u, v) for tipo in TIPOS_ARISTA], reglas_arista(graph, u, v, self.umbral_bajo))
+        for node in cambios.nodos:
+            comparar([(tipo, node) for tipo in TIPOS_NODO], reglas_nodo(graph, node))
+        return agregadas, actualizadas, quitadas
+
+
+def generar_recomendaciones(graph, umbral_bajo=UMBRAL_BAJO):
+    """
+    Revisar el grafo y devolver las recomendaciones encontradas.
+
+    Cada recomendación es un dict con ``tipo``, ``elementos`` (nombres
+    involucrados) y ``mensaje`` (texto para mostrar).
+    """
+    motor = MotorRecomendaciones(umbral_bajo)
+    motor.reconstruir(graph)
+    return motor.recomendaciones()
@@ -0,0 +1,647 @@
+"""Modelo de la red de tuberías independiente de la interfaz gráfica."""
+import contextlib
+import copy
+import functools
+import inspect
+import threading
+
+import networkx as nx
+
+ATRIBUTOS_EXCLUIDOS = ('connections', 'input_rate', 'output_rate')
+
+
+def separar_destino(target):
+    """Separar el prefijo de dirección ('+', '-' o '') del nombre del destino."""
+    if target.startswith('+') or target.startswith('-'):
+        return target[0], target[1:]
+    return '', target
+
+
+def formatear_destino(nombre, direccion):
+    """Construir el 'target' de una conexión vista desde el origen."""
+    if direccion == "right":
+        return f"+{nombre}"
+    if direccion == "left":
+        return f"-{nombre}"
+    return nombre
+
+
+def direccion_de_prefijo(prefijo):
+    """Traducir el prefijo de un 'target' a la dirección vista desde su dueño."""
+    return {'+': 'right', '-': 'left'}.get(prefijo, 'both')
+
+
+def invertir_direccion(direccion):
+    """Dirección de una conexión vista desde el otro extremo."""
+    return {'right': 'left', 'left': 'right'}.get(direccion, 'both')
+
+
+def atributos_nodo(element):
+    """Atributos del nodo del grafo para un elemento del JSON."""
+    return {k: v for k, v in element.items() if k not in ATRIBUTOS_EXCLUIDOS}
+
+
+def aristas_de_conexion(duenio, conn):
+    """
+    Aristas dirigidas que aporta una entrada de conexión.
+
+    '+destino' es una tubería duenio -> destino, '-destino' una tubería
+    destino -> duenio y un destino sin prefijo una tubería en ambos sentidos.
+    """
+    prefijo, otro = separar_destino(conn['target'])
+    capacidad = conn.get('capacity', 0)
+    if prefijo == '+':
+        return [(duenio, otro, {'capacidad': capacidad, 'direction': 'right'})]
+    if prefijo == '-':
+        return [(otro, duenio, {'capacidad': capacidad, 'direction': 'right'})]
+    return [
+        (duenio, otro, {'capacidad': capacidad, 'direction': 'both'}),
+        (otro, duenio, {'capacidad': capacidad, 'direction': 'both'}),
+    ]
+
+
+def construir_grafo(data):
+    """Construir el grafo dirigido completo a partir de la lista de barrios."""
+    G = nx.DiGraph()
+    for neighborhood in data:
+        for element in neighborhood['elements']:
+            G.add_node(element['name'], **atributos_nodo(element))
+    for neighborhood in data:
+        for element in neighborhood['elements']:
+            for conn in element.get('connections', []):
+                G.add_edges_from(aristas_de_conexion(element['name'], conn))
+    return G
+
+
+class Cambios:
+    """Conjunto de nodos, aristas y barrios modificados desde la última consulta."""
+
+    def __init__(self):
+        self.nodos = set()
+        self.aristas = set()
+        self.barrios = set()
+        self.estructura = False  # True si se agregaron o quitaron nodos/aristas
+
+    def __bool__(self):
+        return bool(self.nodos or self.aristas or self.barrios)
+
+    def __repr__(self):
+        return (f"Cambios(nodos={len(self.nodos)}, aristas={len(self.aristas)}, "
+                f"barrios={len(self.barrios)}, estructura={self.estructura})")
+
+
+def mutacion(metodo):
+    """
+    Marcar un método que modifica la red.
+
+    Toma el lock de la red y, al terminar bien, avisa a los oyentes con
+    ``(nombre, args, kwargs)``. Las mutaciones que llaman a otras (p. ej.
+    ``cambiar_direccion``) se notifican una sola vez, como la de afuera.
+    Dentro de un lote la notificación se difiere hasta ``confirmar_lote`` y
+    se guarda cómo deshacer el cambio.
+    """
+    nombres = list(inspect.signature(metodo).parameters)[1:]
+
+    @functools.wraps(metodo)
+    def envoltura(self, *args, **kwargs):
+        with self.lock:
+            externa = self._profundidad == 0 and not self._deshaciendo
+            if externa and self._lote is not None:
+                deshacer = self._inversa(metodo.__name__, dict(zip(nombres, args), **kwargs))
+                # Los dicts (barrios, elementos) se copian: la red los sigue modificando
+                registro = (metodo.__name__, [copy.deepcopy(a) if isinstance(a, (dict, list)) else a for a in args],
+                            dict(kwargs))
+            self._profundidad += 1
+            try:
+                resultado = metodo(self, *args, **kwargs)
+            finally:
+                self._profundidad -= 1
+            if externa:
+                if self._lote is not None:
+                    self._lote.operaciones.append(registro)
+                    self._lote.deshacer.append(deshacer)
+                else:
+                    for oyente in self.oyentes:
+                        oyente(metodo.__name__, args, kwargs)
+            return resultado
+    return envoltura
+
+
+class Lote:
+    """Mutaciones agrupadas: se notifican juntas al confirmar o se deshacen."""
+
+    def __init__(self):
+        self.operaciones = []  # (nombre, args, kwargs) en el orden aplicado
+        self.deshacer = []     # funciones que revierten cada operación
+
+    def __len__(self):
+        return len(self.operaciones)
+
+
+class WaterNetwork:
+    """
+    Red de barrios, tanques, casas y tuberías con índices por nombre.
+
+    Mantiene la lista de barrios en el formato del JSON (``data``) y tres
+    índices que se actualizan en cada mutación:
+
+    - nombre de elemento -> elemento
+    - nombre de elemento -> barrio que lo contiene
+    - (dueño, otro) -> entrada de conexión dentro de ``dueño['connections']``
+
+    Cada tubería aparece dos veces en el JSON (una entrada en cada extremo,
+    con prefijos espejados), por lo que el índice de conexiones guarda ambas.
+
+    ``graph`` es el ``nx.DiGraph`` vivo de la red. Cada mutación aplica solo
+    su delta al grafo y anota lo modificado en ``cambios``, que las etapas
+    posteriores (layout, dibujo, recomendaciones) consumen con
+    ``tomar_cambios``.
+
+    Las mutaciones toman ``lock`` (para leer la red desde otro hilo sin
+    verla a medias) y se notifican a ``oyentes``, por ejemplo el diario de
+    cambios. Con ``batch()`` varias mutaciones forman una transacción: se
+    notifican como un único ``aplicar_lote`` o se revierten todas.
+    """
+
+    def __init__(self, data=None, graph=None):
+        self.data = data if data is not None else []
+        self.graph = graph if graph is not None else construir_grafo(self.data)
+        self.cambios = Cambios()
+        self.version = 0
+        self.lock = threading.RLock()
+        self.oyentes = []
+        self._profundidad = 0
+        self._lote = None
+        self._deshaciendo = False
+        self.reindexar()
+
+    # ------------------------------------------------------------------
+    # Índices
+    # ------------------------------------------------------------------
+    def reindexar(self):
+        """Reconstruir todos los índices a partir de ``self.data``."""
+        self._barrios = {}
+        self._elementos = {}
+        self._barrio_de = {}
+        self._conexiones = {}
+        self._vecinos = {}
+
+        for barrio in self.data:
+            self._barrios[barrio['name']] = barrio
+            for element in barrio['elements']:
+                self._indexar_elemento(element, barrio)
+
+        for barrio in self.data:
+            for element in barrio['elements']:
+                for conn in element.get('connections', []):
+                    _, otro = separar_destino(conn['target'])
+                    self._indexar_conexion(element['name'], otro, conn)
+
+    def _indexar_elemento(self, element, barrio):
+        self._elementos[element['name']] = element
+        self._barrio_de[element['name']] = barrio
+        self._vecinos.setdefault(element['name'], set())
+
+    def _indexar_conexion(self, duenio, otro, conn):
+        self._conexiones[(duenio, otro)] = conn
+        self._vecinos.setdefault(duenio, set()).add(otro)
+        self._vecinos.setdefault(otro, set()).add(duenio)
+
+    def _desindexar_conexion(self, duenio, otro):
+        """Quitar la entrada (dueño, otro) del índice y de la lista del dueño."""
+        conn = self._conexiones.pop((duenio, otro), None)
+        if conn is not None:
+            element = self._elementos.get(duenio)
+            if element is not None:
+                element['connections'] = [
+                    c for c in element['connections']
+                    if c is not conn and separar_destino(c['target'])[1] != otro
+                ]
+        if (otro, duenio) not in self._conexiones:
+            self._vecinos.get(duenio, set()).discard(otro)
+            self._vecinos.get(otro, set()).discard(duenio)
+        return conn
+
+    def reconstruir_grafo(self):
+        """Reconstruir el grafo completo (solo para datos editados por fuera del modelo)."""
+        self.reindexar()
+        self.graph = construir_grafo(self.data)
+        self.cambios.nodos.update(self.graph.nodes())
+        self.cambios.aristas.update(self.graph.edges())
+        self.cambios.barrios.update(self._barrios)
+        self.cambios.estructura = True
+        self.version += 1
+        return self.graph
+
+    def tomar_cambios(self):
+        """Devolver los cambios acumulados y empezar un conjunto nuevo."""
+        cambios, self.cambios = self.cambios, Cambios()
+        return cambios
+
+    # ------------------------------------------------------------------
+    # Delta sobre el grafo
+    # ------------------------------------------------------------------
+    def _marcar_nodo(self, nombre):
+        self.cambios.nodos.add(nombre)
+        barrio = self._barrio_de.get(nombre)
+        if barrio is not None:
+            self.cambios.barrios.add(barrio['name'])
+
+    def _marcar_arista(self, u, v):
+        self.cambios.aristas.add((u, v))
+        self._marcar_nodo(u)
+        self._marcar_nodo(v)
+
+    def _agregar_aristas(self, duenio, conn):
+        for u, v, attrs in aristas_de_conexion(duenio, conn):
+            self.graph.add_edge(u, v, **attrs)
+            self._marcar_arista(u, v)
+        self.cambios.estructura = True
+
+    def _quitar_aristas(self, origen, destino):
+        for u, v in ((origen, destino), (destino, origen)):
+            if self.graph.has_edge(u, v):
+                self.graph.remove_edge(u, v)
+                self._marcar_arista(u, v)
+        self.cambios.estructura = True
+
+    # ------------------------------------------------------------------
+    # Lotes (transacciones)
+    # ------------------------------------------------------------------
+    def en_lote(self):
+        return self._lote is not None
+
+    def iniciar_lote(self):
+        """Empezar a agrupar mutaciones (un lote ya abierto se reutiliza)."""
+        with self.lock:
+            if self._lote is None:
+                self._lote = Lote()
+            return self._lote
+
+    def confirmar_lote(self):
+        """Cerrar el lote y notificar sus mutaciones como un único ``aplicar_lote``."""
+        with self.lock:
+            lote, self._lote = self._lote, None
+            if lote and lote.operaciones:
+                for oyente in self.oyentes:
+                    oyente('aplicar_lote', (lote.operaciones,), {})
+            return lote
+
+    def descartar_lote(self):
+        """Revertir, en orden inverso, todas las mutaciones del lote abierto."""
+        with self.lock:
+            lote, self._lote = self._lote, None
+            if lote is None:
+                return None
+            self._deshaciendo = True
+            try:
+                for deshacer in reversed(lote.deshacer):
+                    deshacer()
+            finally:
+                self._deshaciendo = False
+            return lote
+
+    @contextlib.contextmanager
+    def batch(self):
+        """
+        ``with network.batch(): ...`` confirma al salir o revierte si hay una excepción.
+
+        Un ``batch`` dentro de otro lote abierto se suma a ese lote.
+        """
+        if self._lote is not None:
+            yield self._lote
+            return
+        lote = self.iniciar_lote()
+        try:
+            yield lote
+        except BaseException:
+            self.descartar_lote()
+            raise
+        self.confirmar_lote()
+
+    def aplicar_lote(self, operaciones):
+        """
+        Aplicar una lista de ``(nombre, args, kwargs)`` como una transacción.
+
+        Es lo que registra ``confirmar_lote``; al reproducir el diario, si una
+        operación falla no queda aplicada ninguna.
+        """
+        with self.batch():
+            for nombre, args, kwargs in operaciones:
+                getattr(self, nombre)(*args, **kwargs)
+
+    def _inversa(self, nombre, parametros):
+        """Función que deshace la mutación ``nombre`` a partir del estado actual."""
+        if nombre == 'agregar_barrio':
+            barrio = parametros['barrio']['name']
+            return lambda: self.eliminar_barrio(barrio)
+        if nombre == 'agregar_elemento':
+            elemento = parametros['element']['name']
+            return lambda: self.eliminar_elemento(elemento)
+        if nombre == 'eliminar_barrio':
+            return self._restauracion_barrio(parametros['nombre'])
+        if nombre == 'eliminar_elemento':
+            return self._restauracion_elemento(parametros['nombre'])
+        origen = parametros.get('origen', parametros.get('u'))
+        destino = parametros.get('destino', parametros.get('v'))
+        if nombre == 'agregar_conexion':
+            return lambda: self.eliminar_conexion(origen, destino)
+        if nombre == 'redirigir_conexion':
+            nuevo = parametros['nuevo_destino']
+            return lambda: self.redirigir_conexion(origen, nuevo, destino)
+
+        capacidad = self.capacidad(origen, destino)
+        direccion = self.direccion(origen, destino)
+        if nombre == 'cambiar_capacidad':
+            return lambda: self.cambiar_capacidad(origen, destino, capacidad)
+        if nombre == 'cambiar_direccion':
+            return lambda: self.cambiar_direccion(origen, destino, direccion)
+
+        # eliminar_conexion / eliminar_arista: volver a poner la tubería como estaba
+        def restaurar():
+            if self.tiene_conexion(origen, destino):
+                self.eliminar_conexion(origen, destino)
+            self.agregar_conexion(origen, destino, capacidad, direccion)
+        return restaurar
+
+    def _entradas_externas(self, nombres):
+        """Entradas de conexión de otros elementos que apuntan a ``nombres``."""
+        return [
+            (otro, copy.deepcopy(self._conexiones[(otro, nombre)]))
+            for nombre in nombres
+            for otro in self._vecinos.get(nombre, ())
+            if otro not in nombres and (otro, nombre) in self._conexiones
+        ]
+
+    def _restauracion_barrio(self, nombre):
+        barrio = self._barrios.get(nombre)
+        if barrio is None:
+            return lambda: None
+        indice = self.data.index(barrio)
+        copia = copy.deepcopy(barrio)
+        externas = self._entradas_externas({e['name'] for e in barrio['elements']})
+
+        def restaurar():
+            self.agregar_barrio(copia)
+            self.data.insert(indice, self.data.pop())
+            self._restaurar_entradas(externas)
+        return restaurar
+
+    def _restauracion_elemento(self, nombre):
+        element = self._elementos.get(nombre)
+        if element is None:
+            return lambda: None
+        barrio = self._barrio_de[nombre]
+        indice = barrio['elements'].index(element)
+        barrio_name = barrio['name']  # el barrio puede volver como otro dict si se deshizo su borrado
+        copia = copy.deepcopy(element)
+        externas = self._entradas_externas({nombre})
+
+        def restaurar():
+            propias = copia.get('connections', [])
+            self.agregar_elemento(barrio_name, dict(copia, connections=[]))
+            elementos = self._barrios[barrio_name]['elements']
+            elementos.insert(indice, elementos.pop())
+            self._restaurar_entradas([(nombre, conn) for conn in propias] + externas)
+        return restaurar
+
+    def _restaurar_entradas(self, entradas):
+        for duenio, conn in entradas:
+            _, otro = separar_destino(conn['target'])
+            if duenio not in self._elementos or (duenio, otro) in self._conexiones:
+                continue
+            self._elementos[duenio]['connections'].append(conn)
+            self._indexar_conexion(duenio, otro, conn)
+            self._agregar_aristas(duenio, conn)
+
+    # ------------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------------
+    def barrio_names(self):
+        return [barrio['name'] for barrio in self.data]
+
+    def element_names(self):
+        return [element['name'] for barrio in self.data for element in barrio['elements']]
+
+    def barrio(self, nombre):
+        return self._barrios.get(nombre)
+
+    def elemento(self, nombre):
+        return self._elementos.get(nombre)
+
+    def barrio_de(self, nombre):
+        return self._barrio_de.get(nombre)
+
+    def vecinos(self, nombre):
+        """Elementos conectados por alguna tubería con ``nombre``."""
+        return set(self._vecinos.get(nombre, ()))
+
+    def conexion(self, duenio, otro):
+        """Entrada de conexión guardada en ``duenio`` que apunta a ``otro``."""
+        return self._conexiones.get((duenio, otro))
+
+    def tiene_conexion(self, origen, destino):
+        return (origen, destino) in self._conexiones or (destino, origen) in self._conexiones
+
+    def direccion(self, origen, destino):
+        """Dirección de la tubería vista desde ``origen`` ('right', 'left' o 'both')."""
+        conn = self._conexiones.get((origen, destino))
+        if conn is not None:
+            return direccion_de_prefijo(separar_destino(conn['target'])[0])
+        conn = self._conexiones.get((destino, origen))
+        if conn is not None:
+            return invertir_direccion(direccion_de_prefijo(separar_destino(conn['target'])[0]))
+        return None
+
+    def capacidad(self, origen, destino):
+        conn = self._conexiones.get((origen, destino)) or self._conexiones.get((destino, origen))
+        return conn.get('capacity', 0) if conn is not None else None
+
+    # ------------------------------------------------------------------
+    # Mutaciones
+    # ------------------------------------------------------------------
+    def _requerir_elemento(self, nombre):
+        if nombre not in self._elementos:
+            raise KeyError(f"No existe el elemento '{nombre}'")
+        return self._elementos[nombre]
+
+    def _requerir_conexion(self, origen, destino):
+        if not self.tiene_conexion(origen, destino):
+            raise KeyError(f"No existe una conexión entre {origen} y {destino}")
+
+    @mutacion
+    def agregar_barrio(self, barrio):
+        """Agregar un barrio completo (con sus elementos y conexiones)."""
+        nombre = barrio['name']
+        if nombre in self._barrios:
+            raise ValueError(f"Ya existe un barrio con el nombre '{nombre}'.")
+        for element in barrio['elements']:
+            if element['name'] in self._elementos:
+                raise ValueError(f"Ya existe un elemento con el nombre '{element['name']}'.")
+
+        self.data.append(barrio)
+        self._barrios[nombre] = barrio
+        for element in barrio['elements']:
+            element.setdefault('connections', [])
+            self._indexar_elemento(element, barrio)
+            self.graph.add_node(element['name'], **atributos_nodo(element))
+            self._marcar_nodo(element['name'])
+        for element in barrio['elements']:
+            for conn in element['connections']:
+                _, otro = separar_destino(conn['target'])
+                self._indexar_conexion(element['name'], otro, conn)
+                self._agregar_aristas(element['name'], conn)
+        self.cambios.barrios.add(nombre)
+        self.cambios.estructura = True
+        self.version += 1
+        return barrio
+
+    @mutacion
+    def eliminar_barrio(self, nombre):
+        """Eliminar un barrio, sus elementos y todas las tuberías que los tocan."""
+        barrio = self._barrios.pop(nombre, None)
+        if barrio is None:
+            raise KeyError(f"No existe el barrio '{nombre}'")
+
+        for element in barrio['elements']:
+            self._quitar_elemento(element['name'])
+
+        self.data.remove(barrio)
+        self.cambios.barrios.add(nombre)
+        self.cambios.estructura = True
+        self.version += 1
+        return barrio
+
+    def _quitar_elemento(self, name):
+        """Quitar un elemento de los índices y del grafo junto con sus tuberías."""
+        for otro in list(self._vecinos.get(name, ())):
+            self._desindexar_conexion(otro, name)
+            self._desindexar_conexion(name, otro)
+            self._marcar_nodo(otro)
+        self._vecinos.pop(name, None)
+        self._elementos.pop(name, None)
+        self._barrio_de.pop(name, None)
+        if self.graph.has_node(name):
+            self.cambios.aristas.update(self.graph.in_edges(name))
+            self.cambios.aristas.update(self.graph.out_edges(name))
+            self.graph.remove_node(name)
+        self.cambios.nodos.add(name)
+
+    @mutacion
+    def agregar_elemento(self, barrio_name, element):
+        """Agregar un tanque o una casa a un barrio existente."""
+        barrio = self._barrios.get(barrio_name)
+        if barrio is None:
+            raise KeyError(f"No existe el barrio '{barrio_name}'")
+        if element['name'] in self._elementos:
+            raise ValueError(f"Ya existe un elemento con el nombre '{element['name']}'.")
+
+        element.setdefault('connections', [])
+        barrio['elements'].append(element)
+        self._indexar_elemento(element, barrio)
+        self.graph.add_node(element['name'], **atributos_nodo(element))
+        self._marcar_nodo(element['name'])
+        self.cambios.estructura = True
+        self.version += 1
+        return element
+
+    @mutacion
+    def eliminar_elemento(self, nombre):
+        """Eliminar un tanque o una casa y todas las tuberías que lo tocan."""
+        element = self._requerir_elemento(nombre)
+        barrio = self._barrio_de[nombre]
+        self.cambios.barrios.add(barrio['name'])
+        self._quitar_elemento(nombre)
+        barrio['elements'].remove(element)
+        self.cambios.estructura = True
+        self.version += 1
+        return element
+
+    @mutacion
+    def agregar_conexion(self, origen, destino, capacidad, direccion="both"):
+        """Agregar una tubería escribiendo las dos entradas espejadas."""
+        elem_origen = self._requerir_elemento(origen)
+        elem_destino = self._requerir_elemento(destino)
+        if origen == destino:
+            raise ValueError("El origen y el destino deben ser distintos")
+        if self.tiene_conexion(origen, destino):
+            raise ValueError(f"Ya existe una conexión entre {origen} y {destino}")
+
+        conn_origen = {"target": formatear_destino(destino, direccion), "capacity": capacidad}
+        conn_destino = {"target": formatear_destino(origen, invertir_direccion(direccion)), "capacity": capacidad}
+        elem_origen['connections'].append(conn_origen)
+        elem_destino['connections'].append(conn_destino)
+        self._indexar_conexion(origen, destino, conn_origen)
+        self._indexar_conexion(destino, origen, conn_destino)
+        self._agregar_aristas(origen, conn_origen)
+        self.version += 1
+
+    @mutacion
+    def eliminar_conexion(self, origen, destino):
+        """Eliminar la tubería entre ``origen`` y ``destino`` (ambas entradas)."""
+        self._requerir_conexion(origen, destino)
+        self._desindexar_conexion(origen, destino)
+        self._desindexar_conexion(destino, origen)
+        self._quitar_aristas(origen, destino)
+        self.version += 1
+
+    @mutacion
+    def eliminar_arista(self, u, v):
+        """
+        Quitar solo la arista dirigida u -> v.
+
+        Si la tubería es bidireccional queda como tubería de un solo sentido
+        v -> u; si ya era de un solo sentido se elimina la tubería.
+        """
+        self._requerir_conexion(u, v)
+        if not self.graph.has_edge(u, v):
+            return
+        if self.graph.has_edge(v, u):
+            self.cambiar_direccion(v, u, 'right')
+        else:
+            self.eliminar_conexion(u, v)
+
+    @mutacion
+    def cambiar_direccion(self, origen, destino, direccion):
+        """Cambiar la dirección de una tubería manteniendo su capacidad."""
+        self._requerir_conexion(origen, destino)
+        capacidad = self.capacidad(origen, destino)
+        self.eliminar_conexion(origen, destino)
+        self.agregar_conexion(origen, destino, capacidad, direccion)
+
+    @mutacion
+    def redirigir_conexion(self, origen, destino, nuevo_destino):
+        """
+        Mover el extremo ``destino`` de una tubería a ``nuevo_destino``.
+
+        Se valida todo antes de tocar la red: ``mutacion`` no deshace un
+        cambio a medias y la tubería se perdería sin llegar al diario.
+        """
+        self._requerir_conexion(origen, destino)
+        self._requerir_elemento(nuevo_destino)
+        if origen == nuevo_destino:
+            raise ValueError("El origen y el destino deben ser distintos")
+        if self.tiene_conexion(origen, nuevo_destino):
+            raise ValueError(f"Ya existe una conexión entre {origen} y {nuevo_destino}")
+        capacidad = self.capacidad(origen, destino)
+        direccion = self.direccion(origen, destino)
+        self.eliminar_conexion(origen, destino)
+        try:
+            self.agregar_conexion(origen, nuevo_destino, capacidad, direccion)
+        except Exception:
+            # Restaurar la tubería original antes de propagar el error
+            self.agregar_conexion(origen, destino, capacidad, direccion)
+            raise
+
+    @mutacion
+    def cambiar_capacidad(self, origen, destino, capacidad):
+        """Cambiar la capacidad de una tubería en ambas entradas y en sus aristas."""
+        self._requerir_conexion(origen, destino)
+        for clave in ((origen, destino), (destino, origen)):
+            conn = self._conexiones.get(clave)
+            if conn is not None:
+                conn['capacity'] = capacidad
+            if self.graph.has_edge(*clave):
+                self.graph.edges[clave]['capacidad'] = capacidad
+                self._marcar_arista(*clave)
+        self.version += 1
@@ -0,0 +1,401 @@
+"""Dibujo del grafo con matplotlib agrupando artistas (una colección por estilo)."""
+import os
+
+import matplotlib.image as mpimg
+import numpy as np
+from matplotlib.collections import LineCollection
+
+RADIO_ICONO = 0.15        # medio lado del ícono en unidades del gráfico
+CURVATURA = 0.1           # igual que connectionstyle='arc3,rad=0.1'
+PUNTOS_CURVA = 9          # puntos de cada arista curva
+LARGO_FLECHA = 0.12       # largo de la punta de flecha en unidades del gráfico
+PIXELES_ICONO = 32        # resolución de cada ícono dentro del atlas
+MAX_PIXELES_ATLAS = 16_000_000
+# Etiquetas (cada una es un Text con su caja) que se dibujan a la vez; con más a la vista no se dibujan
+MAX_ETIQUETAS = 400
+
+# Un estilo por tipo de dirección; cada estilo se dibuja con una sola colección.
+# Hoy todas las tuberías se ven igual: las direcciones sin estilo propio usan 'default'
+ESTILOS_ARISTA = {
+    'default': {'color': 'gray', 'linewidth': 1.0},
+}
+CAJA_ETIQUETA = dict(facecolor='white', edgecolor='gray', alpha=0.7)
+CAJA_CAPACIDAD = dict(boxstyle='round', ec='white', fc='white')
+
+# Ruta a los iconos (ajusta estas rutas según tu estructura de directorios)
+RUTAS_ICONOS = {
+    'tank': os.path.join('icons', 'tanque.png'),
+    'house': os.path.join('icons', 'Casa.png'),
+}
+
+
+def cargar_iconos(rutas=RUTAS_ICONOS):
+    """Leer y decodificar los íconos una sola vez."""
+    return {tipo: mpimg.imread(ruta) for tipo, ruta in rutas.items()}
+
+
+def geometria_aristas(edges, pos):
+    """
+    Curvas (arc3) de todas las aristas calculadas de una vez con NumPy.
+
+    Retorna ``(curvas, puntas, tangentes, centros, angulos)``: las curvas como
+    arreglo (E, PUNTOS_CURVA, 2) recortadas al borde de los íconos, la punta y
+    la dirección final de cada flecha, el punto medio de la curva y el ángulo
+    del texto de cada arista.
+    """
+    if not edges:
+        vacio = np.zeros((0, 2))
+        return np.zeros((0, PUNTOS_CURVA, 2)), vacio, vacio, vacio, np.zeros(0)
+
+    p0 = np.array([pos[u] for u, _ in edges], dtype=float)
+    p2 = np.array([pos[v] for _, v in edges], dtype=float)
+
+    # Recortar los extremos para que la flecha termine en el borde del ícono
+    d = p2 - p0
+    largo = np.hypot(d[:, 0], d[:, 1])
+    unit = d / np.where(largo == 0, 1, largo)[:, None]
+    recorte = np.minimum(RADIO_ICONO, largo / 3)[:, None]
+    p0 = p0 + unit * recorte
+    p2 = p2 - unit * recorte
+
+    # Punto de control de arc3: a CURVATURA veces la distancia, perpendicular al segmento
+    d = p2 - p0
+    control = (p0 + p2) / 2 + CURVATURA * np.stack([d[:, 1], -d[:, 0]], axis=1)
+
+    t = np.linspace(0, 1, PUNTOS_CURVA)[None, :, None]
+    curvas = (1 - t) ** 2 * p0[:, None] + 2 * (1 - t) * t * control[:, None] + t ** 2 * p2[:, None]
+
+    tangentes = p2 - control
+    norma = np.hypot(tangentes[:, 0], tangentes[:, 1])
+    tangentes = tangentes / np.where(norma == 0, 1, norma)[:, None]
+
+    centros = curvas[:, PUNTOS_CURVA // 2]
+    angulos = np.degrees(np.arctan2(d[:, 1], d[:, 0]))
+    # Mantener el texto derecho
+    angulos = np.where(angulos > 90, angulos - 180, angulos)
+    angulos = np.where(angulos < -90, angulos + 180, angulos)
+    return curvas, p2, tangentes, centros, angulos
+
+
+def dibujar_aristas(ax, graph, pos):
+    """Dibujar todas las aristas: una LineCollection y un quiver de flechas por estilo."""
+    artistas = []
+    for estilo, props in ESTILOS_ARISTA.items():
+        edges = [
+            (u, v) for u, v, d in graph.edges(data=True)
+            if u != v and ESTILOS_ARISTA.get(d.get('direction'), ESTILOS_ARISTA['default']) is props
+        ]
+        if not edges:
+            continue
+        curvas, puntas, tangentes, _, _ = geometria_aristas(edges, pos)
+        lineas = LineCollection(curvas, colors=props['color'], linewidths=props['linewidth'], zorder=1)
+        ax.add_collection(lineas)
+        flechas = ax.quiver(
+            puntas[:, 0], puntas[:, 1],
+            tangentes[:, 0] * LARGO_FLECHA, tangentes[:, 1] * LARGO_FLECHA,
+            angles='xy', scale_units='xy', scale=1, pivot='tip',
+            color=props['color'], width=0.002, headwidth=8, headlength=10, headaxislength=9,
+            zorder=2,
+        )
+        artistas.extend([lineas, flechas])
+    return artistas
+
+
+def puntos_etiquetas(graph, pos):
+    """
+    Dónde va cada etiqueta, para elegir rápido las que están a la vista.
+
+    Retorna ``(nodos, xy_nodos, aristas, xy_aristas)``; el punto de una arista
+    es el medio del segmento entre sus nodos.
+    """
+    nodos = [n for n in graph.nodes() if n in pos]
+    aristas = [(u, v) for u, v in graph.edges() if u != v and u in pos and v in pos]
+    xy_nodos = np.array([pos[n] for n in nodos], dtype=float).reshape(-1, 2)
+    xy_aristas = (np.array([pos[u] for u, _ in aristas], dtype=float).reshape(-1, 2)
+                  + np.array([pos[v] for _, v in aristas], dtype=float).reshape(-1, 2)) / 2
+    return nodos, xy_nodos, aristas, xy_aristas
+
+
+def seleccionar_etiquetas(puntos, limites, maximo=MAX_ETIQUETAS):
+    """
+    Nodos y aristas de ``puntos_etiquetas`` dentro de ``limites`` ``((x0, x1), (y0, y1))``.
+
+    Si no caben todas en ``maximo`` se descartan primero las de las aristas
+    y después las de los nodos: con tantas a la vista no se podrían leer y
+    cada una cuesta un ``Text`` con su caja en cada dibujo.
+    """
+    nodos, xy_nodos, aristas, xy_aristas = puntos
+    (x0, x1), (y0, y1) = (sorted(limites[0]), sorted(limites[1]))
+
+    def dentro(xy):
+        return np.flatnonzero((xy[:, 0] >= x0) & (xy[:, 0] <= x1) & (xy[:, 1] >= y0) & (xy[:, 1] <= y1))
+
+    indices_nodos = dentro(xy_nodos)
+    if len(indices_nodos) > maximo:
+        return [], []
+    indices_aristas = dentro(xy_aristas)
+    if len(indices_nodos) + len(indices_aristas) > maximo:
+        indices_aristas = []
+    return [nodos[i] for i in indices_nodos], [aristas[i] for i in indices_aristas]
+
+
+def dibujar_etiquetas_aristas(ax, graph, pos, edges=None):
+    """Etiquetas de capacidad de ``edges`` (por defecto todas) con posiciones y ángulos vectorizados."""
+    if edges is None:
+        edges = [(u, v) for u, v in graph.edges() if u != v]
+    _, _, _, centros, angulos = geometria_aristas(edges, pos)
+    textos = []
+    for (u, v), (x, y), angulo in zip(edges, centros, angulos):
+        texto = ax.text(
+            x, y, f"{graph.edges[u, v].get('capacidad', 0)} L/s",
+            fontsize=10, color='blue', ha='center', va='center',
+            rotation=angulo, rotation_mode='anchor', bbox=CAJA_CAPACIDAD, zorder=3,
+        )
+        textos.append(((u, v), texto))
+    return textos
+
+
+def dibujar_etiquetas_nodos(ax, graph, pos, nodos=None):
+    """Nombre de cada nodo de ``nodos`` (por defecto todos) y capacidad de los tanques."""
+    if nodos is None:
+        nodos = list(graph.nodes())
+    textos = []
+    for node in nodos:
+        if node not in pos:
+            continue
+        node_data = graph.nodes[node]
+        x, y = pos[node]
+        textos.append((node, ax.text(x, y + 0.2, node, ha='center', va='bottom', fontsize=8,
+                                     bbox=CAJA_ETIQUETA, zorder=11)))
+        if node_data.get('type') == 'tank':
+            capacity_text = f"{node_data.get('current_capacity', 0)}/{node_data.get('max_capacity', 0)}L"
+            textos.append((node, ax.text(x, y - 0.2, capacity_text, ha='center', va='top', fontsize=7,
+                                         bbox=CAJA_ETIQUETA, zorder=11)))
+    return textos
+
+
+def reducir_icono(icono, pixeles=PIXELES_ICONO):
+    """Reducir un ícono RGBA a ``pixeles`` x ``pixeles`` (vecino más cercano)."""
+    icono = np.asarray(icono)
+    filas = np.linspace(0, icono.shape[0] - 1, pixeles).astype(int)
+    columnas = np.linspace(0, icono.shape[1] - 1, pixeles).astype(int)
+    icono = icono[filas][:, columnas].astype(float)
+    if icono.ndim == 2:
+        icono = np.stack([icono] * 3 + [np.ones_like(icono)], axis=-1)
+    elif icono.shape[2] == 3:
+        icono = np.concatenate([icono, np.ones(icono.shape[:2] + (1,))], axis=-1)
+    if icono.max() > 1:
+        icono = icono / 255.0
+    return icono
+
+
+def dibujar_iconos(ax, graph, pos, iconos, reducidos=None):
+    """
+    Dibujar los íconos de todos los nodos con un solo ``imshow``.
+
+    Cada ícono se reduce con ``reducir_icono`` y se pega en un atlas RGBA
+    que cubre todos los nodos; el atlas se muestra como una única imagen en
+    lugar de una imagen por nodo. ``reducidos`` es un dict opcional
+    ``(tipo, lado) -> ícono reducido`` que se reutiliza entre dibujos.
+    """
+    nodos = [(n, d.get('type')) for n, d in graph.nodes(data=True) if n in pos and d.get('type') in iconos]
+    if not nodos:
+        return None
+
+    coords = np.array([pos[n] for n, _ in nodos], dtype=float)
+    xmin, ymin = coords.min(axis=0) - RADIO_ICONO
+    xmax, ymax = coords.max(axis=0) + RADIO_ICONO
+
+    # Píxeles por unidad para que cada ícono ocupe PIXELES_ICONO, limitado en tamaño total
+    ppu = PIXELES_ICONO / (2 * RADIO_ICONO)
+    ancho, alto = (xmax - xmin) * ppu, (ymax - ymin) * ppu
+    if ancho * alto > MAX_PIXELES_ATLAS:
+        ppu *= (MAX_PIXELES_ATLAS / (ancho * alto)) ** 0.5
+    lado = max(1, int(round(2 * RADIO_ICONO * ppu)))
+    ancho = int(np.ceil((xmax - xmin) * ppu)) + lado
+    alto = int(np.ceil((ymax - ymin) * ppu)) + lado
+
+    atlas = np.zeros((alto, ancho, 4))
+    if reducidos is None:
+        reducidos = {}
+    for tipo, icono in iconos.items():
+        if (tipo, lado) not in reducidos:
+            reducidos[(tipo, lado)] = reducir_icono(icono, lado)
+    columnas = np.clip(np.round((coords[:, 0] - RADIO_ICONO - xmin) * ppu).astype(int), 0, ancho - lado)
+    filas = np.clip(np.round((ymax - coords[:, 1] - RADIO_ICONO) * ppu).astype(int), 0, alto - lado)
+    for (_, tipo), fila, columna in zip(nodos, filas, columnas):
+        icono = reducidos[(tipo, lado)]
+        destino = atlas[fila:fila + lado, columna:columna + lado]
+        alfa = icono[:, :, 3:4]
+        destino[:] = icono * alfa + destino * (1 - alfa)
+
+    extent = (xmin, xmin + ancho / ppu, ymax - alto / ppu, ymax)
+    return ax.imshow(atlas, extent=extent, interpolation='nearest', zorder=10)
+
+
+def dibujar_nombres_barrios(ax, data, pos):
+    """Nombre de cada barrio sobre sus nodos."""
+    textos = []
+    for neighborhood in data:
+        coords = [pos[element['name']] for element in neighborhood['elements'] if element['name'] in pos]
+        if not coords:
+            continue
+        coords = np.array(coords)
+        center_x = (coords[:, 0].max() + coords[:, 0].min()) / 2
+        center_y = coords[:, 1].max() + 0.5  # Posicionar sobre los nodos
+        textos.append((neighborhood['name'], ax.text(
+            center_x, center_y, neighborhood['name'],
+            ha='center', va='bottom', fontsize=12, fontweight='bold', bbox=CAJA_ETIQUETA,
+        )))
+    return textos
+
+
+def dibujar_red(ax, graph, pos, data, iconos, reducidos=None, puntos=None):
+    """
+    Dibujar la red en ``ax`` y devolver sus artistas agrupados.
+
+    Las etiquetas de nodos y aristas se limitan a las que entran en la vista
+    (``seleccionar_etiquetas``); ``puntos`` evita recalcular ``puntos_etiquetas``.
+    """
+    artistas = {
+        'iconos': dibujar_iconos(ax, graph, pos, iconos, reducidos),
+        'aristas': dibujar_aristas(ax, graph, pos),
+        'barrios': dibujar_nombres_barrios(ax, data, pos),
+    }
+    ax.autoscale_view()
+    ax.axis('off')
+    if puntos is None:
+        puntos = puntos_etiquetas(graph, pos)
+    nodos, edges = seleccionar_etiquetas(puntos, (ax.get_xlim(), ax.get_ylim()))
+    artistas['etiquetas_nodos'] = dibujar_etiquetas_nodos(ax, graph, pos, nodos)
+    artistas['etiquetas_aristas'] = dibujar_etiquetas_aristas(ax, graph, pos, edges)
+    return artistas
+
+
+class RenderizadorRed:
+    """
+    Dibujo persistente de la red sobre una figura de matplotlib.
+
+    Los íconos se decodifican una sola vez y los artistas se conservan entre
+    dibujos. Si una edición solo cambia atributos (capacidad de una tubería,
+    capacidad de un tanque) el texto se actualiza en su lugar; las etiquetas
+    son artistas animados que se redibujan con blitting sobre el fondo
+    guardado, sin volver a dibujar toda la figura.
+
+    Solo se crean las etiquetas que entran en la vista; al hacer zoom o
+    desplazarse con la barra de navegación se vuelven a elegir una vez por
+    dibujo (aunque cambien los límites de los dos ejes).
+    """
+
+    def __init__(self, figure, canvas, iconos=None):
+        self.figure = figure
+        self.canvas = canvas
+        self.iconos = iconos if iconos is not None else cargar_iconos()
+        self._reducidos = {}
+        self.ax = None
+        self.pos = {}
+        self.graph = None
+        self._puntos = None
+        self._limites = None
+        self._etiquetas_aristas = {}
+        self._etiquetas_nodos = {}
+        self._fondo = None
+        self.canvas.mpl_connect('draw_event', self._al_dibujar)
+
+    def dibujar(self, graph, pos, data):
+        """Dibujo completo: limpia la figura y recrea todos los artistas."""
+        self.figure.clear()
+        self.ax = self.figure.add_subplot(111)
+        self.graph = graph
+        self.pos = dict(pos)
+        self._puntos = puntos_etiquetas(graph, pos)
+        artistas = dibujar_red(self.ax, graph, pos, data, self.iconos, self._reducidos, self._puntos)
+        self._guardar_etiquetas(artistas['etiquetas_nodos'], artistas['etiquetas_aristas'])
+        self._limites = (self.ax.get_xlim(), self.ax.get_ylim())
+
+        self.canvas.draw()
+
+    def _guardar_etiquetas(self, etiquetas_nodos, etiquetas_aristas):
+        self._etiquetas_aristas = dict(etiquetas_aristas)
+        for texto in self._etiquetas_aristas.values():
+            texto.set_animated(True)
+        self._etiquetas_nodos = {}
+        for node, texto in etiquetas_nodos:
+            texto.set_animated(True)
+            self._etiquetas_nodos.setdefault(node, []).append(texto)
+
+    def _elegir_etiquetas(self, limites):
+        """Zoom o desplazamiento: volver a elegir las etiquetas de la vista nueva."""
+        for textos in self._etiquetas_nodos.values():
+            for texto in textos:
+                texto.remove()
+        for texto in self._etiquetas_aristas.values():
+            texto.remove()
+        nodos, edges = seleccionar_etiquetas(self._puntos, limites)
+        # La red pudo cambiar después del último dibujo completo (el layout corre aparte)
+        nodos = [n for n in nodos if self.graph.has_node(n)]
+        edges = [(u, v) for u, v in edges if self.graph.has_edge(u, v)]
+        self._guardar_etiquetas(dibujar_etiquetas_nodos(self.ax, self.graph, self.pos, nodos),
+                                dibujar_etiquetas_aristas(self.ax, self.graph, self.pos, edges))
+
+    def cambiar_grafo(self, graph):
+        """Seguir con ``graph``, que tiene el mismo contenido que el dibujado (no se redibuja)."""
+        self.graph = graph
+
+    def puede_actualizar(self, graph, cambios):
+        """True si los cambios son solo de atributos y pueden aplicarse en su lugar."""
+        if self.ax is None or cambios.estructura:
+            return False
+        return all(self.pos.get(n) is not None for n in cambios.nodos if graph.has_node(n))
+
+    def actualizar(self, graph, cambios):
+        """Actualizar en su lugar los textos afectados por ``cambios``."""
+        for node in cambios.nodos:
+            if not graph.has_node(node) or node not in self._etiquetas_nodos:
+                continue
+            node_data = graph.nodes[node]
+            textos = self._etiquetas_nodos[node]
+            if node_data.get('type') == 'tank' and len(textos) > 1:
+                capacity_text = f"{node_data.get('current_capacity', 0)}/{node_data.get('max_capacity', 0)}L"
+                if textos[1].get_text() != capacity_text:
+                    textos[1].set_text(capacity_text)
+
+        for u, v in cambios.aristas:
+            texto = self._etiquetas_aristas.get((u, v))
+            if texto is not None and graph.has_edge(u, v):
+                texto.set_text(f"{graph.edges[u, v].get('capacidad', 0)} L/s")
+
+        if self._fondo is None:
+            # Sin fondo guardado hace falta un dibujo del canvas (que además lo guarda)
+            self.canvas.draw_idle()
+        else:
+            self._blit()
+
+    def _al_dibujar(self, event):
+        """
+        Tras cada dibujo completo guardar el fondo y pintar las etiquetas animadas.
+
+        Si el zoom o el desplazamiento cambiaron los límites desde el dibujo
+        anterior, antes se vuelven a elegir las etiquetas: una sola vez por
+        dibujo, aunque se hayan cambiado los dos ejes por separado.
+        """
+        if self.ax is None:
+            return
+        limites = (self.ax.get_xlim(), self.ax.get_ylim())
+        if limites != self._limites:
+            self._limites = limites
+            self._elegir_etiquetas(limites)
+        self._fondo = self.canvas.copy_from_bbox(self.figure.bbox)
+        self._dibujar_animados()
+
+    def _dibujar_animados(self):
+        for textos in self._etiquetas_nodos.values():
+            for texto in textos:
+                self.ax.draw_artist(texto)
+        for texto in self._etiquetas_aristas.values():
+            self.ax.draw_artist(texto)
+
+    def _blit(self):
+        self.canvas.restore_region(self._fondo)
+        self._dibujar_animados()
+        self.canvas.blit(self.figure.bbox)
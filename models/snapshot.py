@@ -0,0 +1,600 @@
+"""
+Snapshot binario de la red: arreglos planos que se abren con memmap.
+
+El archivo ``<nombre>.snap`` tiene una cabecera JSON y a continuación los
+arreglos alineados a 64 bytes:
+
+- Tabla de cadenas: nombres de elementos, barrios, tipos y destinos,
+  separados por NUL. El id de cada elemento es su posición en la tabla.
+- Elementos: barrio, tipo y capacidades por id.
+- Conexiones del JSON en CSR por elemento dueño (destino, prefijo, capacidad).
+- Grafo en CSR en el orden de nodos y vecinos de ``networkx`` (destino,
+  capacidad y dirección).
+
+La cabecera guarda además el hash de cada barrio (``hash_barrio``), para
+reutilizar la caché de layout sin recorrer el grafo.
+
+El JSON sigue siendo el formato de intercambio; el snapshot es un acelerador
+que se regenera cuando el JSON cambia.
+"""
+import json
+import os
+
+import networkx as nx
+import numpy as np
+
+from models.carga import leer_red_en_flujo
+from models.layout import hash_barrio
+from models.red import WaterNetwork, atributos_nodo, separar_destino
+
+MAGIA = b'REDSNAP1'
+VERSION_SNAPSHOT = 2
+ALINEACION = 64
+MIN_BYTES_SNAPSHOT = 16 << 20  # JSON más chicos se leen rápido: no vale la pena el snapshot
+PASO_PROGRESO = 1 << 14  # nodos, aristas o elementos entre avisos al callback
+
+PREFIJOS = ('', '+', '-')
+DIRECCIONES = ('both', 'right')
+CLAVES_ELEMENTO = ('name', 'type', 'max_capacity', 'current_capacity', 'connections')
+
+
+def ruta_snapshot(file_path):
+    """Snapshot que acompaña a un JSON de red."""
+    return os.path.splitext(file_path)[0] + '.snap'
+
+
+def firma_archivo(file_path):
+    """Tamaño y fecha de modificación, para saber si el snapshot sigue vigente."""
+    estado = os.stat(file_path)
+    return {'tamano': estado.st_size, 'mtime_ns': estado.st_mtime_ns}
+
+
+def _numeros(arreglos, nombre, valores):
+    """
+    Guardar una columna numérica como int64 si todos son enteros (lo habitual).
+
+    Si se mezclan enteros y reales se guarda en float64 con una máscara
+    ``<nombre>_entero`` para no convertir 5 en 5.0 al volver al JSON.
+    """
+    enteros = [isinstance(v, int) and not isinstance(v, bool) for v in valores]
+    if all(enteros):
+        arreglos[nombre] = np.array(valores, dtype=np.int64)
+    else:
+        arreglos[nombre] = np.array(valores, dtype=np.float64)
+        arreglos[nombre + '_entero'] = np.array(enteros, dtype=bool)
+
+
+def _leer_numeros(arreglos, nombre, inicio=None, fin=None):
+    valores = arreglos[nombre][inicio:fin].tolist()
+    if nombre + '_entero' in arreglos:
+        enteros = arreglos[nombre + '_entero'][inicio:fin].tolist()
+        valores = [int(v) if entero else v for v, entero in zip(valores, enteros)]
+    return valores
+
+
+def _es_canonico(element):
+    # Claves habituales en el orden habitual; 'connections' puede ir en cualquier lugar
+    claves = [k for k in element if k != 'connections']
+    return claves == [k for k in CLAVES_ELEMENTO if k in element and k != 'connections'] and 'name' in element
+
+
+def guardar_snapshot(ruta, data, graph, origen=None):
+    """
+    Escribir el snapshot de ``data`` y su grafo (reemplazo atómico).
+
+    ``origen`` es la firma del JSON del que salen los datos (``firma_archivo``).
+    Los elementos con claves fuera de las habituales se guardan completos en
+    la cabecera.
+    """
+    cadenas = {}
+
+    def id_cadena(texto):
+        if texto not in cadenas:
+            if '\0' in texto:
+                raise ValueError(f"Nombre no válido para el snapshot: {texto!r}")
+            cadenas[texto] = len(cadenas)
+        return cadenas[texto]
+
+    elementos = [(b, element) for b, neighborhood in enumerate(data) for element in neighborhood['elements']]
+    for _, element in elementos:
+        id_cadena(element['name'])
+    if len(cadenas) != len(elementos):
+        raise ValueError("Hay elementos con nombres repetidos")
+
+    barrios = np.array([id_cadena(neighborhood['name']) for neighborhood in data], dtype=np.int32)
+    nodo_barrio = np.array([b for b, _ in elementos], dtype=np.int32)
+    nodo_tipo = np.array([id_cadena(e['type']) if 'type' in e else -1 for _, e in elementos], dtype=np.int32)
+    tiene_max = np.array(['max_capacity' in e for _, e in elementos], dtype=bool)
+    tiene_actual = np.array(['current_capacity' in e for _, e in elementos], dtype=bool)
+    # Posición de la clave 'connections' para reconstruir el JSON tal cual (-1 si falta)
+    posicion_conexiones = np.array(
+        [list(e).index('connections') if 'connections' in e else -1 for _, e in elementos], dtype=np.int8
+    )
+
+    especiales = {}
+    conexion_inicio = [0]
+    destinos, prefijos, capacidades = [], [], []
+    for i, (_, element) in enumerate(elementos):
+        if not _es_canonico(element):
+            especiales[str(i)] = {k: v for k, v in element.items() if k != 'connections'}
+        for conn in element.get('connections', []):
+            prefijo, otro = separar_destino(conn['target'])
+            destinos.append(id_cadena(otro))
+            prefijos.append(PREFIJOS.index(prefijo))
+            capacidades.append(conn.get('capacity', 0))
+        conexion_inicio.append(len(destinos))
+
+    # Grafo en el orden de networkx (puede diferir del JSON tras ediciones)
+    grafo_nodos = np.array([id_cadena(n) for n in graph.nodes()], dtype=np.int32)
+    arista_inicio = [0]
+    arista_destino, arista_capacidad, arista_direccion = [], [], []
+    for u in graph.nodes():
+        for v, attrs in graph.adj[u].items():
+            arista_destino.append(id_cadena(v))
+            arista_capacidad.append(attrs.get('capacidad', 0))
+            arista_direccion.append(DIRECCIONES.index(attrs.get('direction', 'both')))
+        arista_inicio.append(len(arista_destino))
+
+    texto = '\0'.join(cadenas).encode('utf-8')
+    arreglos = {
+        'cadenas': np.frombuffer(texto, dtype=np.uint8),
+        'barrios': barrios,
+        'nodo_barrio': nodo_barrio,
+        'nodo_tipo': nodo_tipo,
+        'tiene_max': tiene_max,
+        'tiene_actual': tiene_actual,
+        'posicion_conexiones': posicion_conexiones,
+        'conexion_inicio': np.array(conexion_inicio, dtype=np.int64),
+        'conexion_destino': np.array(destinos, dtype=np.int32),
+        'conexion_prefijo': np.array(prefijos, dtype=np.int8),
+        'grafo_nodos': grafo_nodos,
+        'arista_inicio': np.array(arista_inicio, dtype=np.int64),
+        'arista_destino': np.array(arista_destino, dtype=np.int32),
+        'arista_direccion': np.array(arista_direccion, dtype=np.int8),
+    }
+    _numeros(arreglos, 'nodo_max', [e.get('max_capacity', 0) for _, e in elementos])
+    _numeros(arreglos, 'nodo_actual', [e.get('current_capacity', 0) for _, e in elementos])
+    _numeros(arreglos, 'conexion_capacidad', capacidades)
+    _numeros(arreglos, 'arista_capacidad', arista_capacidad)
+    _escribir(ruta, arreglos, {
+        'version': VERSION_SNAPSHOT,
+        'origen': origen,
+        'num_cadenas': len(cadenas),
+        'num_elementos': len(elementos),
+        'especiales': especiales,
+        'hashes': [hash_barrio(graph, [e['name'] for e in neighborhood['elements']]) for neighborhood in data],
+    })
+
+
+def _alinear(n):
+    return (n + ALINEACION - 1) // ALINEACION * ALINEACION
+
+
+def _escribir(ruta, arreglos, cabecera):
+    # Calcular los desplazamientos con una cabecera de tamaño fijo para la primera pasada
+    descripcion = {}
+    cabecera = dict(cabecera, arreglos=descripcion)
+    for nombre, arreglo in arreglos.items():
+        descripcion[nombre] = {'dtype': arreglo.dtype.str, 'shape': list(arreglo.shape), 'offset': 0}
+    largo_cabecera = len(json.dumps(cabecera).encode('utf-8')) + 32 * len(arreglos)
+    offset = _alinear(len(MAGIA) + 8 + largo_cabecera)
+    for nombre, arreglo in arreglos.items():
+        descripcion[nombre]['offset'] = offset
+        offset = _alinear(offset + arreglo.nbytes)
+    texto = json.dumps(cabecera).encode('utf-8').ljust(largo_cabecera)
+
+    temporal = ruta + '.tmp'
+    with open(temporal, 'wb') as f:
+        f.write(MAGIA)
+        f.write(np.uint64(len(texto)).tobytes())
+        f.write(texto)
+        for nombre, arreglo in arreglos.items():
+            f.seek(descripcion[nombre]['offset'])
+            f.write(np.ascontiguousarray(arreglo).tobytes())
+        f.truncate(offset)
+    os.replace(temporal, ruta)
+
+
+class Snapshot:
+    """
+    Vista perezosa de un snapshot abierto con memmap.
+
+    Abrir solo lee la cabecera; los arreglos se paginan desde el disco al
+    usarlos. ``grafo()``, ``datos()`` y ``red()`` materializan (y guardan)
+    las estructuras de ``networkx`` y del JSON solo cuando se piden;
+    ``esqueleto()`` y ``hashes_barrios()`` dan lo que necesitan el layout y
+    el dibujo sin armar los datos.
+    """
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        with open(ruta, 'rb') as f:
+            if f.read(len(MAGIA)) != MAGIA:
+                raise ValueError(f"{ruta} no es un snapshot de red")
+            largo = int(np.frombuffer(f.read(8), dtype=np.uint64)[0])
+            self.cabecera = json.loads(f.read(largo).decode('utf-8'))
+        if self.cabecera.get('version') != VERSION_SNAPSHOT:
+            raise ValueError(f"Versión de snapshot no soportada: {self.cabecera.get('version')}")
+
+        self.arreglos = {}
+        for nombre, d in self.cabecera['arreglos'].items():
+            if int(np.prod(d['shape'])) == 0:
+                self.arreglos[nombre] = np.zeros(d['shape'], dtype=d['dtype'])
+            else:
+                self.arreglos[nombre] = np.memmap(ruta, dtype=d['dtype'], mode='r',
+                                                  offset=d['offset'], shape=tuple(d['shape']))
+        self._cadenas = None
+        self._posiciones = None
+        self._grafo = None
+        self._datos = None
+        self._esqueleto = None
+
+    def cerrar(self):
+        """
+        Soltar los memmaps del archivo.
+
+        En Windows un archivo mapeado no se puede reemplazar; el grafo, los
+        datos y los nombres ya materializados siguen disponibles.
+        """
+        self.arreglos = {}
+
+    # ------------------------------------------------------------------
+    # Consultas sin materializar el grafo
+    # ------------------------------------------------------------------
+    def vigente_para(self, file_path):
+        """True si el snapshot se generó a partir del estado actual de ``file_path``."""
+        try:
+            return self.cabecera.get('origen') == firma_archivo(file_path)
+        except OSError:
+            return False
+
+    @property
+    def num_nodos(self):
+        return len(self.arreglos['grafo_nodos'])
+
+    @property
+    def num_aristas(self):
+        return len(self.arreglos['arista_destino'])
+
+    def cadenas(self):
+        if self._cadenas is None:
+            texto = self.arreglos['cadenas'].tobytes().decode('utf-8')
+            self._cadenas = texto.split('\0') if self.cabecera['num_cadenas'] else []
+        return self._cadenas
+
+    def _posicion(self, nombre):
+        """Índice de ``nombre`` en el CSR del grafo."""
+        if self._posiciones is None:
+            cadenas = self.cadenas()
+            self._posiciones = {cadenas[i]: k for k, i in enumerate(self.arreglos['grafo_nodos'].tolist())}
+        if nombre not in self._posiciones:
+            raise KeyError(f"No existe el elemento '{nombre}'")
+        return self._posiciones[nombre]
+
+    def barrio_names(self):
+        cadenas = self.cadenas()
+        return [cadenas[i] for i in self.arreglos['barrios'].tolist()]
+
+    def sucesores(self, nombre):
+        """Tuberías que salen de ``nombre``: ``[(destino, capacidad, direccion)]``."""
+        cadenas = self.cadenas()
+        i = self._posicion(nombre)
+        inicio, fin = int(self.arreglos['arista_inicio'][i]), int(self.arreglos['arista_inicio'][i + 1])
+        return [
+            (cadenas[d], c, DIRECCIONES[r])
+            for d, c, r in zip(self.arreglos['arista_destino'][inicio:fin].tolist(),
+                               _leer_numeros(self.arreglos, 'arista_capacidad', inicio, fin),
+                               self.arreglos['arista_direccion'][inicio:fin].tolist())
+        ]
+
+    # ------------------------------------------------------------------
+    # Materialización
+    # ------------------------------------------------------------------
+    def _columnas(self):
+        """Columnas de los elementos como listas de Python (para armarlos de a uno)."""
+        a = self.arreglos
+        return (a['nodo_tipo'].tolist(), a['tiene_max'].tolist(), a['tiene_actual'].tolist(),
+                _leer_numeros(a, 'nodo_max'), _leer_numeros(a, 'nodo_actual'))
+
+    def _elemento(self, i, columnas):
+        """Elemento ``i`` del JSON sin conexiones."""
+        especiales = self.cabecera['especiales']
+        if str(i) in especiales:
+            return dict(especiales[str(i)])
+        cadenas = self.cadenas()
+        tipos, tiene_max, tiene_actual, maximos, actuales = columnas
+        element = {'name': cadenas[i]}
+        if tipos[i] >= 0:
+            element['type'] = cadenas[tipos[i]]
+        if tiene_max[i]:
+            element['max_capacity'] = maximos[i]
+        if tiene_actual[i]:
+            element['current_capacity'] = actuales[i]
+        return element
+
+    def _elementos(self):
+        """Elementos del JSON sin conexiones, en el orden del archivo."""
+        columnas = self._columnas()
+        return [self._elemento(i, columnas) for i in range(self.cabecera['num_elementos'])]
+
+    def grafo(self, callback=None):
+        """
+        ``nx.DiGraph`` equivalente al guardado (se construye una sola vez).
+
+        ``callback(hechos, total)`` recibe el avance en nodos y aristas; si
+        devuelve True la construcción se abandona y se retorna None.
+        """
+        if self._grafo is None:
+            a = self.arreglos
+            cadenas = self.cadenas()
+            # Los elementos habituales ya son sus atributos de nodo: no hace falta copiarlos
+            atributos = self._elementos()
+            for i in self.cabecera['especiales']:
+                atributos[int(i)] = atributos_nodo(atributos[int(i)])
+            num_elementos = self.cabecera['num_elementos']
+            nodos = [(cadenas[i], atributos[i]) if i < num_elementos else cadenas[i]
+                     for i in a['grafo_nodos'].tolist()]
+            origenes = np.repeat(a['grafo_nodos'], np.diff(a['arista_inicio'])).tolist()
+            aristas = list(zip(origenes, a['arista_destino'].tolist(),
+                               _leer_numeros(a, 'arista_capacidad'), a['arista_direccion'].tolist()))
+            total = len(nodos) + len(aristas)
+
+            G = nx.DiGraph()
+            for inicio in range(0, len(nodos), PASO_PROGRESO):
+                G.add_nodes_from(nodos[inicio:inicio + PASO_PROGRESO])
+                if callback is not None and callback(min(inicio + PASO_PROGRESO, len(nodos)), total):
+                    return None
+            for inicio in range(0, len(aristas), PASO_PROGRESO):
+                G.add_edges_from(
+                    (cadenas[u], cadenas[v], {'capacidad': c, 'direction': DIRECCIONES[r]})
+                    for u, v, c, r in aristas[inicio:inicio + PASO_PROGRESO]
+                )
+                if callback is not None and callback(len(nodos) + min(inicio + PASO_PROGRESO, len(aristas)), total):
+                    return None
+            self._grafo = G
+        return self._grafo
+
+    def datos(self, callback=None):
+        """
+        Lista de barrios con el mismo contenido que el JSON original.
+
+        ``callback(hechos, total)`` recibe el avance en elementos; si
+        devuelve True se abandona y se retorna None.
+        """
+        if self._datos is None:
+            a = self.arreglos
+            cadenas = self.cadenas()
+            elementos = self._elementos()
+            inicio = a['conexion_inicio'].tolist()
+            destinos = a['conexion_destino'].tolist()
+            prefijos = a['conexion_prefijo'].tolist()
+            capacidades = _leer_numeros(a, 'conexion_capacidad')
+            posiciones = a['posicion_conexiones'].tolist()
+            for i, element in enumerate(elementos):
+                if callback is not None and i % PASO_PROGRESO == 0 and callback(i, len(elementos)):
+                    return None
+                if posiciones[i] < 0:
+                    continue
+                conexiones = [
+                    {'target': PREFIJOS[prefijos[k]] + cadenas[destinos[k]],
+                     'capacity': capacidades[k]}
+                    for k in range(inicio[i], inicio[i + 1])
+                ]
+                if posiciones[i] >= len(element):
+                    element['connections'] = conexiones
+                else:
+                    claves = list(element.items())
+                    claves.insert(posiciones[i], ('connections', conexiones))
+                    elementos[i] = dict(claves)
+
+            data = [{'name': name, 'elements': []} for name in self.barrio_names()]
+            for b, element in zip(a['nodo_barrio'].tolist(), elementos):
+                data[b]['elements'].append(element)
+            self._datos = data
+        return self._datos
+
+    def esqueleto(self):
+        """
+        Barrios con solo el nombre de cada elemento (sin armar los datos completos).
+
+        Alcanza para el layout y el dibujo, que solo miran los nombres.
+        """
+        if self._esqueleto is None:
+            cadenas = self.cadenas()
+            data = [{'name': name, 'elements': []} for name in self.barrio_names()]
+            for i, b in enumerate(self.arreglos['nodo_barrio'].tolist()):
+                data[b]['elements'].append({'name': cadenas[i]})
+            self._esqueleto = data
+        return self._esqueleto
+
+    def hashes_barrios(self):
+        """``hash_barrio`` de cada barrio, en el orden de ``barrio_names()``."""
+        return self.cabecera['hashes']
+
+    def red(self):
+        """``WaterNetwork`` editable con los datos y el grafo del snapshot."""
+        return WaterNetwork(self.datos(), self.grafo())
+
+    def vista(self):
+        """``VistaGrafo`` de solo lectura: el grafo para dibujar sin construir el ``nx.DiGraph``."""
+        return VistaGrafo(self)
+
+
+class _NodosVista:
+    """``graph.nodes`` de una ``VistaGrafo``: iterable, invocable y con ``[nombre]``."""
+
+    def __init__(self, vista):
+        self._vista = vista
+
+    def __call__(self, data=False):
+        if not data:
+            return iter(self._vista._nombres)
+        return ((nombre, self._vista._atributos(k)) for k, nombre in enumerate(self._vista._nombres))
+
+    def __iter__(self):
+        return iter(self._vista._nombres)
+
+    def __len__(self):
+        return len(self._vista._nombres)
+
+    def __contains__(self, nombre):
+        return self._vista.has_node(nombre)
+
+    def __getitem__(self, nombre):
+        return self._vista._atributos(self._vista._indice(nombre))
+
+
+class _AristasVista:
+    """``graph.edges`` de una ``VistaGrafo``: iterable, invocable y con ``[u, v]``."""
+
+    def __init__(self, vista):
+        self._vista = vista
+
+    def __call__(self, data=False):
+        v = self._vista
+        nombres, inicio, destinos = v._nombres, v._inicio, v._destinos
+        for k, u in enumerate(nombres):
+            for j in range(inicio[k], inicio[k + 1]):
+                if data:
+                    yield u, destinos[j], v._atributos_arista(j)
+                else:
+                    yield u, destinos[j]
+
+    def __iter__(self):
+        return self()
+
+    def __len__(self):
+        return len(self._vista._destinos)
+
+    def __getitem__(self, arista):
+        u, v = arista
+        j = self._vista._arista(u, v)
+        if j is None:
+            raise KeyError(f"No existe la tubería {u} -> {v}")
+        return self._vista._atributos_arista(j)
+
+
+class VistaGrafo:
+    """
+    Grafo de solo lectura sobre los arreglos de un ``Snapshot``.
+
+    Tiene la parte de la API de ``nx.DiGraph`` que usa el dibujo (``nodes``,
+    ``edges``, ``has_node``, ``has_edge``, ``number_of_nodes``...) con el
+    mismo orden de nodos y aristas que ``Snapshot.grafo()``, pero sin armar
+    un diccionario por nodo ni por arista: los atributos se arman al
+    pedirlos. Copia las columnas que usa al crearse, así que sigue
+    sirviendo después de ``Snapshot.cerrar()``.
+    """
+
+    def __init__(self, snapshot):
+        a = snapshot.arreglos
+        cadenas = snapshot.cadenas()
+        self._snapshot = snapshot
+        self._ids = a['grafo_nodos'].tolist()
+        self._nombres = [cadenas[i] for i in self._ids]
+        self._inicio = a['arista_inicio'].tolist()
+        self._destinos = [cadenas[d] for d in a['arista_destino'].tolist()]
+        self._capacidades = _leer_numeros(a, 'arista_capacidad')
+        self._direcciones = a['arista_direccion'].tolist()
+        self._columnas = snapshot._columnas()
+        self._num_elementos = snapshot.cabecera['num_elementos']
+        self._especiales = {int(i) for i in snapshot.cabecera['especiales']}
+        self._posiciones = None
+        self.nodes = _NodosVista(self)
+        self.edges = _AristasVista(self)
+
+    def _indice(self, nombre):
+        if self._posiciones is None:
+            self._posiciones = {nombre: k for k, nombre in enumerate(self._nombres)}
+        return self._posiciones[nombre]
+
+    def _atributos(self, k):
+        i = self._ids[k]
+        if i >= self._num_elementos:
+            return {}  # Nodo que solo aparece como destino de una conexión
+        element = self._snapshot._elemento(i, self._columnas)
+        return atributos_nodo(element) if i in self._especiales else element
+
+    def _arista(self, u, v):
+        """Posición de la tubería ``u -> v`` en el CSR, o None."""
+        try:
+            k = self._indice(u)
+        except KeyError:
+            return None
+        for j in range(self._inicio[k], self._inicio[k + 1]):
+            if self._destinos[j] == v:
+                return j
+        return None
+
+    def _atributos_arista(self, j):
+        return {'capacidad': self._capacidades[j], 'direction': DIRECCIONES[self._direcciones[j]]}
+
+    def __iter__(self):
+        return iter(self._nombres)
+
+    def __len__(self):
+        return len(self._nombres)
+
+    def __contains__(self, nombre):
+        return self.has_node(nombre)
+
+    def has_node(self, nombre):
+        try:
+            self._indice(nombre)
+        except (KeyError, TypeError):
+            return False
+        return True
+
+    def has_edge(self, u, v):
+        return self._arista(u, v) is not None
+
+    def number_of_nodes(self):
+        return len(self._nombres)
+
+    def number_of_edges(self):
+        return len(self._destinos)
+
+
+def abrir_snapshot(file_path):
+    """Snapshot de ``file_path`` abierto si sigue vigente; si no lo hay (o el JSON cambió), None."""
+    ruta = ruta_snapshot(file_path)
+    if not os.path.exists(ruta):
+        return None
+    try:
+        snapshot = Snapshot(ruta)
+    except (OSError, ValueError):
+        return None  # Snapshot dañado o de otra versión: se regenera
+    if snapshot.vigente_para(file_path):
+        return snapshot
+    snapshot.cerrar()  # Liberar el archivo antes de reemplazarlo
+    return None
+
+
+def cargar_red(file_path, callback=None):
+    """
+    Cargar ``(G, data)`` de un JSON usando su snapshot si sigue vigente.
+
+    Si no lo hay (o el JSON cambió) se lee el JSON y, si es grande, se
+    regenera el snapshot para la próxima vez. Retorna ``(G, data, desde_snapshot)``.
+    ``callback(hechos, total)`` informa el avance (bytes del JSON o nodos,
+    aristas y elementos del snapshot); si detiene la lectura la red queda a
+    medias y el snapshot no se toca.
+    """
+    origen = firma_archivo(file_path)
+    snapshot = abrir_snapshot(file_path)
+    if snapshot is not None:
+        try:
+            graph = snapshot.grafo(callback=callback)
+            data = snapshot.datos(callback=callback) if graph is not None else None
+        finally:
+            snapshot.cerrar()
+        return (graph if graph is not None else nx.DiGraph()), data or [], True
+
+    ruta = ruta_snapshot(file_path)
+    graph, data, completa = leer_red_en_flujo(file_path, callback=callback)
+    if completa and (origen['tamano'] >= MIN_BYTES_SNAPSHOT or os.path.exists(ruta)):
+        try:
+            guardar_snapshot(ruta, data, graph, origen)
+        except (OSError, ValueError):
+            pass  # El snapshot es solo un acelerador
+    return graph, data, False
@@ -0,0 +1,127 @@
+"""Ejecución de trabajos largos fuera del hilo de la interfaz (QThreadPool)."""
+import threading
+import traceback
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+EN_COLA = "En cola"
+EN_CURSO = "En curso"
+CANCELANDO = "Cancelando"
+
+
+class SenalesTarea(QObject):
+    """Señales de una tarea; se entregan en el hilo de la interfaz."""
+    progreso = pyqtSignal(int, int)      # hecho, total
+    resultado = pyqtSignal(object)
+    error = pyqtSignal(str)
+    terminada = pyqtSignal()
+
+
+class Tarea(QRunnable):
+    """
+    Trabajo que corre en un hilo del pool.
+
+    ``funcion(tarea, *args, **kwargs)`` recibe la propia tarea para informar
+    avance con ``reportar_progreso`` y consultar ``cancelada()``; la
+    cancelación es cooperativa. Con ``conservar_parcial`` el resultado se
+    entrega aunque la tarea se haya cancelado (p. ej. una matriz a medias).
+    """
+
+    def __init__(self, nombre, funcion, *args, conservar_parcial=False, **kwargs):
+        super().__init__()
+        self.conservar_parcial = conservar_parcial
+        self.setAutoDelete(False)
+        self.nombre = nombre
+        self.funcion = funcion
+        self.args = args
+        self.kwargs = kwargs
+        self.senales = SenalesTarea()
+        self.estado = EN_COLA
+        self.hecho = 0
+        self.total = 0
+        self._cancelada = threading.Event()
+
+    def cancelar(self):
+        self._cancelada.set()
+        self.estado = CANCELANDO
+
+    def cancelada(self):
+        return self._cancelada.is_set()
+
+    def reportar_progreso(self, hecho, total):
+        self.hecho, self.total = hecho, total
+        self.senales.progreso.emit(hecho, total)
+
+    def descripcion(self):
+        if self.estado == EN_CURSO and self.total:
+            return f"{self.nombre}: {self.estado} ({100 * self.hecho // self.total}%)"
+        return f"{self.nombre}: {self.estado}"
+
+    def run(self):
+        if not self.cancelada():
+            self.estado = EN_CURSO
+            self.senales.progreso.emit(0, 0)
+            try:
+                resultado = self.funcion(self, *self.args, **self.kwargs)
+                if self.conservar_parcial or not self.cancelada():
+                    self.senales.resultado.emit(resultado)
+            except Exception as e:
+                # Una tarea cancelada puede fallar con datos a medias: nadie espera su error
+                if not self.cancelada():
+                    traceback.print_exc()
+                    self.senales.error.emit(str(e))
+        self.senales.terminada.emit()
+
+
+class GestorTareas(QObject):
+    """Cola visible de tareas en segundo plano con cancelación."""
+    cambio = pyqtSignal()
+
+    def __init__(self, parent=None, max_hilos=2):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_hilos)
+        self._tareas = []
+
+    def tareas(self):
+        return list(self._tareas)
+
+    def lanzar(self, nombre, funcion, *args, al_terminar=None, al_fallar=None, al_progresar=None,
+               conservar_parcial=False, **kwargs):
+        """
+        Encolar ``funcion`` y conectar sus callbacks (ejecutados en el hilo de la interfaz).
+
+        ``al_terminar(resultado)`` solo se llama si la tarea no fue cancelada,
+        salvo que se pida ``conservar_parcial``.
+        """
+        tarea = Tarea(nombre, funcion, *args, conservar_parcial=conservar_parcial, **kwargs)
+        if al_terminar is not None:
+            tarea.senales.resultado.connect(al_terminar)
+        if al_fallar is not None:
+            tarea.senales.error.connect(al_fallar)
+        if al_progresar is not None:
+            tarea.senales.progreso.connect(al_progresar)
+        tarea.senales.progreso.connect(lambda *_: self.cambio.emit())
+        tarea.senales.terminada.connect(lambda: self._quitar(tarea))
+
+        self._tareas.append(tarea)
+        self.pool.start(tarea)
+        self.cambio.emit()
+        return tarea
+
+    def cancelar(self, tarea):
+        """Cancelar una tarea: si no empezó se quita de la cola (y se avisa que terminó)."""
+        tarea.cancelar()
+        if self.pool.tryTake(tarea):
+            tarea.senales.terminada.emit()
+        self.cambio.emit()
+
+    def cancelar_todas(self, nombre=None):
+        for tarea in self.tareas():
+            if nombre is None or tarea.nombre == nombre:
+                self.cancelar(tarea)
+
+    def _quitar(self, tarea):
+        if tarea in self._tareas:
+            self._tareas.remove(tarea)
+            self.cambio.emit()